@@ -1,9 +1,11 @@
+import math
 from django.db.models import Avg, Sum, Count, Q, Max, Min
 from django.utils import timezone
 from datetime import datetime, timedelta, date
 from decimal import Decimal
 from apps.production.models import Production, Scene
-from apps.schedule.models import ShootingDay, StatusUpdate
+from apps.schedule.models import ProductionCalendar, ShootingDay, StatusUpdate
+from apps.schedule.workdays import get_work_calendar
 from apps.crew.models import CrewMember
 from .models import ProductionMetrics, CrewPerformance, BudgetTracking, VelocityTrend
 
@@ -325,28 +327,34 @@ class AnalyticsEngine:
         completed_scenes = self.production.scenes.filter(status='completed').count()
         remaining_scenes = total_scenes - completed_scenes
         
-        # Calculate estimated completion
+        # Velocity is per shooting day, so count forward in work days of the calendar
+        work_calendar = get_work_calendar(self.production_id)
+        today = timezone.now().date()
         if scenes_per_day > 0:
-            estimated_days_remaining = remaining_scenes / scenes_per_day
-            estimated_completion_date = timezone.now().date() + timedelta(days=estimated_days_remaining)
+            estimated_days_remaining = math.ceil(remaining_scenes / scenes_per_day)
+            # Today counts as the first remaining shooting day
+            estimated_completion_date = work_calendar.offset(today, max(estimated_days_remaining - 1, 0))
         else:
+            estimated_days_remaining = None
             estimated_completion_date = None
         
-        # Compare with planned completion
-        try:
-            planned_completion = self.production.calendar.principal_end
-            if estimated_completion_date:
-                variance_days = (estimated_completion_date - planned_completion).days
+        # Compare with planned completion (in shooting days)
+        planned_completion = ProductionCalendar.objects.filter(
+            production_id=self.production_id
+        ).values_list('principal_end', flat=True).first()
+        if planned_completion and estimated_completion_date:
+            if estimated_completion_date >= planned_completion:
+                variance_days = work_calendar.count(planned_completion + timedelta(days=1), estimated_completion_date)
             else:
-                variance_days = None
-        except:
-            planned_completion = None
+                variance_days = -work_calendar.count(estimated_completion_date + timedelta(days=1), planned_completion)
+        else:
             variance_days = None
         
         return {
             'estimated_completion_date': estimated_completion_date,
             'planned_completion_date': planned_completion,
             'variance_days': variance_days,
+            'remaining_shooting_days': estimated_days_remaining,
             'remaining_scenes': remaining_scenes,
             'current_velocity_scenes_per_day': round(scenes_per_day, 2),
             'current_velocity_pages_per_day': round(pages_per_day, 2),
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class CrewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.crew'
-    verbose_name = 'Crew Management'
\ No newline at end of file
+    verbose_name = 'Crew Management'
+    
+    def ready(self):
+        import apps.crew.signals
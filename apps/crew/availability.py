@@ -0,0 +1,76 @@
+# apps/crew/availability.py
+from collections import defaultdict
+from datetime import date
+from functools import reduce
+from operator import or_
+from typing import Dict, List, Sequence, Tuple
+
+from django.db.models import Q
+
+from .models import CrewAssignment
+
+# Assignments with these statuses block the crew member
+BLOCKING_STATUSES = ('confirmed', 'tentative')
+
+
+class CrewAvailability:
+    """
+    Availability of a crew pool over one or more date windows
+
+    All overlapping assignments of the pool are loaded with one query and
+    grouped per crew member in memory, so a check costs two queries (crew,
+    assignments) regardless of crew size or number of windows. Open-ended
+    assignments (no end_date) block everything from their start.
+    """
+
+    def __init__(self, windows: Sequence[Tuple[date, date]], statuses=BLOCKING_STATUSES):
+        self.windows = list(windows)
+        self.statuses = statuses
+
+    def _overlap_q(self) -> Q:
+        return reduce(or_, (
+            Q(start_date__lte=end) & (Q(end_date__gte=start) | Q(end_date__isnull=True))
+            for start, end in self.windows
+        ))
+
+    def _windows_hit(self, assignment) -> List[int]:
+        return [
+            index for index, (start, end) in enumerate(self.windows)
+            if assignment.start_date <= end
+            and (assignment.end_date is None or assignment.end_date >= start)
+        ]
+
+    def check(self, crew) -> Dict:
+        """
+        Split the crew queryset into available and unavailable members
+
+        Returns {'available': [member], 'unavailable': [(member, [(assignment,
+        [window index])])], 'available_per_window': [count]}. A member is
+        available only when free in every window.
+        """
+        members = list(crew.select_related('primary_position__department'))
+        members_by_id = {member.pk: member for member in members}
+
+        assignments = CrewAssignment.objects.filter(
+            self._overlap_q(),
+            crew_member__in=crew.values('pk'),
+            status__in=self.statuses,
+        ).select_related('production', 'position__department').order_by('start_date')
+
+        conflicts = defaultdict(list)
+        busy_per_window = [set() for _ in self.windows]
+        for assignment in assignments:
+            member = members_by_id.get(assignment.crew_member_id)
+            if member is None:
+                continue
+            assignment.crew_member = member
+            windows = self._windows_hit(assignment)
+            conflicts[member.pk].append((assignment, windows))
+            for index in windows:
+                busy_per_window[index].add(member.pk)
+
+        return {
+            'available': [member for member in members if member.pk not in conflicts],
+            'unavailable': [(member, conflicts[member.pk]) for member in members if member.pk in conflicts],
+            'available_per_window': [len(members) - len(busy) for busy in busy_per_window],
+        }
@@ -0,0 +1,226 @@
+# apps/crew/callsheets.py
+"""
+Call sheet generator
+
+Derives a CallSheet and its CrewCall rows from a shooting day's schedule:
+crew calls per department from the first setup, cast calls from the
+scenes' characters -> actor. Regenerating an existing sheet diffs against
+its CrewCall rows, so only added, changed and removed calls are written.
+Final sheets are served from a cached, pre-rendered JSON snapshot until
+they are revised.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from apps.production.models import Scene
+from apps.schedule.models import DayBreak, SceneSchedule, ShootingDay
+from .models import CallSheet, CrewAssignment, CrewCall
+
+# Assignments with these statuses are called
+CALLED_STATUSES = ('confirmed',)
+
+# Minutes before the first setup a department has to be on set
+DEPARTMENT_LEAD_MINUTES = {
+    'Production': 120,
+    'Art Direction': 120,
+    'Lighting': 90,
+    'Grip': 90,
+    'Camera': 60,
+    'Sound': 45,
+}
+DEFAULT_LEAD_MINUTES = 60
+
+# Hair, makeup and wardrobe before the actor's first scene
+CAST_PREP_MINUTES = 90
+CAST_REPORT_TO = 'Hair & Makeup'
+CREW_REPORT_TO = 'Base Camp'
+
+# Written by the generator; confirmation and status stay with the crew member
+GENERATED_FIELDS = ('call_time', 'wrap_time', 'meal_time', 'report_to', 'special_instructions')
+
+
+def _minus(day, at: time, minutes: int) -> time:
+    """at - minutes, not earlier than midnight of the day"""
+    moment = datetime.combine(day, at) - timedelta(minutes=minutes)
+    return moment.time() if moment.date() == day else time(0)
+
+
+def call_times(shooting_day: ShootingDay) -> Dict:
+    """
+    {crew_member_id: {field: value}} for everyone called on a shooting day
+
+    Crew is called at the general call or earlier when the department's
+    lead time before the first setup requires it; cast is called
+    CAST_PREP_MINUTES before their first scene of the day. Crew members who
+    are also cast get the earlier of the two calls.
+    """
+    day = shooting_day.shoot_date
+    entries = list(
+        SceneSchedule.objects.filter(shooting_day=shooting_day)
+        .order_by('day_order')
+        .values_list('scene_id', 'scene__scene_number', 'estimated_start')
+    )
+    first_setup = entries[0][2] if entries else shooting_day.shooting_call
+    meal = (
+        DayBreak.objects.filter(shooting_day=shooting_day, break_type='meal')
+        .order_by('scheduled_start').values_list('scheduled_start', flat=True).first()
+    )
+    common = {'wrap_time': shooting_day.estimated_wrap, 'meal_time': meal}
+
+    calls = {}
+    assignments = CrewAssignment.objects.filter(
+        Q(end_date__gte=day) | Q(end_date__isnull=True),
+        production_id=shooting_day.production_id,
+        status__in=CALLED_STATUSES,
+        start_date__lte=day,
+    ).values_list('crew_member_id', 'position__department__name')
+    for crew_member_id, department in assignments:
+        lead = DEPARTMENT_LEAD_MINUTES.get(department, DEFAULT_LEAD_MINUTES)
+        call_time = min(shooting_day.general_call, _minus(day, first_setup, lead))
+        current = calls.get(crew_member_id)
+        if current is None or call_time < current['call_time']:
+            calls[crew_member_id] = dict(
+                common, call_time=call_time, report_to=CREW_REPORT_TO, special_instructions=''
+            )
+
+    # Cast: first appearance per actor, scene numbers and characters for the instructions
+    starts = {scene_id: (number, start) for scene_id, number, start in entries}
+    cast = defaultdict(lambda: {'first': None, 'scenes': [], 'characters': set()})
+    for scene_id, character, actor_id in Scene.characters.through.objects.filter(
+        scene_id__in=list(starts), character__actor__isnull=False
+    ).values_list('scene_id', 'character__name', 'character__actor_id'):
+        number, start = starts[scene_id]
+        member = cast[actor_id]
+        member['first'] = start if member['first'] is None else min(member['first'], start)
+        if number not in member['scenes']:
+            member['scenes'].append(number)
+        member['characters'].add(character)
+
+    order = {number: i for i, (_, number, _) in enumerate(entries)}
+    for actor_id, member in cast.items():
+        call_time = _minus(day, member['first'], CAST_PREP_MINUTES)
+        scenes = sorted(member['scenes'], key=order.get)
+        cast_call = dict(
+            common, call_time=call_time, report_to=CAST_REPORT_TO,
+            special_instructions=f"{', '.join(sorted(member['characters']))} - Sc. {', '.join(scenes)}",
+        )
+        current = calls.get(actor_id)
+        if current is None or call_time <= current['call_time']:
+            calls[actor_id] = cast_call
+    return calls
+
+
+def _update_calls(calls):
+    """
+    Write changed calls with one UPDATE per distinct set of values
+
+    A department's calls move together, so this is a handful of plain
+    UPDATE ... WHERE id IN statements instead of bulk_update's CASE per row.
+    """
+    fields = GENERATED_FIELDS + ('confirmed', 'confirmed_at')
+    groups = defaultdict(list)
+    for call in calls:
+        groups[tuple(getattr(call, field) for field in fields)].append(call.pk)
+    for values, pks in groups.items():
+        CrewCall.objects.filter(pk__in=pks).update(**dict(zip(fields, values)))
+
+
+def generate_call_sheet(shooting_day: ShootingDay) -> Dict:
+    """
+    Create or regenerate the call sheet of a shooting day
+
+    One transaction, bulk writes only: new calls are bulk-created, changed
+    ones updated grouped by value (confirmation is reset when the call time
+    moves) and calls of people no longer needed are deleted. A final sheet
+    that changed becomes 'revised'. Returns the sheet and row counts.
+    """
+    shooting_day = ShootingDay.objects.select_related('primary_location').get(pk=shooting_day.pk)
+    location = shooting_day.primary_location
+    sheet_fields = {
+        'shooting_day': shooting_day.day_number,
+        'general_call_time': shooting_day.general_call,
+        'shooting_call': shooting_day.shooting_call,
+        'wrap_time': shooting_day.estimated_wrap,
+        'weather_forecast': shooting_day.weather_forecast,
+        'sunrise': shooting_day.sunrise,
+        'sunset': shooting_day.sunset,
+    }
+    if location is not None:
+        sheet_fields['base_camp_location'] = f'{location.name}, {location.address}'
+    desired = call_times(shooting_day)
+
+    with transaction.atomic():
+        call_sheet, created = CallSheet.objects.select_for_update().get_or_create(
+            production_id=shooting_day.production_id, date=shooting_day.shoot_date,
+            defaults=sheet_fields,
+        )
+        changed = [] if created else [
+            field for field, value in sheet_fields.items() if getattr(call_sheet, field) != value
+        ]
+        existing = {} if created else {call.crew_member_id: call for call in call_sheet.crew_calls.all()}
+
+        new_calls, changed_calls = [], []
+        for crew_member_id, values in desired.items():
+            call = existing.get(crew_member_id)
+            if call is None:
+                new_calls.append(CrewCall(call_sheet=call_sheet, crew_member_id=crew_member_id, **values))
+                continue
+            if all(getattr(call, field) == values[field] for field in GENERATED_FIELDS):
+                continue
+            if call.call_time != values['call_time']:
+                call.confirmed, call.confirmed_at = False, None
+            for field in GENERATED_FIELDS:
+                setattr(call, field, values[field])
+            changed_calls.append(call)
+
+        removed = [call.pk for crew_member_id, call in existing.items() if crew_member_id not in desired]
+        CrewCall.objects.bulk_create(new_calls, batch_size=500)
+        _update_calls(changed_calls)
+        if removed:
+            CrewCall.objects.filter(pk__in=removed).delete()
+
+        if not created and (changed or new_calls or changed_calls or removed):
+            for field in changed:
+                setattr(call_sheet, field, sheet_fields[field])
+            if call_sheet.status == 'final':
+                call_sheet.status = 'revised'
+                changed.append('status')
+            call_sheet.save(update_fields=changed + ['updated_at'])
+
+    return {
+        'call_sheet': call_sheet,
+        'created': len(new_calls),
+        'updated': len(changed_calls),
+        'deleted': len(removed),
+        'unchanged': len(existing) - len(changed_calls) - len(removed),
+    }
+
+
+# -- cached snapshot of final sheets -------------------------------------
+
+# A final sheet is distributed and does not change until it is revised
+SNAPSHOT_STATUSES = ('final',)
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def _snapshot_key(call_sheet_id):
+    return f'call_sheet_snapshot_{call_sheet_id}'
+
+
+def get_call_sheet_snapshot(call_sheet_id) -> Optional[bytes]:
+    """Rendered detail JSON of a final sheet, None when not cached"""
+    return cache.get(_snapshot_key(call_sheet_id))
+
+
+def set_call_sheet_snapshot(call_sheet: CallSheet, content: bytes):
+    if call_sheet.status in SNAPSHOT_STATUSES:
+        cache.set(_snapshot_key(call_sheet.pk), content, SNAPSHOT_TIMEOUT)
+
+
+def invalidate_call_sheet_snapshots(call_sheet_ids):
+    cache.delete_many([_snapshot_key(call_sheet_id) for call_sheet_id in call_sheet_ids])
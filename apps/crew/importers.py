@@ -0,0 +1,170 @@
+# apps/crew/importers.py
+import codecs
+import csv
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+
+import openpyxl
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import CrewMember, Position
+
+# Upload column -> CrewMember field
+FIELD_MAP = {
+    'email': 'email',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'phone': 'phone_primary',
+    'emergency_contact': 'emergency_contact_name',
+    'emergency_phone': 'emergency_contact_phone',
+}
+
+# bulk_update builds one CASE per field; short batches keep the statements cheap
+UPDATE_BATCH_SIZE = 100
+
+UPDATE_FIELDS = [field for field in FIELD_MAP.values() if field != 'email'] + [
+    'primary_position', 'updated_at'
+]
+
+
+class CrewImporter:
+    """
+    Streaming crew import from CSV/XLSX uploads
+
+    Rows are read lazily (incremental csv reader, openpyxl read-only mode)
+    and processed in chunks: existing members and positions are looked up
+    with one query each per chunk, writes go through bulk_create and
+    bulk_update in one transaction per chunk. A bad row is reported in
+    `errors` and does not stop the import.
+    """
+
+    def __init__(self, update_existing=False, chunk_size=1000):
+        self.update_existing = update_existing
+        self.chunk_size = chunk_size
+        self.positions = {}  # lower(title) -> Position, shared across chunks
+        self.max_lengths = {
+            field: CrewMember._meta.get_field(field).max_length
+            for field in FIELD_MAP.values()
+        }
+
+    def import_file(self, file) -> Dict:
+        started = time.perf_counter()
+        stats = {'imported': 0, 'updated': 0, 'errors': [], 'chunks': 0}
+
+        rows = self.iter_rows(file)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk, stats)
+            stats['chunks'] += 1
+
+        seconds = time.perf_counter() - started
+        stats['total_processed'] = stats['imported'] + stats['updated'] + len(stats['errors'])
+        stats['seconds'] = round(seconds, 3)
+        stats['rows_per_second'] = round(stats['total_processed'] / seconds) if seconds else 0
+        return stats
+
+    # -- reading -------------------------------------------------------
+
+    def iter_rows(self, file) -> Iterator[Tuple[int, Dict]]:
+        """(row number, {column: value}) for every data row of the upload"""
+        if file.name.endswith('.csv'):
+            reader = csv.DictReader(codecs.iterdecode(file, 'utf-8-sig'))
+            reader.fieldnames = [self._header(h) for h in reader.fieldnames or []]
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            headers = [self._header(h) for h in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if any(value is not None for value in values):
+                    yield number, dict(zip(headers, values))
+        finally:
+            wb.close()
+
+    @staticmethod
+    def _header(value):
+        return str(value).strip().lower() if value is not None else ''
+
+    # -- writing -------------------------------------------------------
+
+    def _import_chunk(self, chunk: List[Tuple[int, Dict]], stats: Dict):
+        parsed = []
+        for number, row in chunk:
+            data = {
+                field: str(row.get(column) or '').strip()
+                for column, field in FIELD_MAP.items()
+            }
+            data['position'] = str(row.get('position') or '').strip()
+            error = self._validate(data)
+            if error:
+                stats['errors'].append({'row': number, 'email': data['email'], 'error': error})
+            else:
+                parsed.append((number, data))
+
+        existing = {
+            member.email: member
+            for member in CrewMember.objects.filter(email__in={data['email'] for _, data in parsed})
+        }
+        self._load_positions({data['position'].lower() for _, data in parsed if data['position']})
+
+        to_create = {}
+        to_update = {}
+        now = timezone.now()
+        for number, data in parsed:
+            email = data['email']
+            position = self.positions.get(data.pop('position').lower())
+            if position:
+                data['primary_position'] = position
+
+            member = existing.get(email) or to_create.get(email)
+            if member is None:
+                to_create[email] = CrewMember(**data)
+                continue
+            if not self.update_existing:
+                stats['errors'].append({'row': number, 'email': email, 'error': f'{email} already exists'})
+                continue
+
+            for key, value in data.items():
+                if value:  # Only update non-empty values
+                    setattr(member, key, value)
+            member.updated_at = now
+            if email not in to_create:
+                to_update[email] = member
+            stats['updated'] += 1
+
+        with transaction.atomic():
+            CrewMember.objects.bulk_create(to_create.values())
+            CrewMember.objects.bulk_update(to_update.values(), UPDATE_FIELDS, batch_size=UPDATE_BATCH_SIZE)
+        stats['imported'] += len(to_create)
+
+    def _validate(self, data: Dict):
+        if not data['email']:
+            return 'Email is required'
+        try:
+            validate_email(data['email'])
+        except ValidationError:
+            return f"Invalid email {data['email']}"
+        for field, max_length in self.max_lengths.items():
+            if max_length and len(data[field]) > max_length:
+                return f'{field} is longer than {max_length} characters'
+        return None
+
+    def _load_positions(self, titles):
+        missing = titles - set(self.positions)
+        if not missing:
+            return
+        positions = Position.objects.annotate(
+            title_lower=Lower('title')
+        ).filter(title_lower__in=missing)
+        for position in positions:  # Meta.ordering, first match wins
+            self.positions.setdefault(position.title_lower, position)
@@ -0,0 +1,227 @@
+# apps/crew/intervals.py
+import uuid
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from time import monotonic
+from typing import Any, Iterable, Iterator, List, NamedTuple, Tuple
+
+from django.core.cache import cache
+
+from .availability import BLOCKING_STATUSES
+from .models import CrewAssignment, CrewCall
+
+# Calls without wrap time are assumed to last a standard shooting day
+DEFAULT_CALL_LENGTH = timedelta(hours=12)
+
+
+class Interval(NamedTuple):
+    """Closed interval [start, end] of `key` (crew member) booked by `group`"""
+    start: Any
+    end: Any
+    key: Any
+    group: Any      # production / call sheet / scene; overlaps within a group are fine
+    payload: Any
+
+
+class IntervalIndex:
+    """
+    Static interval tree over closed intervals
+
+    Intervals are sorted by start and covered by a segment tree of maximum
+    end values. overlapping(lo, hi) only visits subtrees that can contain a
+    hit, O(log n + k) instead of a scan over the whole history.
+    """
+
+    def __init__(self, intervals: Iterable[Interval]):
+        self.intervals = sorted(intervals, key=lambda interval: interval.start)
+        self.starts = [interval.start for interval in self.intervals]
+
+        self.size = 1
+        while self.size < len(self.intervals):
+            self.size *= 2
+        self.max_end = [None] * (2 * self.size)
+        for i, interval in enumerate(self.intervals):
+            self.max_end[self.size + i] = interval.end
+        for node in range(self.size - 1, 0, -1):
+            left, right = self.max_end[2 * node], self.max_end[2 * node + 1]
+            self.max_end[node] = left if right is None or (left is not None and left >= right) else right
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def overlapping(self, lo, hi) -> List[Interval]:
+        """Intervals intersecting [lo, hi]"""
+        # Only intervals starting before hi can overlap
+        count = bisect_right(self.starts, hi)
+        if not count:
+            return []
+
+        found = []
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, first, last = stack.pop()
+            end = self.max_end[node]
+            if first >= count or end is None or end < lo:
+                continue
+            if node >= self.size:
+                found.append(self.intervals[first])
+                continue
+            middle = (first + last) // 2
+            stack.append((2 * node + 1, middle, last))
+            stack.append((2 * node, first, middle))
+        return found
+
+
+def find_overlaps(intervals: Iterable[Interval], closed=True) -> Iterator[Tuple[Interval, Interval]]:
+    """
+    Pairs of overlapping intervals of the same key from different groups
+
+    Closed intervals touching at an end overlap (a day booked twice);
+    with closed=False they do not (wrap at 18:00, next call at 18:00).
+    """
+    by_key = defaultdict(list)
+    for interval in intervals:
+        by_key[interval.key].append(interval)
+
+    for items in by_key.values():
+        items.sort(key=lambda interval: interval.start)
+        active = []
+        for item in items:
+            if closed:
+                active = [a for a in active if a.end >= item.start]
+            else:
+                active = [a for a in active if a.end > item.start]
+            for other in active:
+                if other.group != item.group:
+                    yield other, item
+            active.append(item)
+
+
+# -- sources -----------------------------------------------------------
+
+def assignment_intervals(start_date=None, end_date=None) -> List[Interval]:
+    """Blocking crew assignments, optionally only those touching a date range"""
+    assignments = CrewAssignment.objects.filter(status__in=BLOCKING_STATUSES)
+    if end_date is not None:
+        assignments = assignments.filter(start_date__lte=end_date)
+    if start_date is not None:
+        assignments = assignments.exclude(end_date__lt=start_date)
+
+    return [
+        Interval(start, end or date.max, crew_member_id, production_id, assignment_id)
+        for assignment_id, crew_member_id, production_id, start, end in assignments.order_by().values_list(
+            'id', 'crew_member_id', 'production_id', 'start_date', 'end_date'
+        )
+    ]
+
+
+def call_intervals(start_date, end_date) -> List[Interval]:
+    """Crew calls of call sheets between the dates (days off excluded)"""
+    calls = CrewCall.objects.filter(
+        call_sheet__date__range=(start_date, end_date)
+    ).exclude(status='day_off').order_by().values(
+        'id', 'crew_member_id', 'call_sheet_id', 'call_sheet__date', 'call_time', 'wrap_time',
+        'call_sheet__production_id', 'call_sheet__production__title',
+    )
+
+    intervals = []
+    for call in calls:
+        start = datetime.combine(call['call_sheet__date'], call['call_time'])
+        if call['wrap_time'] is None:
+            end = start + DEFAULT_CALL_LENGTH
+        else:
+            end = datetime.combine(call['call_sheet__date'], call['wrap_time'])
+            if end <= start:  # Wrap after midnight
+                end += timedelta(days=1)
+        intervals.append(Interval(start, end, call['crew_member_id'], call['call_sheet_id'], {
+            'call_id': call['id'],
+            'call_sheet_id': call['call_sheet_id'],
+            'production_id': call['call_sheet__production_id'],
+            'production_title': call['call_sheet__production__title'],
+        }))
+    return intervals
+
+
+def scene_intervals(start_date, end_date) -> List[Interval]:
+    """Cast (actors of scene characters) per scheduled scene timing"""
+    from apps.schedule.models import SceneSchedule
+
+    entries = SceneSchedule.objects.filter(
+        shooting_day__shoot_date__range=(start_date, end_date),
+        scene__characters__actor__isnull=False,
+    ).exclude(status='cancelled').order_by().values(
+        'id', 'shooting_day__shoot_date', 'estimated_start', 'estimated_duration',
+        'scene__characters__actor_id', 'scene__scene_number',
+        'shooting_day__production_id', 'shooting_day__production__title',
+    )
+
+    intervals = []
+    for entry in entries:
+        start = datetime.combine(entry['shooting_day__shoot_date'], entry['estimated_start'])
+        intervals.append(Interval(
+            start, start + entry['estimated_duration'],
+            entry['scene__characters__actor_id'], entry['id'], {
+                'scene_schedule_id': entry['id'],
+                'scene_number': entry['scene__scene_number'],
+                'production_id': entry['shooting_day__production_id'],
+                'production_title': entry['shooting_day__production__title'],
+            }
+        ))
+    return intervals
+
+
+# -- cached assignment index -------------------------------------------
+
+GENERATION_KEY = 'crew_assignment_index_generation'
+# Without a shared CACHES backend only the writing process sees a new
+# generation, other processes rebuild their index after this many seconds
+INDEX_TTL_SECONDS = 60
+INDEX_CACHE_SIZE = 16  # date ranges kept per process
+# process-local {(start, end): (generation, built at, index)}: unpickling a large index costs more than a query
+_indexes = {}
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def get_assignment_index(start_date=None, end_date=None) -> IntervalIndex:
+    """
+    Index of blocking assignments touching the date range (all without one)
+
+    Rebuilt after any assignment change and at the latest
+    INDEX_TTL_SECONDS after it was built.
+    """
+    generation = _generation()
+    key = (start_date, end_date)
+    now = monotonic()
+    cached = _indexes.get(key)
+    if cached is None or cached[0] != generation or now - cached[1] > INDEX_TTL_SECONDS:
+        _indexes.pop(key, None)
+        if len(_indexes) >= INDEX_CACHE_SIZE:
+            del _indexes[next(iter(_indexes))]  # Oldest range
+        cached = (generation, now, IntervalIndex(assignment_intervals(start_date, end_date)))
+        _indexes[key] = cached
+    return cached[2]
+
+
+def invalidate_assignment_index():
+    cache.delete(GENERATION_KEY)
+
+
+def double_booked_assignments(start_date, end_date) -> List[Tuple[Interval, Interval]]:
+    """Overlapping assignments of one crew member on different productions within the range"""
+    candidates = get_assignment_index(start_date, end_date).overlapping(start_date, end_date)
+    return list(find_overlaps(candidates))
+
+
+def double_booked_times(start_date, end_date) -> List[Tuple[str, Interval, Interval]]:
+    """Overlapping crew calls and cast scene timings between the dates"""
+    conflicts = [('call', a, b) for a, b in find_overlaps(call_intervals(start_date, end_date), closed=False)]
+    conflicts += [('scene', a, b) for a, b in find_overlaps(scene_intervals(start_date, end_date), closed=False)]
+    return conflicts
@@ -0,0 +1,105 @@
+# apps/crew/management/commands/benchmark_call_sheet.py
+import time
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.crew.callsheets import call_times, generate_call_sheet
+from apps.crew.models import Character, CrewAssignment, CrewMember, Department, Position
+from apps.crew.serializers import CallSheetCreateSerializer, CrewCallSerializer
+from apps.schedule.models import SceneSchedule, ShootingDay
+from apps.schedule.management.commands._synthetic import create_synthetic_production
+
+DEPARTMENTS = ('Camera', 'Lighting', 'Sound', 'Art Direction', 'Production', 'Costume')
+
+
+class Command(BaseCommand):
+    help = 'Time call sheet generation for one shooting day: per-row serializer vs bulk generator'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--crew', type=int, default=200)
+        parser.add_argument('--cast', type=int, default=50)
+        parser.add_argument('--scenes', type=int, default=8)
+
+    def handle(self, *args, **options):
+        # Synthetic data lives only for the duration of the run
+        with transaction.atomic():
+            shooting_day = self._production(options['crew'], options['cast'], options['scenes'])
+
+            def per_row():
+                calls = call_times(shooting_day)
+                serializer = CallSheetCreateSerializer(data={
+                    'production': shooting_day.production_id, 'shooting_day': shooting_day.day_number,
+                    'date': shooting_day.shoot_date + timedelta(days=1),
+                    'general_call_time': shooting_day.general_call, 'shooting_call': shooting_day.shooting_call,
+                    'base_camp_location': '-', 'nearest_hospital': '-',
+                })
+                serializer.is_valid(raise_exception=True)
+                call_sheet = serializer.save()
+                for crew_member_id, values in calls.items():
+                    row = CrewCallSerializer(data=dict(values, call_sheet=call_sheet.pk, crew_member=crew_member_id))
+                    row.is_valid(raise_exception=True)
+                    row.save()
+
+            def shift_schedule():
+                SceneSchedule.objects.filter(shooting_day=shooting_day, day_order=0).update(estimated_start=clock(8))
+
+            cases = [
+                ('per-row serializer', per_row),
+                ('generate (new)', lambda: generate_call_sheet(shooting_day)),
+                ('regenerate (no change)', lambda: generate_call_sheet(shooting_day)),
+                ('regenerate (moved)', lambda: (shift_schedule(), generate_call_sheet(shooting_day))[1]),
+            ]
+            self.stdout.write(f"{options['crew'] + options['cast']} people called")
+            self.stdout.write(f"{'variant':<24} {'queries':>8} {'ms':>9}  rows")
+            for label, run in cases:
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    result = run()
+                    elapsed = time.perf_counter() - started
+                rows = '' if result is None else (
+                    f"+{result['created']} ~{result['updated']} -{result['deleted']}"
+                )
+                self.stdout.write(f"{label:<24} {len(queries):>8} {elapsed * 1000:>9.1f}  {rows}")
+
+            transaction.set_rollback(True)
+
+    def _production(self, crew, cast, scenes):
+        production = create_synthetic_production(scenes, 2, character_count=cast)
+        departments = [
+            Department.objects.get_or_create(name=name, defaults={'abbreviation': name[:4].upper()})[0]
+            for name in DEPARTMENTS
+        ]
+        positions = [Position.objects.create(title=f'Bench {d.name}', department=d) for d in departments]
+        members = CrewMember.objects.bulk_create([
+            CrewMember(
+                email=f'callsheet{i}@example.com', first_name='Bench', last_name=str(i),
+                phone_primary='+420600000000', emergency_contact_name='-',
+                emergency_contact_phone='+420600000000',
+            ) for i in range(crew + cast)
+        ])
+        CrewAssignment.objects.bulk_create([
+            CrewAssignment(
+                production=production, crew_member=member, position=positions[i % len(positions)],
+                start_date=production.start_date, daily_rate=1000, status='confirmed',
+            ) for i, member in enumerate(members[:crew])
+        ])
+        characters = list(Character.objects.filter(production=production).order_by('id'))
+        for character, actor in zip(characters, members[crew:]):
+            character.actor = actor
+        Character.objects.bulk_update(characters, ['actor'])
+
+        shooting_day = ShootingDay.objects.create(
+            production=production, shoot_date=production.start_date, day_number=1,
+            general_call=clock(7), shooting_call=clock(8), estimated_wrap=clock(19),
+        )
+        # Every character appears so the whole cast is called
+        for order, scene in enumerate(production.scenes.order_by('id')):
+            scene.characters.add(*characters[order::scenes])
+            SceneSchedule.objects.create(
+                shooting_day=shooting_day, scene=scene, day_order=order,
+                estimated_start=clock(9 + order), estimated_duration=timedelta(hours=1),
+            )
+        return shooting_day
@@ -0,0 +1,96 @@
+# apps/crew/management/commands/benchmark_crew_import.py
+import csv
+import os
+import tempfile
+import time
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.crew.importers import CrewImporter
+from apps.crew.models import Department, Position
+
+POSITIONS = ['Gaffer', 'Best Boy', 'Grip', 'Focus Puller', 'Boom Operator', 'Runner']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the crew bulk importer on a generated CSV/XLSX roster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--existing', type=float, default=0.2,
+                            help='Share of rows that update existing members (second pass)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        path = self._generate(rows, options['format'])
+        try:
+            # Imported data lives only for the duration of the run
+            with transaction.atomic():
+                department = Department.objects.create(name='Benchmark', abbreviation='BM')
+                Position.objects.bulk_create([
+                    Position(title=title, department=department) for title in POSITIONS
+                ])
+
+                stats = self._run(path, CrewImporter(chunk_size=options['chunk_size']))
+                self._report('insert', stats)
+
+                updates = int(rows * options['existing'])
+                if updates:
+                    update_path = self._generate(updates, options['format'])
+                    try:
+                        stats = self._run(update_path, CrewImporter(
+                            update_existing=True, chunk_size=options['chunk_size']
+                        ))
+                        self._report('update', stats)
+                    finally:
+                        os.unlink(update_path)
+
+                transaction.set_rollback(True)
+        finally:
+            os.unlink(path)
+
+    def _run(self, path, importer):
+        with open(path, 'rb') as handle:
+            return importer.import_file(handle)
+
+    def _report(self, label, stats):
+        self.stdout.write(
+            f"{label:>7}: {stats['total_processed']} rows in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_second']} rows/s, {stats['chunks']} chunks) - "
+            f"imported {stats['imported']}, updated {stats['updated']}, errors {len(stats['errors'])}"
+        )
+
+    def _generate(self, rows, file_format):
+        headers = ['email', 'first_name', 'last_name', 'phone', 'position',
+                   'emergency_contact', 'emergency_phone']
+
+        def row(i):
+            return [
+                f'crew{i}@example.com', f'First{i}', f'Last{i}', f'+42060{i:07d}',
+                POSITIONS[i % len(POSITIONS)], f'Contact {i}', f'+42070{i:07d}',
+            ]
+
+        started = time.perf_counter()
+        suffix = f'.{file_format}'
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+
+        if file_format == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(headers)
+                writer.writerows(row(i) for i in range(rows))
+        else:
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet()
+            ws.append(headers)
+            for i in range(rows):
+                ws.append(row(i))
+            wb.save(path)
+
+        self.stdout.write(f'generated {rows} rows ({file_format}) in {time.perf_counter() - started:.2f}s')
+        return path
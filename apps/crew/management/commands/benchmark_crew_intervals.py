@@ -0,0 +1,116 @@
+# apps/crew/management/commands/benchmark_crew_intervals.py
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.crew.intervals import IntervalIndex, assignment_intervals, find_overlaps
+from apps.crew.models import CrewAssignment, CrewMember, Department, Position
+from apps.production.models import Production
+
+HISTORY_START = date(2000, 1, 1)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark double-booking lookups on a growing crew assignment history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,300000',
+                            help='Comma separated assignment counts')
+        parser.add_argument('--members', type=int, default=1000)
+        parser.add_argument('--per-day', type=int, default=30,
+                            help='Assignments starting per day; history grows in time, not density')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--window-days', type=int, default=14)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(v) for v in options['sizes'].split(','))
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(
+            f"{'rows':>8} {'load s':>7} {'build s':>8} {'db win ms':>10} "
+            f"{'index ms':>9} {'scan ms':>8} {'hits':>6} {'double':>7}"
+        )
+
+        # Synthetic history lives only for the duration of the run
+        with transaction.atomic():
+            department = Department.objects.create(name='Benchmark', abbreviation='BM')
+            position = Position.objects.create(title='Grip', department=department)
+            members = CrewMember.objects.bulk_create([
+                CrewMember(
+                    email=f'bench{i}@example.com', first_name='Bench', last_name=str(i),
+                    phone_primary='+420600000000', emergency_contact_name='-',
+                    emergency_contact_phone='+420600000000',
+                ) for i in range(options['members'])
+            ])
+
+            created = 0
+            for size in sizes:
+                created = self._grow(created, size, members, position, rng, options['per_day'])
+                history_days = size // options['per_day']
+                windows = []
+                for _ in range(options['queries']):
+                    start = HISTORY_START + timedelta(days=rng.randrange(history_days))
+                    windows.append((start, start + timedelta(days=options['window_days'])))
+                self._measure(size, windows)
+
+            transaction.set_rollback(True)
+
+    def _grow(self, created, size, members, position, rng, per_day):
+        # One production per full pass over the crew keeps (production, member, position) unique;
+        # its assignments start in the next stretch of the calendar
+        while created < size:
+            first_day = created // per_day
+            production = Production.objects.create(
+                title=f'Benchmark {created // len(members)}',
+                start_date=HISTORY_START + timedelta(days=first_day),
+                end_date=HISTORY_START + timedelta(days=first_day + len(members) // per_day),
+            )
+            batch = []
+            for n, member in enumerate(members[:size - created]):
+                start = HISTORY_START + timedelta(days=(created + n) // per_day)
+                batch.append(CrewAssignment(
+                    production=production, crew_member=member, position=position,
+                    start_date=start, end_date=start + timedelta(days=rng.randint(5, 90)),
+                    daily_rate=100, status=rng.choice(['confirmed', 'confirmed', 'tentative', 'cancelled']),
+                ))
+            CrewAssignment.objects.bulk_create(batch, batch_size=2000)
+            created += len(batch)
+        return created
+
+    def _measure(self, size, windows):
+        started = time.perf_counter()
+        intervals = assignment_intervals()
+        load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = IntervalIndex(intervals)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for lo, hi in windows[:20]:
+            assignment_intervals(lo, hi)
+        db_window = (time.perf_counter() - started) / min(len(windows), 20)
+
+        started = time.perf_counter()
+        hits = 0
+        double = 0
+        for lo, hi in windows:
+            found = index.overlapping(lo, hi)
+            hits += len(found)
+            double += sum(1 for _ in find_overlaps(found))
+        indexed = (time.perf_counter() - started) / len(windows)
+
+        started = time.perf_counter()
+        for lo, hi in windows:
+            [i for i in intervals if i.start <= hi and i.end >= lo]
+        scan = (time.perf_counter() - started) / len(windows)
+
+        self.stdout.write(
+            f"{size:>8} {load:>7.2f} {build:>8.2f} {db_window * 1000:>10.2f} "
+            f"{indexed * 1000:>9.3f} {scan * 1000:>8.2f} {hits // len(windows):>6} "
+            f"{double // len(windows):>7}"
+        )
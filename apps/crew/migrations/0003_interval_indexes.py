@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crew', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='callsheet',
+            index=models.Index(fields=['date', 'production'], name='crew_callsh_date_ebedd8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crewassignment',
+            index=models.Index(fields=['status', 'start_date', 'end_date'], name='crew_crewas_status_ff3f80_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crewassignment',
+            index=models.Index(fields=['crew_member', 'start_date', 'end_date'], name='crew_crewas_crew_me_ea094a_idx'),
+        ),
+    ]
@@ -143,6 +143,11 @@ class CrewAssignment(models.Model):
     class Meta:
         ordering = ['production', 'position__department', 'position']
         unique_together = ['production', 'crew_member', 'position']
+        indexes = [
+            # Date-range loads for availability and double-booking checks
+            models.Index(fields=['status', 'start_date', 'end_date']),
+            models.Index(fields=['crew_member', 'start_date', 'end_date']),
+        ]
     
     def __str__(self):
         return f"{self.crew_member.display_name} as {self.position} on {self.production}"
@@ -190,6 +195,9 @@ class CallSheet(models.Model):
     class Meta:
         ordering = ['date']
         unique_together = ['production', 'date']
+        indexes = [
+            models.Index(fields=['date', 'production']),  # Cross-production date ranges
+        ]
     
     def __str__(self):
         return f"Call Sheet - Day {self.shooting_day} - {self.date}"
@@ -175,6 +175,9 @@ class CallSheetListSerializer(serializers.ModelSerializer):
         ]
     
     def get_crew_count(self, obj):
+        # Annotated in CallSheetViewSet.get_queryset, fallback pro ostatní použití
+        if hasattr(obj, 'crew_count'):
+            return obj.crew_count
         return obj.crew_calls.count()
 
 class CallSheetDetailSerializer(serializers.ModelSerializer):
@@ -186,7 +189,11 @@ class CallSheetDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_crew_calls(self, obj):
-        calls = obj.crew_calls.select_related('crew_member').all()
+        # Prefetched with crew members in CallSheetViewSet.get_queryset
+        if 'crew_calls' in getattr(obj, '_prefetched_objects_cache', {}):
+            calls = obj.crew_calls.all()
+        else:
+            calls = obj.crew_calls.select_related('crew_member')
         return CrewCallSerializer(calls, many=True).data
 
 class CallSheetCreateSerializer(serializers.ModelSerializer):
@@ -211,17 +218,36 @@ class CharacterSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 # Additional utility serializers
-class CrewAvailabilitySerializer(serializers.Serializer):
+class DateWindowSerializer(serializers.Serializer):
     start_date = serializers.DateField()
     end_date = serializers.DateField()
-    position_id = serializers.UUIDField(required=False)
-    department_id = serializers.IntegerField(required=False)
     
     def validate(self, data):
         if data['start_date'] > data['end_date']:
             raise serializers.ValidationError("End date must be after start date")
         return data
 
+class CrewAvailabilitySerializer(serializers.Serializer):
+    """Single range (start_date/end_date) or several windows of a shooting block"""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    windows = DateWindowSerializer(many=True, required=False)
+    position_id = serializers.IntegerField(required=False)
+    department_id = serializers.IntegerField(required=False)
+    
+    def validate(self, data):
+        windows = [(w['start_date'], w['end_date']) for w in data.get('windows', [])]
+        if 'start_date' in data or 'end_date' in data:
+            if 'start_date' not in data or 'end_date' not in data:
+                raise serializers.ValidationError("Both start_date and end_date are required")
+            if data['start_date'] > data['end_date']:
+                raise serializers.ValidationError("End date must be after start date")
+            windows.insert(0, (data['start_date'], data['end_date']))
+        if not windows:
+            raise serializers.ValidationError("Provide start_date/end_date or windows")
+        data['windows'] = windows
+        return data
+
 class CrewBulkImportSerializer(serializers.Serializer):
     file = serializers.FileField()
     update_existing = serializers.BooleanField(default=False)
@@ -0,0 +1,38 @@
+# apps/crew/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .callsheets import SNAPSHOT_STATUSES, invalidate_call_sheet_snapshots
+from .intervals import invalidate_assignment_index
+from .models import CallSheet, CrewAssignment, CrewCall, CrewMember
+
+
+@receiver(post_save, sender=CrewAssignment)
+@receiver(post_delete, sender=CrewAssignment)
+def crew_assignment_changed(sender, instance, **kwargs):
+    """Assignment dates or status changed, the interval index is stale"""
+    invalidate_assignment_index()
+
+
+@receiver(post_save, sender=CallSheet)
+@receiver(post_delete, sender=CallSheet)
+def call_sheet_changed(sender, instance, **kwargs):
+    """Revised (or deleted) sheet, its snapshot is stale"""
+    invalidate_call_sheet_snapshots([instance.pk])
+
+
+@receiver(post_save, sender=CrewCall)
+@receiver(post_delete, sender=CrewCall)
+def crew_call_changed(sender, instance, **kwargs):
+    """Confirmed or edited call shows up in the sheet's snapshot"""
+    invalidate_call_sheet_snapshots([instance.call_sheet_id])
+
+
+@receiver(post_save, sender=CrewMember)
+def crew_member_changed(sender, instance, **kwargs):
+    """Renamed member, the snapshots of final sheets carry crew_member_name"""
+    invalidate_call_sheet_snapshots(
+        CrewCall.objects.filter(
+            crew_member=instance, call_sheet__status__in=SNAPSHOT_STATUSES
+        ).values_list('call_sheet_id', flat=True)
+    )
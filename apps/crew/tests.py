@@ -1,3 +1,414 @@
+import random
+from datetime import date, time, timedelta
+from io import BytesIO
+from time import monotonic
+from unittest import mock
+
+import openpyxl
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.production.models import Location, Production, Scene
+from apps.schedule.models import SceneSchedule, ShootingDay
+
+from .callsheets import generate_call_sheet
+from .importers import CrewImporter
+from .intervals import INDEX_TTL_SECONDS, Interval, IntervalIndex, get_assignment_index
+from .models import Character, CrewMember, CrewAssignment, CallSheet, CrewCall, Department, Position
+
+
+def _csv_upload(lines, name='crew.csv'):
+    return SimpleUploadedFile(name, ('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+class CrewImporterTests(TestCase):
+
+    def setUp(self):
+        department = Department.objects.create(name='Camera', abbreviation='CAM')
+        self.position = Position.objects.create(title='Focus Puller', department=department)
+
+    def _rows(self, start, count):
+        return [
+            f'crew{i}@example.com,First{i},Last{i},+420600{i:06d},focus puller'
+            for i in range(start, start + count)
+        ]
+
+    def test_csv_import_with_errors_and_duplicates(self):
+        CrewMember.objects.create(
+            email='crew0@example.com', first_name='Old', last_name='Name',
+            phone_primary='+420600000000', emergency_contact_name='X',
+            emergency_contact_phone='+420600000001',
+        )
+        lines = ['Email,First_Name,Last_Name,Phone,Position'] + self._rows(0, 3) + [
+            ',No,Email,,',
+            'not-an-email,Bad,Email,,',
+            'crew1@example.com,Again,Dup,,',
+        ]
+
+        stats = CrewImporter().import_file(_csv_upload(lines))
+
+        self.assertEqual(stats['imported'], 2)
+        self.assertEqual(stats['updated'], 0)
+        self.assertEqual(stats['total_processed'], 6)
+        self.assertEqual(
+            [(e['row'], e['error']) for e in stats['errors']],
+            [(5, 'Email is required'), (6, 'Invalid email not-an-email'),
+             (2, 'crew0@example.com already exists'), (7, 'crew1@example.com already exists')]
+        )
+        self.assertEqual(CrewMember.objects.get(email='crew2@example.com').primary_position, self.position)
+
+    def test_update_existing(self):
+        CrewImporter().import_file(_csv_upload(['email,first_name,last_name,phone,position'] + self._rows(0, 3)))
+        stats = CrewImporter(update_existing=True).import_file(_csv_upload([
+            'email,first_name,last_name',
+            'crew1@example.com,Renamed,',
+        ]))
+
+        self.assertEqual(stats['updated'], 1)
+        member = CrewMember.objects.get(email='crew1@example.com')
+        self.assertEqual((member.first_name, member.last_name), ('Renamed', 'Last1'))
+
+    def test_lookups_per_chunk_not_per_row(self):
+        header = ['email,first_name,last_name,phone,position']
+        importer = CrewImporter(chunk_size=500)
+
+        def selects(rows):
+            with CaptureQueriesContext(connection) as queries:
+                importer.import_file(_csv_upload(header + rows))
+            return sum(1 for q in queries if q['sql'].startswith('SELECT'))
+
+        self.assertEqual(selects(self._rows(0, 400)), 2)    # členové + pozice
+        self.assertEqual(selects(self._rows(400, 900)), 2)  # 2 chunky, pozice už v cache
+        self.assertEqual(CrewMember.objects.count(), 1300)
+
+    def test_xlsx_import(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(['email', 'first_name', 'last_name', 'phone', 'position'])
+        ws.append(['xlsx@example.com', 'Excel', 'Row', 420600000000, 'Focus Puller'])
+        ws.append([None, None, None, None, None])
+        content = BytesIO()
+        wb.save(content)
+
+        stats = CrewImporter().import_file(SimpleUploadedFile('crew.xlsx', content.getvalue()))
+
+        self.assertEqual((stats['imported'], stats['errors']), (1, []))
+        self.assertEqual(CrewMember.objects.get(email='xlsx@example.com').phone_primary, '420600000000')
+
+
+class CrewAvailabilityTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+        department = Department.objects.create(name='Camera', abbreviation='CAM')
+        self.position = Position.objects.create(title='Focus Puller', department=department)
+        self.production = Production.objects.create(
+            title='Film', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31)
+        )
+
+    def _member(self, n):
+        return CrewMember.objects.create(
+            email=f'crew{n}@example.com', first_name='F', last_name=f'L{n}',
+            phone_primary='+420600000000', emergency_contact_name='X',
+            emergency_contact_phone='+420600000001', primary_position=self.position,
+        )
+
+    def _assign(self, member, start, end, status='confirmed'):
+        CrewAssignment.objects.create(
+            production=self.production, crew_member=member, position=self.position,
+            start_date=start, end_date=end, daily_rate=100, status=status,
+        )
+
+    def _check(self, payload):
+        return self.client.post('/api/v1/crew/members/check_availability/', payload, format='json')
+
+    def test_query_count_does_not_grow_with_crew(self):
+        payload = {'start_date': '2025-03-01', 'end_date': '2025-03-10'}
+        for n in range(3):
+            self._assign(self._member(n), date(2025, 3, 5), date(2025, 3, 6))
+        with CaptureQueriesContext(connection) as small:
+            self._check(payload)
+
+        for n in range(3, 30):
+            member = self._member(n)
+            if n % 2:
+                self._assign(member, date(2025, 3, 5), None)
+        with CaptureQueriesContext(connection) as large:
+            response = self._check(payload)
+
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(response.json()['total_unavailable'], 3 + 14)
+
+    def test_multiple_windows(self):
+        free, first_week, cancelled = self._member(1), self._member(2), self._member(3)
+        self._assign(first_week, date(2025, 3, 1), date(2025, 3, 7))
+        self._assign(cancelled, date(2025, 3, 1), date(2025, 3, 30), status='cancelled')
+
+        response = self._check({'windows': [
+            {'start_date': '2025-03-03', 'end_date': '2025-03-05'},
+            {'start_date': '2025-03-10', 'end_date': '2025-03-12'},
+        ]})
+
+        data = response.json()
+        self.assertEqual(
+            sorted(m['email'] for m in data['available']),
+            [free.email, cancelled.email]
+        )
+        self.assertEqual(data['unavailable'][0]['conflicts'][0]['windows'], [0])
+        self.assertEqual([w['total_available'] for w in data['windows']], [2, 3])
+
+    def test_requires_a_window(self):
+        self.assertEqual(self._check({}).status_code, 400)
+
+
+class IntervalIndexTests(TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        intervals = []
+        for n in range(500):
+            start = rng.randrange(1000)
+            intervals.append(Interval(start, start + rng.randrange(60), n % 20, n, n))
+        index = IntervalIndex(intervals)
+
+        for _ in range(200):
+            lo = rng.randrange(-50, 1100)
+            hi = lo + rng.randrange(100)
+            expected = sorted(i.payload for i in intervals if i.start <= hi and i.end >= lo)
+            self.assertEqual(sorted(i.payload for i in index.overlapping(lo, hi)), expected)
+
+        self.assertEqual(IntervalIndex([]).overlapping(0, 10), [])
+
+
+class DoubleBookingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+        department = Department.objects.create(name='Grip', abbreviation='GRP')
+        self.position = Position.objects.create(title='Grip', department=department)
+        self.productions = [
+            Production.objects.create(title=title, start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+            for title in ('Show A', 'Show B')
+        ]
+        self.member = CrewMember.objects.create(
+            email='grip@example.com', first_name='G', last_name='Rip',
+            phone_primary='+420600000000', emergency_contact_name='X',
+            emergency_contact_phone='+420600000001',
+        )
+
+    def _assign(self, production, start, end):
+        return CrewAssignment.objects.create(
+            production=production, crew_member=self.member, position=self.position,
+            start_date=start, end_date=end, daily_rate=100, status='confirmed',
+        )
+
+    def _get(self, **params):
+        return self.client.get('/api/v1/crew/assignments/double_bookings/', params).json()
+
+    def test_assignments_across_productions(self):
+        self._assign(self.productions[0], date(2025, 3, 1), date(2025, 3, 20))
+        self.assertEqual(self._get(start_date='2025-03-01', end_date='2025-03-31')['total'], 0)
+
+        # Nové přiřazení musí index zneplatnit
+        self._assign(self.productions[1], date(2025, 3, 15), None)
+        data = self._get(start_date='2025-03-01', end_date='2025-03-31')
+
+        self.assertEqual(data['total'], 1)
+        booking = data['double_bookings'][0]
+        self.assertEqual(booking['source'], 'assignment')
+        self.assertEqual((booking['overlap_start'], booking['overlap_end']), ('2025-03-15', '2025-03-20'))
+        self.assertEqual(
+            sorted(b['production_title'] for b in booking['bookings']), ['Show A', 'Show B']
+        )
+        self.assertEqual(self._get(start_date='2025-04-01', end_date='2025-04-30')['total'], 0)
+        self.assertEqual(len(get_assignment_index()), 2)
+
+    def test_index_expires_without_invalidation(self):
+        self._assign(self.productions[0], date(2025, 3, 1), date(2025, 3, 20))
+        self.assertEqual(self._get(start_date='2025-03-01', end_date='2025-03-31')['total'], 0)
+
+        # Written by another process: without a shared cache this one never sees the new generation
+        CrewAssignment.objects.bulk_create([CrewAssignment(
+            production=self.productions[1], crew_member=self.member, position=self.position,
+            start_date=date(2025, 3, 15), daily_rate=100, status='confirmed',
+        )])
+        later = monotonic() + INDEX_TTL_SECONDS + 1
+        with mock.patch('apps.crew.intervals.monotonic', return_value=later):
+            self.assertEqual(self._get(start_date='2025-03-01', end_date='2025-03-31')['total'], 1)
+
+    def test_overlapping_calls(self):
+        day = date(2025, 5, 5)
+        for production, call, wrap in ((self.productions[0], time(6), time(14)),
+                                       (self.productions[1], time(13), None)):
+            sheet = CallSheet.objects.create(
+                production=production, shooting_day=1, date=day,
+                general_call_time=call, shooting_call=call,
+                base_camp_location='-', nearest_hospital='-',
+            )
+            CrewCall.objects.create(call_sheet=sheet, crew_member=self.member, call_time=call, wrap_time=wrap)
+
+        data = self._get(start_date='2025-05-01', end_date='2025-05-10')
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['double_bookings'][0]['source'], 'call')
+
+        data = self._get(start_date='2025-05-01', end_date='2025-05-10', production=str(self.productions[0].id))
+        self.assertEqual(data['total'], 1)
+
+
+class CallSheetGeneratorTests(TestCase):
+
+    def setUp(self):
+        self.production = Production.objects.create(
+            title='Show', start_date=date(2025, 1, 1), end_date=date(2025, 12, 31)
+        )
+        location = Location.objects.create(production=self.production, name='Mill', address='Praha')
+        self.scenes = [
+            Scene.objects.create(
+                production=self.production, scene_number=str(n + 1), int_ext='INT', location=location,
+                location_detail='Hall', time_of_day='DAY', description='',
+            ) for n in range(2)
+        ]
+        members = [
+            CrewMember.objects.create(
+                email=f'member{n}@example.com', first_name='M', last_name=str(n),
+                phone_primary='+420600000000', emergency_contact_name='X',
+                emergency_contact_phone='+420600000001',
+            ) for n in range(4)
+        ]
+        self.camera, self.sound, self.actor, self.extra = members
+        for member, name in ((self.camera, 'Camera'), (self.sound, 'Sound')):
+            department = Department.objects.create(name=name, abbreviation=name[:3].upper())
+            CrewAssignment.objects.create(
+                production=self.production, crew_member=member,
+                position=Position.objects.create(title=name, department=department),
+                start_date=date(2025, 1, 1), daily_rate=100, status='confirmed',
+            )
+        character = Character.objects.create(production=self.production, name='Eva', actor=self.actor)
+        self.scenes[1].characters.add(character)
+
+        self.day = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 3), day_number=4,
+            general_call=time(7, 30), shooting_call=time(8, 0), estimated_wrap=time(19, 0),
+            primary_location=location,
+        )
+        self.entries = [
+            SceneSchedule.objects.create(
+                shooting_day=self.day, scene=scene, day_order=n,
+                estimated_start=time(8 + 2 * n), estimated_duration=timedelta(hours=2),
+            ) for n, scene in enumerate(self.scenes)
+        ]
+
+    def _calls(self, call_sheet):
+        return {call.crew_member_id: call for call in call_sheet.crew_calls.all()}
+
+    def test_generate_derives_department_and_cast_calls(self):
+        result = generate_call_sheet(self.day)
+
+        call_sheet = result['call_sheet']
+        self.assertEqual((call_sheet.shooting_day, call_sheet.date), (4, date(2025, 3, 3)))
+        self.assertEqual(call_sheet.base_camp_location, 'Mill, Praha')
+        self.assertEqual(result['created'], 3)
+        calls = self._calls(call_sheet)
+        self.assertEqual(calls[self.camera.pk].call_time, time(7, 0))
+        self.assertEqual(calls[self.sound.pk].call_time, time(7, 15))
+        self.assertEqual(calls[self.actor.pk].call_time, time(8, 30))
+        self.assertEqual(calls[self.actor.pk].special_instructions, 'Eva - Sc. 2')
+
+    def test_regenerate_writes_only_the_diff(self):
+        call_sheet = generate_call_sheet(self.day)['call_sheet']
+        CallSheet.objects.filter(pk=call_sheet.pk).update(status='final')
+        CrewCall.objects.filter(call_sheet=call_sheet).update(confirmed=True)
+
+        unchanged = generate_call_sheet(self.day)
+        self.assertEqual((unchanged['created'], unchanged['updated'], unchanged['deleted']), (0, 0, 0))
+        self.assertEqual(unchanged['call_sheet'].status, 'final')
+
+        # Actor's scene moves up, sound leaves the show
+        SceneSchedule.objects.filter(pk=self.entries[1].pk).update(estimated_start=time(9, 0))
+        CrewAssignment.objects.filter(crew_member=self.sound).update(status='cancelled')
+        result = generate_call_sheet(self.day)
+
+        self.assertEqual((result['created'], result['updated'], result['deleted'], result['unchanged']), (0, 1, 1, 1))
+        self.assertEqual(result['call_sheet'].status, 'revised')
+        calls = self._calls(result['call_sheet'])
+        self.assertEqual(calls[self.actor.pk].call_time, time(7, 30))
+        self.assertFalse(calls[self.actor.pk].confirmed)
+        self.assertTrue(calls[self.camera.pk].confirmed)
+        self.assertNotIn(self.sound.pk, calls)
+
+    def test_generate_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+        response = client.post('/api/v1/crew/call-sheets/generate/', {'shooting_day': str(self.day.pk)}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['call_sheet']['crew_calls']), 3)
+        self.assertEqual(response.json()['changes']['created'], 3)
+        self.assertEqual(client.post('/api/v1/crew/call-sheets/generate/', {}).status_code, 400)
+
+    def test_list_and_detail_queries_do_not_grow_with_crew(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+        call_sheet = generate_call_sheet(self.day)['call_sheet']
+        second = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 4), day_number=5,
+            general_call=time(7, 30), shooting_call=time(8, 0),
+        )
+        generate_call_sheet(second)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/crew/call-sheets/')
+        self.assertEqual(sorted(row['crew_count'] for row in response.json()['results']), [2, 3])
+        self.assertEqual(len(queries), 2)  # count + page
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/v1/crew/call-sheets/{call_sheet.pk}/')
+        self.assertEqual(len(response.json()['crew_calls']), 3)
+        self.assertEqual(len(queries), 2)  # sheet + crew calls with members
+
+    def test_renamed_member_drops_snapshot(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+        call_sheet = generate_call_sheet(self.day)['call_sheet']
+        call_sheet.status = 'final'
+        call_sheet.save()
+        url = f'/api/v1/crew/call-sheets/{call_sheet.pk}/'
+        client.get(url)
+
+        self.actor.preferred_name = 'Eva'
+        self.actor.save()
+        names = {call['crew_member']: call['crew_member_name'] for call in client.get(url).json()['crew_calls']}
+        self.assertEqual(names[str(self.actor.pk)], 'Eva')
+
+    def test_final_sheet_snapshot_until_revised(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+        call_sheet = generate_call_sheet(self.day)['call_sheet']
+        call_sheet.status = 'final'
+        call_sheet.save()
+        url = f'/api/v1/crew/call-sheets/{call_sheet.pk}/'
+
+        first = client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            cached = client.get(url)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(cached.json(), first.json())
 
-# Create your tests here.
+        # Regeneration with a changed call revises the sheet
+        SceneSchedule.objects.filter(pk=self.entries[1].pk).update(estimated_start=time(9, 0))
+        generate_call_sheet(self.day)
+        revised = client.get(url).json()
+        self.assertEqual(revised['status'], 'revised')
+        self.assertEqual(
+            {call['crew_member']: call['call_time'] for call in revised['crew_calls']}[str(self.actor.pk)], '07:30:00'
+        )
@@ -3,25 +3,29 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Prefetch
+from rest_framework.renderers import JSONRenderer
+from django.db.models import Q, Count, Prefetch, prefetch_related_objects
+from django.http import HttpResponse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-import csv
-import openpyxl
-from io import StringIO
-from datetime import datetime, timedelta
+from apps.schedule.models import ShootingDay
+from datetime import date, datetime, timedelta
 
 from .models import (
     Department, Position, CrewMember, CrewAssignment,
     CallSheet, CrewCall, Character
 )
+from .availability import CrewAvailability
+from .callsheets import generate_call_sheet, get_call_sheet_snapshot, set_call_sheet_snapshot
+from .importers import CrewImporter
+from .intervals import double_booked_assignments, double_booked_times
 from .serializers import (
     DepartmentSerializer, PositionSerializer,
     CrewMemberListSerializer, CrewMemberDetailSerializer, CrewMemberCreateUpdateSerializer,
     CrewAssignmentListSerializer, CrewAssignmentDetailSerializer,
     CallSheetListSerializer, CallSheetDetailSerializer, CallSheetCreateSerializer,
     CrewCallSerializer, CharacterSerializer,
-    CrewAvailabilitySerializer, CrewBulkImportSerializer
+    CrewAvailabilitySerializer, CrewBulkImportSerializer, DateWindowSerializer
 )
 
 class DepartmentViewSet(viewsets.ModelViewSet):
@@ -142,8 +146,7 @@ class CrewMemberViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         data = serializer.validated_data
-        start_date = data['start_date']
-        end_date = data['end_date']
+        windows = data['windows']
         
         # Get all crew members
         crew = CrewMember.objects.filter(status='active')
@@ -157,30 +160,29 @@ class CrewMemberViewSet(viewsets.ModelViewSet):
         elif 'department_id' in data:
             crew = crew.filter(primary_position__department_id=data['department_id'])
         
-        # Check assignments in date range
-        available = []
-        unavailable = []
+        # Všechny kolidující assignmenty jedním dotazem, seskupené v paměti
+        result = CrewAvailability(windows).check(crew)
         
-        for member in crew:
-            conflicts = member.assignments.filter(
-                Q(start_date__lte=end_date) & Q(end_date__gte=start_date) |
-                Q(start_date__lte=end_date) & Q(end_date__isnull=True),
-                status__in=['confirmed', 'tentative']
-            )
-            
-            if conflicts.exists():
-                unavailable.append({
-                    'crew_member': CrewMemberListSerializer(member).data,
-                    'conflicts': CrewAssignmentListSerializer(conflicts, many=True).data
-                })
-            else:
-                available.append(CrewMemberListSerializer(member).data)
+        unavailable = [
+            {
+                'crew_member': CrewMemberListSerializer(member).data,
+                'conflicts': [
+                    {**CrewAssignmentListSerializer(assignment).data, 'windows': hit}
+                    for assignment, hit in conflicts
+                ]
+            }
+            for member, conflicts in result['unavailable']
+        ]
         
         return Response({
-            'available': available,
+            'available': CrewMemberListSerializer(result['available'], many=True).data,
             'unavailable': unavailable,
-            'total_available': len(available),
-            'total_unavailable': len(unavailable)
+            'total_available': len(result['available']),
+            'total_unavailable': len(unavailable),
+            'windows': [
+                {'start_date': start, 'end_date': end, 'total_available': count}
+                for (start, end), count in zip(windows, result['available_per_window'])
+            ]
         })
     
     @action(detail=False, methods=['post'])
@@ -189,99 +191,17 @@ class CrewMemberViewSet(viewsets.ModelViewSet):
         serializer = CrewBulkImportSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        file = serializer.validated_data['file']
-        update_existing = serializer.validated_data['update_existing']
-        
-        imported = 0
-        updated = 0
-        errors = []
+        importer = CrewImporter(update_existing=serializer.validated_data['update_existing'])
         
         try:
-            if file.name.endswith('.csv'):
-                # Process CSV
-                decoded_file = file.read().decode('utf-8')
-                reader = csv.DictReader(StringIO(decoded_file))
-                
-                for row in reader:
-                    result = self._import_crew_member(row, update_existing)
-                    if result['status'] == 'imported':
-                        imported += 1
-                    elif result['status'] == 'updated':
-                        updated += 1
-                    else:
-                        errors.append(result['error'])
-            
-            else:
-                # Process Excel
-                wb = openpyxl.load_workbook(file)
-                ws = wb.active
-                headers = [cell.value for cell in ws[1]]
-                
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    data = dict(zip(headers, row))
-                    result = self._import_crew_member(data, update_existing)
-                    if result['status'] == 'imported':
-                        imported += 1
-                    elif result['status'] == 'updated':
-                        updated += 1
-                    else:
-                        errors.append(result['error'])
-        
+            stats = importer.import_file(serializer.validated_data['file'])
         except Exception as e:
             return Response(
                 {'error': f'File processing error: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return Response({
-            'imported': imported,
-            'updated': updated,
-            'errors': errors,
-            'total_processed': imported + updated + len(errors)
-        })
-    
-    def _import_crew_member(self, data, update_existing):
-        """Import single crew member from data dict"""
-        try:
-            # Required fields
-            email = data.get('email', '').strip()
-            if not email:
-                return {'status': 'error', 'error': 'Email is required'}
-            
-            # Check if exists
-            existing = CrewMember.objects.filter(email=email).first()
-            if existing and not update_existing:
-                return {'status': 'error', 'error': f'{email} already exists'}
-            
-            # Prepare data
-            crew_data = {
-                'email': email,
-                'first_name': data.get('first_name', '').strip(),
-                'last_name': data.get('last_name', '').strip(),
-                'phone_primary': data.get('phone', '').strip(),
-                'emergency_contact_name': data.get('emergency_contact', '').strip(),
-                'emergency_contact_phone': data.get('emergency_phone', '').strip(),
-            }
-            
-            # Handle position
-            position_title = data.get('position', '').strip()
-            if position_title:
-                position = Position.objects.filter(title__iexact=position_title).first()
-                if position:
-                    crew_data['primary_position'] = position
-            
-            if existing:
-                for key, value in crew_data.items():
-                    if value:  # Only update non-empty values
-                        setattr(existing, key, value)
-                existing.save()
-                return {'status': 'updated'}
-            else:
-                CrewMember.objects.create(**crew_data)
-                return {'status': 'imported'}
-        
-        except Exception as e:
-            return {'status': 'error', 'error': str(e)}
+        return Response(stats)
 
 class CrewAssignmentViewSet(viewsets.ModelViewSet):
     queryset = CrewAssignment.objects.select_related(
@@ -359,6 +279,63 @@ class CrewAssignmentViewSet(viewsets.ModelViewSet):
             'created': created,
             'errors': errors
         })
+    
+    @action(detail=False, methods=['get'])
+    def double_bookings(self, request):
+        """Crew double-booked between start_date and end_date across all productions"""
+        window = DateWindowSerializer(data=request.query_params)
+        window.is_valid(raise_exception=True)
+        start_date = window.validated_data['start_date']
+        end_date = window.validated_data['end_date']
+        productions = set(request.query_params.getlist('production'))
+        
+        conflicts = [('assignment', a, b) for a, b in double_booked_assignments(start_date, end_date)]
+        conflicts += double_booked_times(start_date, end_date)
+        
+        def production_of(interval, source):
+            return str(interval.group if source == 'assignment' else interval.payload['production_id'])
+        
+        if productions:
+            conflicts = [
+                (source, a, b) for source, a, b in conflicts
+                if {production_of(a, source), production_of(b, source)} & productions
+            ]
+        
+        # Detaily jen pro nalezené konflikty, po jednom dotazu
+        assignment_ids = {i.payload for source, a, b in conflicts if source == 'assignment' for i in (a, b)}
+        assignments = {
+            assignment.id: CrewAssignmentListSerializer(assignment).data
+            for assignment in CrewAssignment.objects.filter(id__in=assignment_ids).select_related(
+                'production', 'crew_member', 'position__department'
+            )
+        }
+        members = {
+            member.id: member.display_name
+            for member in CrewMember.objects.filter(id__in={a.key for _, a, _ in conflicts})
+        }
+        
+        def describe(interval, source):
+            return assignments[interval.payload] if source == 'assignment' else interval.payload
+        
+        double_bookings = []
+        for source, a, b in conflicts:
+            overlap_end = min(a.end, b.end)
+            double_bookings.append({
+                'source': source,
+                'crew_member': {'id': a.key, 'display_name': members.get(a.key, '')},
+                'overlap_start': max(a.start, b.start),
+                'overlap_end': None if overlap_end == date.max else overlap_end,
+                'bookings': [describe(a, source), describe(b, source)],
+            })
+        
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'total': len(double_bookings),
+            'double_bookings': double_bookings,
+        })
+
+CREW_CALLS_PREFETCH = Prefetch('crew_calls', queryset=CrewCall.objects.select_related('crew_member'))
 
 class CallSheetViewSet(viewsets.ModelViewSet):
     queryset = CallSheet.objects.select_related('production')
@@ -395,7 +372,49 @@ class CallSheetViewSet(viewsets.ModelViewSet):
         if status_param:
             queryset = queryset.filter(status=status_param)
         
+        # Počty a crew calls jedním dotazem místo dotazu na každý sheet
+        if self.action == 'list':
+            queryset = queryset.annotate(crew_count=Count('crew_calls'))
+        else:
+            queryset = queryset.prefetch_related(CREW_CALLS_PREFETCH)
+        
         return queryset
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Final sheets come from the cached snapshot, rendered once"""
+        # Filtered lookups (?production=, ?status=) go through the queryset
+        as_json = isinstance(request.accepted_renderer, JSONRenderer) and not request.query_params
+        if as_json:
+            snapshot = get_call_sheet_snapshot(kwargs['pk'])
+            if snapshot is not None:
+                return HttpResponse(snapshot, content_type='application/json')
+        
+        call_sheet = self.get_object()
+        data = self.get_serializer(call_sheet).data
+        if as_json:
+            set_call_sheet_snapshot(call_sheet, JSONRenderer().render(data))
+        return Response(data)
+    
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """
+        Vygeneruje call sheet ze schedule natáčecího dne
+        
+        Body: {"shooting_day": <id>}. An existing sheet for the date is
+        regenerated, only changed crew calls are written.
+        """
+        shooting_day_id = request.data.get('shooting_day')
+        if not shooting_day_id:
+            return Response({'error': 'shooting_day is required'}, status=status.HTTP_400_BAD_REQUEST)
+        shooting_day = get_object_or_404(ShootingDay, pk=shooting_day_id)
+        
+        result = generate_call_sheet(shooting_day)
+        call_sheet = result.pop('call_sheet')
+        prefetch_related_objects([call_sheet], CREW_CALLS_PREFETCH)
+        return Response({
+            'call_sheet': CallSheetDetailSerializer(call_sheet).data,
+            'changes': result,
+        })
 
 class CharacterViewSet(viewsets.ModelViewSet):
     queryset = Character.objects.select_related('production', 'actor')
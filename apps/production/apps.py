@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class ProductionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.production'
-    verbose_name = 'Film Production'
\ No newline at end of file
+    verbose_name = 'Film Production'
+    
+    def ready(self):
+        import apps.production.signals
@@ -0,0 +1,191 @@
+# apps/production/geo.py
+import math
+from itertools import permutations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Location
+
+CACHE_TIMEOUT = 60 * 60
+EARTH_RADIUS_KM = 6371.0088  # Mean Earth radius (IUGG)
+
+# Visiting orders up to this many locations are solved exactly
+EXACT_ROUTE_LIMIT = 7
+
+
+def haversine(lat1, lon1, lat2, lon2) -> float:
+    """Great-circle distance in km between two points given in degrees (scalar reference)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def haversine_matrix(latitudes, longitudes) -> np.ndarray:
+    """Pairwise great-circle distances in km, NaN rows/columns for missing coordinates"""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    cos_lat = np.cos(lat)
+    a = np.sin(dlat / 2) ** 2 + np.outer(cos_lat, cos_lat) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class LocationDistances:
+    """
+    Distance matrix (km) over the locations of one production
+
+    Built from a single query and cached (see get_distances). Locations
+    without coordinates have unknown (None) distances to everything but
+    themselves.
+    """
+
+    def __init__(self, location_ids: List, matrix: np.ndarray):
+        self.location_ids = location_ids
+        self.matrix = matrix
+        self.index = {location_id: i for i, location_id in enumerate(location_ids)}
+
+    @classmethod
+    def build(cls, production_id) -> 'LocationDistances':
+        rows = list(
+            Location.objects.filter(production_id=production_id)
+            .order_by('id')
+            .values_list('id', 'latitude', 'longitude')
+        )
+        latitudes = [float(lat) if lat is not None else np.nan for _, lat, _ in rows]
+        longitudes = [float(lon) if lon is not None else np.nan for _, _, lon in rows]
+        matrix = haversine_matrix(latitudes, longitudes)
+        np.fill_diagonal(matrix, 0.0)
+        return cls([location_id for location_id, _, _ in rows], matrix)
+
+    def distance(self, a, b) -> Optional[float]:
+        """km between two locations, None when either has no coordinates"""
+        if a == b:
+            return 0.0
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None or np.isnan(self.matrix[i, j]):
+            return None
+        return float(self.matrix[i, j])
+
+    def submatrix(self, location_ids: Sequence) -> np.ndarray:
+        """Distances between the given locations in that order (NaN when unknown)"""
+        rows = [self.index.get(location_id) for location_id in location_ids]
+        sub = np.full((len(rows), len(rows)), np.nan)
+        known = [k for k, i in enumerate(rows) if i is not None]
+        idx = [rows[k] for k in known]
+        sub[np.ix_(known, known)] = self.matrix[np.ix_(idx, idx)]
+        np.fill_diagonal(sub, 0.0)
+        return sub
+
+    def mean_distance(self, location_ids: Sequence = None) -> float:
+        """Mean known distance between distinct locations, 0 when unknown"""
+        matrix = self.matrix if location_ids is None else self.submatrix(location_ids)
+        if len(matrix) < 2:
+            return 0.0
+        off_diagonal = matrix[~np.eye(len(matrix), dtype=bool)]
+        known = off_diagonal[~np.isnan(off_diagonal)]
+        return float(known.mean()) if known.size else 0.0
+
+    def mean_distances(self, location_ids: Sequence) -> Dict:
+        """{location id: mean known km to the other given locations}, 0 when unknown"""
+        sub = self.submatrix(location_ids)
+        np.fill_diagonal(sub, np.nan)
+        result = {}
+        for location_id, row in zip(location_ids, sub):
+            known = row[~np.isnan(row)]
+            result[location_id] = float(known.mean()) if known.size else 0.0
+        return result
+
+    def route(self, location_ids: Sequence, start=None) -> Tuple[List, float]:
+        """
+        Cheapest open path visiting each location once, ([location id], km)
+
+        start fixes the first location (e.g. yesterday's last). Unknown
+        distances count as the mean known distance. Exact up to
+        EXACT_ROUTE_LIMIT locations, nearest neighbour + 2-opt above.
+        """
+        ids = list(dict.fromkeys(location_ids))
+        if start is not None and start in ids:
+            ids.remove(start)
+            ids.insert(0, start)
+        if len(ids) < 2:
+            return ids, 0.0
+
+        sub = self.submatrix(ids)
+        sub = np.where(np.isnan(sub), self.mean_distance(ids), sub)
+        fixed = start is not None and ids[0] == start
+
+        if len(ids) <= EXACT_ROUTE_LIMIT:
+            order = self._exact_path(sub, fixed)
+        else:
+            order = self._two_opt(sub, self._nearest_neighbour(sub, fixed), fixed)
+        return [ids[i] for i in order], _path_length(sub, order)
+
+    @staticmethod
+    def _exact_path(sub, fixed) -> List[int]:
+        n = len(sub)
+        heads = [0] if fixed else range(n)
+        best, best_length = None, math.inf
+        for head in heads:
+            rest = [i for i in range(n) if i != head]
+            for tail in permutations(rest):
+                order = (head,) + tail
+                length = _path_length(sub, order)
+                if length < best_length:
+                    best, best_length = list(order), length
+        return best
+
+    @staticmethod
+    def _nearest_neighbour(sub, fixed) -> List[int]:
+        n = len(sub)
+        best = None
+        for head in ([0] if fixed else range(n)):
+            order = [head]
+            left = set(range(n)) - {head}
+            while left:
+                current = order[-1]
+                order.append(min(left, key=lambda j: sub[current, j]))
+                left.discard(order[-1])
+            if best is None or _path_length(sub, order) < _path_length(sub, best):
+                best = order
+        return best
+
+    @staticmethod
+    def _two_opt(sub, order, fixed) -> List[int]:
+        order = list(order)
+        improved = True
+        first = 1 if fixed else 0
+        while improved:
+            improved = False
+            for i in range(first, len(order) - 1):
+                for j in range(i + 1, len(order)):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    if _path_length(sub, candidate) < _path_length(sub, order) - 1e-9:
+                        order = candidate
+                        improved = True
+        return order
+
+
+def _path_length(sub, order) -> float:
+    return float(sum(sub[a, b] for a, b in zip(order, order[1:])))
+
+
+def _cache_key(production_id):
+    return f'location_distances_{production_id}'
+
+
+def get_distances(production_id) -> LocationDistances:
+    """Cached distance matrix for a production, built with one query on miss"""
+    distances = cache.get(_cache_key(production_id))
+    if distances is None:
+        distances = LocationDistances.build(production_id)
+        cache.set(_cache_key(production_id), distances, CACHE_TIMEOUT)
+    return distances
+
+
+def invalidate_distances(production_id):
+    cache.delete(_cache_key(production_id))
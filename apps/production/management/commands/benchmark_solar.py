@@ -0,0 +1,49 @@
+# apps/production/management/commands/benchmark_solar.py
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.production.solar import get_solar_events, solar_events
+
+
+class Command(BaseCommand):
+    help = 'Time sunrise/sunset computation for locations x days, per pair vs vectorized vs memo table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=100)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        coordinates = [
+            (round(rng.uniform(35, 60), 4), round(rng.uniform(-10, 30), 4))
+            for _ in range(options['locations'])
+        ]
+        dates = [date(2025, 1, 1) + timedelta(days=n) for n in range(options['days'])]
+        latitudes = [lat for lat, _ in coordinates]
+        longitudes = [lon for _, lon in coordinates]
+
+        self.stdout.write(f"{len(coordinates)} locations x {len(dates)} days")
+
+        started = time.perf_counter()
+        for lat, lon in coordinates[:10]:
+            for day in dates:
+                solar_events([lat], [lon], [day])
+        per_pair = (time.perf_counter() - started) * len(coordinates) / 10
+        self.stdout.write(f"{'per pair (extrapolated)':<26} {per_pair * 1000:>9.1f} ms")
+
+        started = time.perf_counter()
+        solar_events(latitudes, longitudes, dates)
+        self.stdout.write(f"{'vectorized':<26} {(time.perf_counter() - started) * 1000:>9.1f} ms")
+
+        # Memo table rows live only for the duration of the run
+        with transaction.atomic():
+            for label in ('table, cold', 'table, warm'):
+                started = time.perf_counter()
+                get_solar_events((lat, lon, day) for lat, lon in coordinates for day in dates)
+                self.stdout.write(f"{label:<26} {(time.perf_counter() - started) * 1000:>9.1f} ms")
+            transaction.set_rollback(True)
@@ -0,0 +1,33 @@
+# apps/production/management/commands/fill_solar_times.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.production.models import Production
+from apps.production.solar import fill_solar_times
+
+
+class Command(BaseCommand):
+    help = 'Fill sunrise/sunset of shooting days and call sheets from the primary location coordinates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--production', help='Only this production')
+        parser.add_argument('--from', dest='date_from', help='First shoot date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last shoot date (YYYY-MM-DD)')
+        parser.add_argument('--overwrite', action='store_true', help='Replace hand-entered times too')
+
+    def handle(self, *args, **options):
+        productions = Production.objects.all()
+        if options['production']:
+            productions = productions.filter(pk=options['production'])
+
+        for production in productions:
+            started = time.perf_counter()
+            filled = fill_solar_times(
+                production, options['date_from'], options['date_to'], overwrite=options['overwrite']
+            )
+            self.stdout.write(
+                f"{production.title}: {filled['shooting_days']} shooting days, "
+                f"{filled['call_sheets']} call sheets ({time.perf_counter() - started:.2f} s)"
+            )
+        self.stdout.write(self.style.SUCCESS('Solar times filled'))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0003_alter_shot_options_alter_take_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolarEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('longitude', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('date', models.DateField()),
+                ('civil_dawn', models.SmallIntegerField(null=True)),
+                ('sunrise', models.SmallIntegerField(null=True)),
+                ('sunset', models.SmallIntegerField(null=True)),
+                ('civil_dusk', models.SmallIntegerField(null=True)),
+            ],
+            options={
+                'unique_together': {('latitude', 'longitude', 'date')},
+            },
+        ),
+    ]
@@ -181,3 +181,22 @@ class Take(models.Model):
     
     def __str__(self):
         return f"Take {self.take_number} - {self.shot} ({self.result})"
+
+class SolarEvent(models.Model):
+    """Východ/západ slunce a občanský soumrak pro zaokrouhlené souřadnice a den (cache, viz solar.py)"""
+    latitude = models.DecimalField(max_digits=5, decimal_places=2)
+    longitude = models.DecimalField(max_digits=5, decimal_places=2)
+    date = models.DateField()
+    
+    # Minutes after UTC midnight of `date` (may fall outside 0-1440 far from
+    # Greenwich); None when the event does not happen that day (polar day/night)
+    civil_dawn = models.SmallIntegerField(null=True)
+    sunrise = models.SmallIntegerField(null=True)
+    sunset = models.SmallIntegerField(null=True)
+    civil_dusk = models.SmallIntegerField(null=True)
+    
+    class Meta:
+        unique_together = ['latitude', 'longitude', 'date']
+    
+    def __str__(self):
+        return f"{self.latitude}, {self.longitude} {self.date}"
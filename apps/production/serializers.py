@@ -13,13 +13,19 @@ class ProductionListSerializer(serializers.ModelSerializer):
                  'completion_percentage', 'created_at']
     
     def get_scenes_count(self, obj):
+        # Annotated in ProductionViewSet.get_queryset, fallback pro ostatní použití
+        if hasattr(obj, 'total_scenes'):
+            return obj.total_scenes
         return obj.scenes.count()
     
     def get_completion_percentage(self, obj):
-        total_scenes = obj.scenes.count()
+        total_scenes = self.get_scenes_count(obj)
         if total_scenes == 0:
             return 0
-        completed_scenes = obj.scenes.filter(status='completed').count()
+        if hasattr(obj, 'completed_scenes'):
+            completed_scenes = obj.completed_scenes
+        else:
+            completed_scenes = obj.scenes.filter(status='completed').count()
         return round((completed_scenes / total_scenes) * 100, 1)
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -32,6 +38,12 @@ class TakeSerializer(serializers.ModelSerializer):
         model = Take
         fields = '__all__'
 
+class TakeInputSerializer(serializers.Serializer):
+    """One take of ShotViewSet.add_take/add_takes; the take number is assigned on insert"""
+    result = serializers.ChoiceField(choices=Take.RESULT_CHOICES, required=False)
+    director_notes = serializers.CharField(required=False, allow_blank=True)
+    script_supervisor_notes = serializers.CharField(required=False, allow_blank=True)
+
 class ShotDetailSerializer(serializers.ModelSerializer):
     takes = TakeSerializer(many=True, read_only=True)
     efficiency_ratio = serializers.ReadOnlyField()
@@ -68,6 +80,8 @@ class SceneListSerializer(serializers.ModelSerializer):
                  'time_of_day', 'estimated_pages', 'status', 'shots_count']
     
     def get_shots_count(self, obj):
+        if hasattr(obj, 'shots_count'):
+            return obj.shots_count
         return obj.shots.count()
 
 class ProductionDetailSerializer(serializers.ModelSerializer):
@@ -94,19 +108,32 @@ class ProductionDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    # Statistiky čteme z anotací (viz ProductionViewSet.get_queryset),
+    # dotazy níže jsou jen fallback pro neanotované instance
+    
     def get_total_scenes(self, obj):
+        if hasattr(obj, 'total_scenes'):
+            return obj.total_scenes
         return obj.scenes.count()
     
     def get_completed_scenes(self, obj):
+        if hasattr(obj, 'completed_scenes'):
+            return obj.completed_scenes
         return obj.scenes.filter(status='completed').count()
     
     def get_total_shots(self, obj):
+        if hasattr(obj, 'total_shots'):
+            return obj.total_shots
         return Shot.objects.filter(scene__production=obj).count()
     
     def get_completed_shots(self, obj):
+        if hasattr(obj, 'completed_shots'):
+            return obj.completed_shots
         return Shot.objects.filter(scene__production=obj, status='completed').count()
     
     def get_total_pages(self, obj):
+        if hasattr(obj, 'total_pages'):
+            return obj.total_pages or 0
         return sum(scene.estimated_pages or 0 for scene in obj.scenes.all())
 
 class ProductionCreateUpdateSerializer(serializers.ModelSerializer):
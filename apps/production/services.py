@@ -0,0 +1,60 @@
+# apps/production/services.py
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import F, Max
+
+from .models import Shot, Take
+
+GOOD_RESULTS = ('good', 'print')
+
+
+def record_takes(shot_id, takes: Iterable[Dict]) -> List[Take]:
+    """
+    Record one or more takes of a shot atomically
+
+    The counter UPDATE runs first so it takes the shot's row lock;
+    concurrent recorders of the same shot wait for it and then see the
+    committed take numbers, so numbering cannot collide. Takes are
+    numbered after the current maximum in the given order and inserted
+    with one bulk_create.
+
+    Each take is a dict with optional result, director_notes and
+    script_supervisor_notes. Raises Shot.DoesNotExist for unknown shots.
+    """
+    takes = list(takes)
+    if not takes:
+        return []
+
+    results = [take.get('result', 'ng') for take in takes]
+    good = sum(1 for result in results if result in GOOD_RESULTS)
+
+    with transaction.atomic():
+        updated = Shot.objects.filter(pk=shot_id).update(
+            takes_completed=F('takes_completed') + len(takes),
+            takes_good=F('takes_good') + good,
+        )
+        if not updated:
+            raise Shot.DoesNotExist(f'Shot {shot_id} does not exist')
+
+        last_number = Take.objects.filter(shot_id=shot_id).aggregate(
+            last=Max('take_number')
+        )['last'] or 0
+
+        created = Take.objects.bulk_create([
+            Take(
+                shot_id=shot_id,
+                take_number=last_number + index,
+                result=result,
+                director_notes=take.get('director_notes', ''),
+                script_supervisor_notes=take.get('script_supervisor_notes', ''),
+            )
+            for index, (take, result) in enumerate(zip(takes, results), start=1)
+        ])
+
+    return created
+
+
+def record_take(shot_id, **data) -> Take:
+    """Record a single take (see record_takes)"""
+    return record_takes(shot_id, [data])[0]
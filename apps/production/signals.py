@@ -0,0 +1,13 @@
+# apps/production/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .geo import invalidate_distances
+from .models import Location
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def location_changed(sender, instance, **kwargs):
+    """Coordinates added/moved or location removed, the distance matrix is stale"""
+    invalidate_distances(instance.production_id)
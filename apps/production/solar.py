@@ -0,0 +1,226 @@
+# apps/production/solar.py
+"""
+Sunrise, sunset and civil twilight (NOAA solar calculator equations)
+
+Vectorized over NumPy arrays of locations x dates, accurate to about a
+minute between the polar circles. Results are memoized in SolarEvent,
+keyed by coordinates rounded to COORDINATE_PLACES and the date; in Python
+the rounded coordinates are scaled integers (see coordinate_key).
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+from django.db.models import F, IntegerField, Q
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from apps.crew.callsheets import invalidate_call_sheet_snapshots
+from apps.crew.models import CallSheet
+from apps.schedule.models import ShootingDay
+from .models import SolarEvent
+
+# 0.01° ~ 1 km, sunrise moves by less than 5 s
+COORDINATE_PLACES = 2
+COORDINATE_SCALE = 10 ** COORDINATE_PLACES
+
+# Rows per INSERT when storing computed events (backends with a parameter limit cap it lower)
+INSERT_BATCH_SIZE = 2000
+
+SUNRISE_ZENITH = 90.833       # Refraction + solar disc
+CIVIL_ZENITH = 96.0
+
+EVENTS = ('civil_dawn', 'sunrise', 'sunset', 'civil_dusk')
+MISSING_TIMES = Q(sunrise__isnull=True) | Q(sunset__isnull=True)
+
+_UNIX_EPOCH_JD = 2440587.5
+_J2000 = 2451545.0
+
+
+def _to_days(dates) -> np.ndarray:
+    """Days since 1970-01-01"""
+    return np.array(list(dates), dtype='datetime64[D]').astype(np.int64)
+
+
+def _hour_angle(zenith, latitude, declination):
+    """Hour angle (degrees) of the sun at zenith, 0/180 when it never crosses it"""
+    cos_ha = (
+        np.cos(np.radians(zenith)) / (np.cos(latitude) * np.cos(declination))
+        - np.tan(latitude) * np.tan(declination)
+    )
+    crosses = np.abs(cos_ha) <= 1
+    return np.degrees(np.arccos(np.clip(cos_ha, -1, 1))), crosses
+
+
+def solar_events(latitudes, longitudes, dates) -> Dict[str, np.ndarray]:
+    """
+    Event times in minutes after UTC midnight of each date, shape (locations, dates)
+
+    Keys: civil_dawn, sunrise, sunset, civil_dusk (NaN when the sun does not
+    cross the zenith that day) and solar_noon, day_minutes, twilight_minutes
+    (length of one civil twilight, dawn or dusk).
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=float))[:, None]
+    lon = np.asarray(longitudes, dtype=float)[:, None]
+
+    # Julian century at local solar noon (close enough for rise/set)
+    jd = _to_days(dates)[None, :] + _UNIX_EPOCH_JD + 0.5 - lon / 360.0
+    t = (jd - _J2000) / 36525.0
+
+    mean_long = np.radians((280.46646 + t * (36000.76983 + t * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    eccent = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+    center = (
+        np.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+        + np.sin(3 * mean_anom) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * t)
+    apparent_long = np.radians(np.degrees(mean_long) + center - 0.00569 - 0.00478 * np.sin(omega))
+    mean_obliq = 23 + (26 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliq) * np.sin(apparent_long))
+
+    y = np.tan(obliq / 2) ** 2
+    equation_of_time = 4 * np.degrees(
+        y * np.sin(2 * mean_long)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * y * y * np.sin(4 * mean_long)
+        - 1.25 * eccent * eccent * np.sin(2 * mean_anom)
+    )
+    solar_noon = 720 - 4 * lon - equation_of_time
+
+    rise_ha, rises = _hour_angle(SUNRISE_ZENITH, lat, declination)
+    civil_ha, civil = _hour_angle(CIVIL_ZENITH, lat, declination)
+
+    def when(minutes, happens):
+        return np.where(happens, minutes, np.nan)
+
+    return {
+        'civil_dawn': when(solar_noon - 4 * civil_ha, civil),
+        'sunrise': when(solar_noon - 4 * rise_ha, rises),
+        'sunset': when(solar_noon + 4 * rise_ha, rises),
+        'civil_dusk': when(solar_noon + 4 * civil_ha, civil),
+        'solar_noon': solar_noon,
+        'day_minutes': 8 * rise_ha,
+        'twilight_minutes': 4 * (civil_ha - rise_ha),
+    }
+
+
+def coordinate_key(latitude, longitude) -> Tuple[int, int]:
+    """Coordinates rounded to COORDINATE_PLACES, as integers (50.0875 -> 5009)"""
+    return round(float(latitude) * COORDINATE_SCALE), round(float(longitude) * COORDINATE_SCALE)
+
+
+def _degrees(key: int) -> Decimal:
+    return Decimal(key).scaleb(-COORDINATE_PLACES)
+
+
+def get_solar_events(pairs: Iterable[Tuple]) -> Dict[Tuple, Dict]:
+    """
+    {(latitude key, longitude key, date): {event: minutes after UTC midnight or None}}
+
+    pairs are (latitude, longitude, date); keys come from coordinate_key.
+    Known pairs come from one query, the rest is computed in one vectorized
+    pass and only the missing rows are inserted.
+    """
+    wanted = {(*coordinate_key(lat, lon), day) for lat, lon, day in pairs}
+    if not wanted:
+        return {}
+
+    # The database scales the stored Decimals, so no Decimal is built per row
+    rows = SolarEvent.objects.filter(
+        latitude__in=[_degrees(key) for key in {lat for lat, _, _ in wanted}],
+        longitude__in=[_degrees(key) for key in {lon for _, lon, _ in wanted}],
+        date__in={day for _, _, day in wanted},
+    ).annotate(
+        lat_key=Cast(Round(F('latitude') * COORDINATE_SCALE), IntegerField()),
+        lon_key=Cast(Round(F('longitude') * COORDINATE_SCALE), IntegerField()),
+    ).values_list('lat_key', 'lon_key', 'date', *EVENTS)
+    found = {}
+    for lat, lon, day, *minutes in rows:
+        if (lat, lon, day) in wanted:
+            found[(lat, lon, day)] = dict(zip(EVENTS, minutes))
+    missing = wanted.difference(found)
+    if not missing:
+        return found
+
+    # Vectorized over the grid of missing points x missing dates, only requested pairs are kept
+    points = sorted({(lat, lon) for lat, lon, _ in missing})
+    dates = sorted({day for _, _, day in missing})
+    computed = solar_events(
+        [lat / COORDINATE_SCALE for lat, _ in points], [lon / COORDINATE_SCALE for _, lon in points], dates
+    )
+    minutes = np.stack([np.round(computed[name]) for name in EVENTS], axis=-1)
+    minutes = np.where(np.isnan(minutes), None, np.nan_to_num(minutes).astype(int)).tolist()
+    point_index = {point: (i, _degrees(point[0]), _degrees(point[1])) for i, point in enumerate(points)}
+    date_index = {day: j for j, day in enumerate(dates)}
+
+    new_events = []
+    for lat, lon, day in missing:
+        i, latitude, longitude = point_index[(lat, lon)]
+        values = dict(zip(EVENTS, minutes[i][date_index[day]]))
+        new_events.append(SolarEvent(latitude=latitude, longitude=longitude, date=day, **values))
+        found[(lat, lon, day)] = values
+    SolarEvent.objects.bulk_create(new_events, ignore_conflicts=True, batch_size=INSERT_BATCH_SIZE)
+    return found
+
+
+def local_time(day: date, minutes):
+    """
+    Wall-clock time of an event given in minutes after UTC midnight
+
+    In the server TIME_ZONE, not the location's own zone: locations are
+    stored without a zone, so shoots abroad get times in TIME_ZONE.
+    """
+    if minutes is None:
+        return None
+    moment = datetime.combine(day, time(0), tzinfo=dt_timezone.utc) + timedelta(minutes=minutes)
+    return timezone.localtime(moment).time()
+
+
+def fill_solar_times(production, date_from=None, date_to=None, overwrite=False) -> Dict:
+    """
+    Fill sunrise/sunset of a production's shooting days and call sheets
+
+    Times are in TIME_ZONE (see local_time) at the day's primary location;
+    call sheets take the times of the shooting day with the same date,
+    also when only the sheet is missing them. Hand-entered values are kept
+    unless overwrite. Returns the number of rows updated.
+    """
+    days = ShootingDay.objects.filter(
+        production=production,
+        primary_location__latitude__isnull=False,
+        primary_location__longitude__isnull=False,
+    ).select_related('primary_location')
+    if date_from:
+        days = days.filter(shoot_date__gte=date_from)
+    if date_to:
+        days = days.filter(shoot_date__lte=date_to)
+    days = list(days)
+    missing = days if overwrite else [day for day in days if day.sunrise is None or day.sunset is None]
+
+    events = get_solar_events(
+        (day.primary_location.latitude, day.primary_location.longitude, day.shoot_date) for day in missing
+    )
+    for day in missing:
+        event = events[(
+            *coordinate_key(day.primary_location.latitude, day.primary_location.longitude), day.shoot_date
+        )]
+        day.sunrise = local_time(day.shoot_date, event['sunrise'])
+        day.sunset = local_time(day.shoot_date, event['sunset'])
+    ShootingDay.objects.bulk_update(missing, ['sunrise', 'sunset'], batch_size=500)
+    times_by_date = {day.shoot_date: (day.sunrise, day.sunset) for day in days}
+
+    call_sheets = CallSheet.objects.filter(production=production, date__in=list(times_by_date))
+    if not overwrite:
+        call_sheets = call_sheets.filter(MISSING_TIMES)
+    call_sheets = list(call_sheets)
+    for call_sheet in call_sheets:
+        call_sheet.sunrise, call_sheet.sunset = times_by_date[call_sheet.date]
+    CallSheet.objects.bulk_update(call_sheets, ['sunrise', 'sunset'], batch_size=500)
+    invalidate_call_sheet_snapshots([call_sheet.pk for call_sheet in call_sheets])
+
+    return {'shooting_days': len(missing), 'call_sheets': len(call_sheets)}
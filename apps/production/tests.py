@@ -1,3 +1,307 @@
-from django.test import TestCase
+import threading
+import unittest
+from datetime import date, time
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from apps.crew.models import CallSheet
+from apps.schedule.models import ShootingDay
+from .geo import get_distances, haversine, haversine_matrix
+from .models import Production, Location, Scene, Shot, SolarEvent, Take
+from .solar import fill_solar_times, get_solar_events, local_time, solar_events
+from .services import record_takes
+
+
+class ProductionQueryCountTests(TestCase):
+    """Seznam a detail produkcí musí mít konstantní počet dotazů"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def _create_productions(self, count, scenes_per_production=3):
+        productions = []
+        for i in range(count):
+            production = Production.objects.create(
+                title=f'Film {Production.objects.count()}',
+                start_date=date(2025, 1, 1),
+                end_date=date(2025, 2, 1),
+            )
+            location = Location.objects.create(production=production, name='Studio', address='Praha')
+            for n in range(scenes_per_production):
+                scene = Scene.objects.create(
+                    production=production,
+                    scene_number=str(n + 1),
+                    int_ext='INT',
+                    location=location,
+                    location_detail='Kitchen',
+                    time_of_day='DAY',
+                    estimated_pages=Decimal('1.50'),
+                    description='',
+                    status='completed' if n == 0 else 'not_shot',
+                )
+                Shot.objects.create(scene=scene, shot_number='1', status='completed')
+                Shot.objects.create(scene=scene, shot_number='2')
+            productions.append(production)
+        return productions
+
+    def test_list_query_count_is_constant(self):
+        self._create_productions(2)
+        with self.assertNumQueries(2):  # COUNT pro stránkování + jeden anotovaný SELECT
+            self.client.get('/api/v1/production/productions/')
+
+        self._create_productions(15)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/production/productions/')
+
+        self.assertEqual(response.status_code, 200)
+        first = response.json()['results'][0]
+        self.assertEqual(first['scenes_count'], 3)
+        self.assertEqual(first['completion_percentage'], 33.3)
+
+    def test_detail_stats_come_from_annotations(self):
+        production = self._create_productions(1, scenes_per_production=4)[0]
+
+        # produkce + locations + scenes (s počty shotů)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/v1/production/productions/{production.id}/')
+
+        data = response.json()
+        self.assertEqual(data['total_scenes'], 4)
+        self.assertEqual(data['completed_scenes'], 1)
+        self.assertEqual(data['total_shots'], 8)
+        self.assertEqual(data['completed_shots'], 4)
+        self.assertEqual(Decimal(str(data['total_pages'])), Decimal('6.00'))
+        self.assertEqual([s['shots_count'] for s in data['scenes']], [2, 2, 2, 2])
+
+
+def _create_shot():
+    production = Production.objects.create(
+        title='Film', start_date=date(2025, 1, 1), end_date=date(2025, 2, 1)
+    )
+    location = Location.objects.create(production=production, name='Studio', address='Praha')
+    scene = Scene.objects.create(
+        production=production, scene_number='1', int_ext='INT', location=location,
+        location_detail='Kitchen', time_of_day='DAY', estimated_pages=Decimal('1.00'),
+        description='',
+    )
+    return Shot.objects.create(scene=scene, shot_number='1')
+
+
+class TakeRecordingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+        self.shot = _create_shot()
+
+    def test_single_and_batch_takes(self):
+        response = self.client.post(f'/api/v1/production/shots/{self.shot.id}/add_take/', {'result': 'ng'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['take_number'], 1)
+
+        response = self.client.post(
+            f'/api/v1/production/shots/{self.shot.id}/add_takes/',
+            {'takes': [{'result': 'good'}, {'result': 'ng'}, {'result': 'print'}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([t['take_number'] for t in response.json()], [2, 3, 4])
+
+        self.shot.refresh_from_db()
+        self.assertEqual(self.shot.takes_completed, 4)
+        self.assertEqual(self.shot.takes_good, 2)
+
+    def test_invalid_result_records_nothing(self):
+        response = self.client.post(
+            f'/api/v1/production/shots/{self.shot.id}/add_takes/',
+            {'takes': [{'result': 'good'}, {'result': 'maybe'}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Take.objects.exists())
+
+        response = self.client.post(
+            f'/api/v1/production/shots/{self.shot.id}/add_takes/', {'takes': [1, 2]}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Take.objects.exists())
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        # UPDATE počítadel + MAX + jeden INSERT (+ savepoint)
+        with self.assertNumQueries(5):
+            record_takes(self.shot.id, [{'result': 'good'}] * 25)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'needs row locks (PostgreSQL)')
+class ConcurrentTakeRecordingTests(TransactionTestCase):
+    """Souběžní script supervisoři nesmí kolidovat na číslech takes"""
+
+    THREADS = 8
+    TAKES_PER_THREAD = 10
+
+    def test_parallel_recorders(self):
+        shot = _create_shot()
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def recorder():
+            try:
+                barrier.wait()
+                for n in range(self.TAKES_PER_THREAD):
+                    record_takes(shot.id, [{'result': 'good' if n % 2 else 'ng'}])
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=recorder) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.TAKES_PER_THREAD
+        numbers = list(Take.objects.filter(shot=shot).values_list('take_number', flat=True))
+        self.assertEqual(sorted(numbers), list(range(1, total + 1)))
+
+        shot.refresh_from_db()
+        self.assertEqual(shot.takes_completed, total)
+        self.assertEqual(shot.takes_good, total // 2)
+
+
+class LocationDistanceTests(TestCase):
+    """Matice vzdáleností lokací a trasa přejezdů"""
+
+    def setUp(self):
+        self.production = Production.objects.create(
+            title='Film', start_date=date(2025, 1, 1), end_date=date(2025, 2, 1),
+        )
+
+    def _location(self, name, lat, lon):
+        return Location.objects.create(
+            production=self.production, name=name, address='Praha', latitude=lat, longitude=lon,
+        )
+
+    def test_matrix_matches_scalar_reference(self):
+        self.assertAlmostEqual(haversine(50, 14, 51, 14), 111.195, places=2)
+
+        rng = np.random.default_rng(0)
+        lat = rng.uniform(-80, 80, 500)
+        lon = rng.uniform(-180, 180, 500)
+        matrix = haversine_matrix(lat, lon)
+
+        self.assertEqual(matrix.shape, (500, 500))
+        self.assertTrue(np.allclose(matrix, matrix.T))
+        self.assertTrue(np.allclose(np.diag(matrix), 0))
+        for i, j in [(0, 1), (17, 401), (250, 499)]:
+            self.assertAlmostEqual(matrix[i, j], haversine(lat[i], lon[i], lat[j], lon[j]), places=6)
+
+    def test_unknown_coordinates_and_invalidation(self):
+        prague = self._location('Praha', Decimal('50.087'), Decimal('14.421'))
+        brno = self._location('Brno', Decimal('49.195'), Decimal('16.606'))
+        barrandov = self._location('Barrandov', None, None)
+
+        distances = get_distances(self.production.id)
+        self.assertAlmostEqual(distances.distance(prague.id, brno.id), 185, delta=2)
+        self.assertIsNone(distances.distance(prague.id, barrandov.id))
+        self.assertEqual(distances.distance(barrandov.id, barrandov.id), 0.0)
+
+        with self.assertNumQueries(0):
+            get_distances(self.production.id)
+
+        barrandov.latitude, barrandov.longitude = Decimal('50.033'), Decimal('14.378')
+        barrandov.save()
+        self.assertLess(get_distances(self.production.id).distance(prague.id, barrandov.id), 10)
+
+    def test_route_visits_neighbours_in_order(self):
+        # Lokace na jedné přímce, zadané zpřeházeně
+        ids = [self._location(f'L{n}', Decimal('50'), Decimal(14 + 0.1 * n)).id for n in range(9)]
+        shuffled = [ids[n] for n in (4, 0, 8, 2, 6, 1, 7, 3, 5)]
+        distances = get_distances(self.production.id)
+
+        order, km = distances.route(shuffled[:6])
+        self.assertIn(order, ([ids[n] for n in (0, 1, 2, 4, 6, 8)], [ids[n] for n in (8, 6, 4, 2, 1, 0)]))
+
+        order, km = distances.route(shuffled)  # nad EXACT_ROUTE_LIMIT: nearest neighbour + 2-opt
+        self.assertIn(order, (ids, ids[::-1]))
+        self.assertAlmostEqual(km, distances.distance(ids[0], ids[8]), delta=0.01)
+
+        order, _ = distances.route(shuffled, start=ids[4])
+        self.assertEqual(order[0], ids[4])
+
+
+class SolarEventTests(TestCase):
+    """Východ/západ slunce podle NOAA, memo tabulka a hromadné vyplnění"""
+
+    def test_matches_published_times(self):
+        # Praha, slunovraty (timeanddate.com): 4:52/21:15 CEST, 7:58/16:02 CET
+        events = solar_events([50.0875], [14.4213], [date(2025, 6, 21), date(2025, 12, 21)])
+        expected = [(4 * 60 + 52 - 120, 21 * 60 + 15 - 120), (7 * 60 + 58 - 60, 16 * 60 + 2 - 60)]
+        for j, (sunrise, sunset) in enumerate(expected):
+            self.assertAlmostEqual(events['sunrise'][0, j], sunrise, delta=2)
+            self.assertAlmostEqual(events['sunset'][0, j], sunset, delta=2)
+        self.assertTrue((events['twilight_minutes'] > 30).all())
+
+    def test_polar_day_and_night(self):
+        # Tromsø: the sun neither sets at midsummer nor rises at midwinter
+        events = solar_events([69.65], [18.96], [date(2025, 6, 21), date(2025, 12, 21)])
+        self.assertTrue(np.isnan(events['sunrise']).all())
+        self.assertEqual(events['day_minutes'].tolist(), [[1440.0, 0.0]])
+
+    def test_memo_table(self):
+        pairs = [(50.08751, 14.42131, date(2025, 3, day)) for day in range(1, 11)]
+        events = get_solar_events(pairs)
+        self.assertEqual(len(events), 10)
+        self.assertEqual(SolarEvent.objects.count(), 10)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_solar_events(pairs), events)
+        key = (5009, 1442, date(2025, 3, 1))
+        self.assertEqual(local_time(date(2025, 3, 1), events[key]['sunrise']).hour, 6)
+
+    def test_fill_shooting_days_and_call_sheets(self):
+        production = Production.objects.create(title='Film', start_date=date(2025, 6, 1), end_date=date(2025, 7, 1))
+        prague = Location.objects.create(
+            production=production, name='Praha', address='Praha',
+            latitude=Decimal('50.0875'), longitude=Decimal('14.4213'),
+        )
+        days = [
+            ShootingDay.objects.create(
+                production=production, shoot_date=date(2025, 6, 20 + n), day_number=n + 1,
+                general_call=time(6), shooting_call=time(7), primary_location=prague,
+            ) for n in range(2)
+        ]
+        days[1].sunrise, days[1].sunset = time(5), time(21)
+        days[1].save()
+        call_sheet = CallSheet.objects.create(
+            production=production, shooting_day=1, date=date(2025, 6, 20),
+            general_call_time=time(6), shooting_call=time(7), base_camp_location='', nearest_hospital='',
+        )
+
+        self.assertEqual(fill_solar_times(production), {'shooting_days': 1, 'call_sheets': 1})
+        days[0].refresh_from_db()
+        days[1].refresh_from_db()
+        call_sheet.refresh_from_db()
+        self.assertEqual((days[0].sunrise.hour, days[0].sunset.hour), (4, 21))
+        self.assertEqual((call_sheet.sunrise, call_sheet.sunset), (days[0].sunrise, days[0].sunset))
+        self.assertEqual(days[1].sunrise, time(5))  # Zadáno ručně
+
+        # Sheet without times for a day that already has them takes the day's times
+        second_sheet = CallSheet.objects.create(
+            production=production, shooting_day=2, date=date(2025, 6, 21),
+            general_call_time=time(6), shooting_call=time(7), base_camp_location='', nearest_hospital='',
+        )
+        self.assertEqual(fill_solar_times(production), {'shooting_days': 0, 'call_sheets': 1})
+        second_sheet.refresh_from_db()
+        self.assertEqual((second_sheet.sunrise, second_sheet.sunset), (time(5), time(21)))
+
+        fill_solar_times(production, overwrite=True)
+        days[1].refresh_from_db()
+        self.assertEqual(days[1].sunrise.hour, 4)
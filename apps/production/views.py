@@ -1,19 +1,65 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.utils.http import parse_etags
+from django.db.models import Count, Q, Sum, OuterRef, Subquery, Prefetch
+from django.db.models.functions import Coalesce
 from .models import Production, Scene, Shot, Take, Location
 from .serializers import (
     ProductionListSerializer, ProductionDetailSerializer, ProductionCreateUpdateSerializer,
     SceneListSerializer, SceneDetailSerializer,
     ShotListSerializer, ShotDetailSerializer,
-    TakeSerializer, LocationSerializer
+    TakeSerializer, TakeInputSerializer, LocationSerializer
 )
+from .services import record_takes
 
 class ProductionViewSet(viewsets.ModelViewSet):
     queryset = Production.objects.all()
     
+    def get_queryset(self):
+        """Statistiky scén a shotů počítané v SQL místo dotazů per produkce"""
+        # GROUP BY dotazy ignorují Meta.ordering, proto explicitní order_by
+        queryset = super().get_queryset().order_by('-created_at')
+        
+        if self.action == 'list':
+            return queryset.annotate(
+                total_scenes=Count('scenes'),
+                completed_scenes=Count('scenes', filter=Q(scenes__status='completed')),
+            )
+        
+        if self.action == 'retrieve':
+            # Shoty přes subquery, aby join na shots nenafukoval součty scén
+            shots = Shot.objects.filter(
+                scene__production=OuterRef('pk')
+            ).order_by().values('scene__production')
+            
+            return queryset.annotate(
+                total_scenes=Count('scenes'),
+                completed_scenes=Count('scenes', filter=Q(scenes__status='completed')),
+                total_pages=Sum('scenes__estimated_pages'),
+                total_shots=Coalesce(
+                    Subquery(shots.annotate(count=Count('pk')).values('count')), 0
+                ),
+                completed_shots=Coalesce(
+                    Subquery(
+                        shots.filter(status='completed').annotate(count=Count('pk')).values('count')
+                    ), 0
+                ),
+            ).prefetch_related(
+                'locations',
+                Prefetch(
+                    'scenes',
+                    queryset=Scene.objects.select_related('location').annotate(
+                        shots_count=Count('shots')
+                    )
+                ),
+            )
+        
+        return queryset
+    
     def get_serializer_class(self):
         if self.action == 'list':
             return ProductionListSerializer
@@ -25,92 +71,69 @@ class ProductionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
         """Live production dashboard data"""
-        production = self.get_object()
+        from apps.realtime.services import LiveDashboardService
         
-        # Get today's shooting day
-        today = timezone.now().date()
+        # Jeden řádek LiveDashboardData z cache; produkci načítáme jen když stav chybí
         try:
-            from apps.schedule.models import ShootingDay, StatusUpdate
-            shooting_day = ShootingDay.objects.get(production=production, shoot_date=today)
-            
-            # Latest status update
-            latest_status = StatusUpdate.objects.filter(
-                production=production,
-                shooting_day=shooting_day
-            ).first()
-            
-            # Calculate progress
-            scenes_today = shooting_day.scene_schedules.all()
-            completed_scenes_today = scenes_today.filter(status='completed').count()
-            
-            # Get all shots for today's scenes
-            today_scene_ids = scenes_today.values_list('scene_id', flat=True)
-            shots_today = Shot.objects.filter(scene_id__in=today_scene_ids)
-            completed_shots_today = shots_today.filter(status='completed').count()
-            
-            pages_shot_today = sum(
-                scene.scene.estimated_pages or 0 
-                for scene in scenes_today.filter(status='completed')
-            )
-            
-            # Next scene calculation
-            next_scene_scheduled = scenes_today.filter(
-                status__in=['scheduled', 'setup']
-            ).first()
-            
-            dashboard_data = {
-                'production_id': production.id,
-                'current_scene': latest_status.current_scene if latest_status else '',
-                'current_shot': latest_status.current_shot if latest_status else '',
-                'current_status': latest_status.current_status if latest_status else 'prep',
-                'scenes_completed_today': completed_scenes_today,
-                'shots_completed_today': completed_shots_today,
-                'pages_shot_today': pages_shot_today,
-                'day_start': shooting_day.general_call,
-                'current_time': timezone.now().time(),
-                'estimated_wrap': shooting_day.estimated_wrap,
-                'next_scene': next_scene_scheduled.scene.scene_number if next_scene_scheduled else '',
-                'next_estimated_time': next_scene_scheduled.estimated_start if next_scene_scheduled else None,
-                'current_temperature': None,  # TODO: Weather API integration
-                'weather_description': '',
-                'crew_on_set': 0,  # TODO: Check-in tracking
-                'crew_total': production.crew.filter(is_active=True).count() if hasattr(production, 'crew') else 0,
-            }
-            
-            return Response(dashboard_data)
-            
-        except ShootingDay.DoesNotExist:
+            pk = Production._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            raise Http404
+        state = LiveDashboardService(pk).get_state()
+        if state is None:
+            self.get_object()
             return Response(
                 {'error': 'No shooting day scheduled for today'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        etag, dashboard_data = state
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        
+        return Response(
+            {**dashboard_data, 'current_time': timezone.localtime().time()},
+            headers={'ETag': etag}
+        )
     
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update current production status"""
+        from apps.realtime.models import LiveDashboardData
+        
         production = self.get_object()
         data = request.data
         
+        # Dashboard se zapisuje přes .update(), bez validace modelu
+        current_status = data.get('current_status')
+        if current_status is not None and current_status not in dict(LiveDashboardData.STATUS_CHOICES):
+            return Response(
+                {'error': f'Unknown current_status: {current_status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         try:
             from apps.schedule.models import ShootingDay, StatusUpdate
-            from apps.crew.models import CrewMember
+            from apps.realtime.services import LiveDashboardService
             
-            today = timezone.now().date()
+            today = timezone.localdate()
             shooting_day = ShootingDay.objects.get(production=production, shoot_date=today)
             
-            # Get crew member (simplified for MVP)
-            crew_member = None
-            if hasattr(production, 'crew') and production.crew.exists():
-                crew_member = production.crew.first()
-            
             status_update = StatusUpdate.objects.create(
                 production=production,
                 shooting_day=shooting_day,
-                updated_by=crew_member,
-                current_scene=data.get('current_scene', ''),
-                current_shot=data.get('current_shot', ''),
-                current_status=data.get('current_status', 'prep'),
+                update_type='general',
+                current_scene=production.scenes.filter(
+                    scene_number=data.get('current_scene', '')
+                ).first(),
                 message=data.get('notes', ''),
+                posted_by=request.user,
+            )
+            
+            LiveDashboardService(production.id, today).set_status(
+                current_status=data.get('current_status'),
+                current_scene=data.get('current_scene'),
+                current_shot=data.get('current_shot'),
+                user=request.user,
             )
             
             return Response({'status': 'updated', 'id': status_update.id})
@@ -142,7 +165,12 @@ class SceneViewSet(viewsets.ModelViewSet):
         scene.save()
         
         # Auto-complete all shots in scene
-        scene.shots.update(status='completed')
+        completed_shots = scene.shots.exclude(status='completed').update(
+            status='completed', completed_at=timezone.now()
+        )
+        
+        from apps.realtime.services import LiveDashboardService
+        LiveDashboardService(scene.production_id).shots_completed(completed_shots)
         
         return Response({'status': 'Scene marked as completed'})
 
@@ -162,28 +190,36 @@ class ShotViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def add_take(self, request, pk=None):
         """Add a new take to shot"""
-        shot = self.get_object()
-        data = request.data
+        return self._record_takes([request.data])
+    
+    @action(detail=True, methods=['post'])
+    def add_takes(self, request, pk=None):
+        """Add a batch of takes (slates logged offline) in one call"""
+        takes = request.data.get('takes')
+        if not isinstance(takes, list) or not takes:
+            return Response(
+                {'error': 'takes must be a non-empty list'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self._record_takes(takes, many=True)
+    
+    def _record_takes(self, takes, many=False):
+        from apps.realtime.services import LiveDashboardService
+        from apps.schedule.wrap import publish_todays_wrap_prediction
         
-        # Get next take number
-        last_take = shot.takes.order_by('-take_number').first()
-        next_take_number = (last_take.take_number + 1) if last_take else 1
+        shot = self.get_object()
         
-        take = Take.objects.create(
-            shot=shot,
-            take_number=next_take_number,
-            result=data.get('result', 'ng'),
-            director_notes=data.get('director_notes', ''),
-            script_supervisor_notes=data.get('script_supervisor_notes', '')
-        )
+        # Items that are not objects or carry an unknown result -> 400, nothing recorded
+        serializer = TakeInputSerializer(data=takes, many=True)
+        serializer.is_valid(raise_exception=True)
         
-        # Update shot stats
-        shot.takes_completed = shot.takes.count()
-        shot.takes_good = shot.takes.filter(result__in=['good', 'print']).count()
-        shot.save()
+        created = record_takes(shot.id, serializer.validated_data)
+        LiveDashboardService(shot.scene.production_id).takes_recorded(created)
+        publish_todays_wrap_prediction(shot.scene.production_id)
         
-        serializer = TakeSerializer(take)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        serializer = TakeSerializer(created, many=True)
+        data = serializer.data if many else serializer.data[0]
+        return Response(data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
@@ -192,6 +228,7 @@ class ShotViewSet(viewsets.ModelViewSet):
         new_status = request.data.get('status')
         
         if new_status in dict(Shot.STATUS_CHOICES):
+            changed = shot.status != new_status
             shot.status = new_status
             
             # Track timing
@@ -200,6 +237,14 @@ class ShotViewSet(viewsets.ModelViewSet):
             
             shot.save()
             
+            if changed:
+                from apps.realtime.services import LiveDashboardService
+                from apps.schedule.wrap import publish_todays_wrap_prediction, record_setup_residual
+                LiveDashboardService(shot.scene.production_id).shot_status_changed(shot)
+                if new_status == 'completed':
+                    record_setup_residual(shot)
+                    publish_todays_wrap_prediction(shot.scene.production_id)
+            
             return Response({'status': f'Shot status updated to {new_status}'})
         
         return Response(
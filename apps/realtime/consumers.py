@@ -56,6 +56,20 @@ class ProductionConsumer(AsyncWebsocketConsumer):
             'data': event['data']
         }))
     
+    async def optimization_progress(self, event):
+        """Incumbent/state of a background schedule optimization (schedule.jobs)"""
+        await self.send(text_data=json.dumps({
+            'type': 'optimization_progress',
+            'data': event['data']
+        }))
+    
+    async def wrap_prediction(self, event):
+        """P50/P90 wrap of today's shooting day (schedule.wrap)"""
+        await self.send(text_data=json.dumps({
+            'type': 'wrap_prediction',
+            'data': event['data']
+        }))
+    
     @database_sync_to_async
     def save_status_update(self, data):
         from apps.notifications.models import StatusUpdate
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+from collections import defaultdict
+from django.utils import timezone
+
+
+def fill_dates(apps, schema_editor):
+    """Date of a row = local date of its last update; the newest row per production and date is kept"""
+    LiveDashboardData = apps.get_model('realtime', 'LiveDashboardData')
+
+    kept, by_date, duplicates = set(), defaultdict(list), []
+    rows = LiveDashboardData.objects.order_by('-last_update').values_list('pk', 'production_id', 'last_update')
+    for pk, production_id, last_update in rows.iterator():
+        day = timezone.localdate(last_update)
+        if (production_id, day) in kept:
+            duplicates.append(pk)
+            continue
+        kept.add((production_id, day))
+        by_date[day].append(pk)
+
+    for start in range(0, len(duplicates), 500):
+        LiveDashboardData.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+    for day, pks in by_date.items():
+        for start in range(0, len(pks), 500):
+            LiveDashboardData.objects.filter(pk__in=pks[start:start + 500]).update(date=day)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0003_alter_shot_options_alter_take_options_and_more'),
+        ('schedule', '0001_initial'),
+        ('realtime', '0002_livedashboarddata_realtimenotification_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livedashboarddata',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.AddField(
+            model_name='livedashboarddata',
+            name='next_scene',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='livedashboarddata',
+            name='next_scene_time',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='livedashboarddata',
+            name='shooting_day',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='schedule.shootingday'),
+        ),
+        migrations.AddField(
+            model_name='livedashboarddata',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_dates, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='livedashboarddata',
+            unique_together={('production', 'date')},
+        ),
+    ]
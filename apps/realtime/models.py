@@ -236,6 +236,11 @@ class LiveDashboardData(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     production = models.ForeignKey(Production, on_delete=models.CASCADE, related_name='live_dashboard_data')
     
+    # One row per production and shooting date, maintained by LiveDashboardService
+    date = models.DateField(default=timezone.localdate)
+    shooting_day = models.ForeignKey('schedule.ShootingDay', on_delete=models.SET_NULL, null=True, blank=True)
+    version = models.PositiveIntegerField(default=0)  # Bumped on every change, used as ETag
+    
     # Current state
     current_scene = models.CharField(max_length=10, blank=True)
     current_shot = models.CharField(max_length=10, blank=True)
@@ -268,6 +273,10 @@ class LiveDashboardData(models.Model):
     last_shot_time = models.TimeField(null=True, blank=True)
     estimated_wrap_time = models.TimeField(null=True, blank=True)
     
+    # Next scheduled scene
+    next_scene = models.CharField(max_length=10, blank=True)
+    next_scene_time = models.TimeField(null=True, blank=True)
+    
     # Issues and delays
     weather_delay_minutes = models.IntegerField(default=0)
     technical_delay_minutes = models.IntegerField(default=0)
@@ -285,6 +294,7 @@ class LiveDashboardData(models.Model):
     
     class Meta:
         ordering = ['-last_update']
+        unique_together = ['production', 'date']
         indexes = [
             models.Index(fields=['production', 'last_update']),
         ]
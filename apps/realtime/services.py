@@ -0,0 +1,262 @@
+# apps/realtime/services.py
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.production.models import Shot, Take
+from apps.schedule.models import ShootingDay, StatusUpdate
+from apps.crew.models import CrewAssignment
+from .models import LiveDashboardData
+
+CACHE_TIMEOUT = 60 * 60
+
+# StatusUpdate.update_type -> LiveDashboardData.current_status
+STATUS_BY_UPDATE_TYPE = {
+    'day_start': 'prep',
+    'first_shot': 'rolling',
+    'scene_complete': 'moving_on',
+    'meal_break': 'meal_break',
+    'back_from_meal': 'prep',
+    'company_move': 'moving_on',
+    'weather_hold': 'weather_hold',
+    'wrap': 'wrapped',
+}
+
+
+def broadcast(production_id, event_type: str, data: Dict):
+    """
+    Push an event to ProductionConsumer clients on production_<id>
+
+    event_type names the consumer handler. Without a configured channel
+    layer (tests, management commands) this is a no-op.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(f'production_{production_id}', {
+        'type': event_type,
+        'data': data,
+    })
+
+
+class LiveDashboardService:
+    """
+    Incrementally maintained live state of today's shoot
+
+    Views call the event methods (scene completed, take recorded, ...) which
+    adjust the LiveDashboardData counters with F() updates and bump its
+    version. The dashboard endpoint checks the version and serves the
+    cached payload instead of recomputing from schedules, shots and takes
+    on every poll. The row is rebuilt from scratch only
+    when it does not exist yet for the day.
+    """
+
+    def __init__(self, production_id, date=None):
+        self.production_id = production_id
+        self.date = date or timezone.localdate()
+
+    @property
+    def cache_key(self):
+        return f'live_dashboard_{self.production_id}_{self.date.isoformat()}'
+
+    # -- reading -------------------------------------------------------
+
+    def get_state(self) -> Optional[Tuple[str, Dict]]:
+        """
+        (etag, payload) of today's dashboard, None without a shooting day
+
+        Without a shared CACHES backend every worker process has its own
+        cache and only the writer drops its copy, so a cached payload is
+        served only while the row's version still matches (one indexed
+        query per read).
+        """
+        current = LiveDashboardData.objects.filter(
+            production_id=self.production_id, date=self.date
+        ).values_list('pk', 'version').first()
+        if current is not None:
+            state = cache.get(self.cache_key)
+            if state is not None and state[0] == self._etag(*current):
+                return state
+            data = LiveDashboardData.objects.get(pk=current[0])
+        else:
+            data = self.rebuild()
+            if data is None:
+                return None
+
+        state = (self._etag(data.pk, data.version), self._payload(data))
+        cache.set(self.cache_key, state, CACHE_TIMEOUT)
+        return state
+
+    @staticmethod
+    def _etag(pk, version) -> str:
+        return f'"{pk}-{version}"'
+
+    def _payload(self, data: LiveDashboardData) -> Dict:
+        return {
+            'production_id': self.production_id,
+            'current_scene': data.current_scene,
+            'current_shot': data.current_shot,
+            'current_take': data.current_take,
+            'current_status': data.current_status,
+            'scenes_completed_today': data.scenes_completed_today,
+            'shots_completed_today': data.setups_completed_today,
+            'takes_completed_today': data.takes_completed_today,
+            'pages_shot_today': data.pages_shot_today,
+            'day_start': data.day_start_time,
+            'estimated_wrap': data.estimated_wrap_time,
+            'next_scene': data.next_scene,
+            'next_estimated_time': data.next_scene_time,
+            'total_delay_minutes': data.total_delay_minutes,
+            'active_issues': data.active_issues,
+            'current_temperature': None,  # TODO: Weather API integration
+            'weather_description': '',
+            'crew_on_set': data.crew_checked_in,
+            'crew_total': data.crew_total,
+            'last_update': data.last_update,
+        }
+
+    # -- full rebuild --------------------------------------------------
+
+    def rebuild(self) -> Optional[LiveDashboardData]:
+        """Recompute the day's state from the database (once per day)"""
+        shooting_day = ShootingDay.objects.filter(
+            production_id=self.production_id, shoot_date=self.date
+        ).first()
+        if shooting_day is None:
+            return None
+
+        completed = shooting_day.scene_schedules.filter(status='completed')
+        latest_status = StatusUpdate.objects.filter(
+            shooting_day=shooting_day
+        ).select_related('current_scene').first()
+        current_shot = Shot.objects.filter(
+            scene__production_id=self.production_id,
+            status__in=['setup', 'rehearsal', 'rolling']
+        ).order_by('-scene__scene_number', '-shot_number').first()
+
+        defaults = {
+            'shooting_day': shooting_day,
+            'current_scene': (
+                latest_status.current_scene.scene_number
+                if latest_status and latest_status.current_scene else ''
+            ),
+            'current_shot': current_shot.shot_number if current_shot else '',
+            'current_status': (
+                STATUS_BY_UPDATE_TYPE.get(latest_status.update_type, 'prep')
+                if latest_status else 'prep'
+            ),
+            'scenes_completed_today': completed.count(),
+            'pages_shot_today': completed.aggregate(
+                pages=Sum('scene__estimated_pages')
+            )['pages'] or 0,
+            'setups_completed_today': Shot.objects.filter(
+                scene__production_id=self.production_id,
+                status='completed',
+                completed_at__date=self.date,
+            ).count(),
+            'takes_completed_today': Take.objects.filter(
+                shot__scene__production_id=self.production_id,
+                recorded_at__date=self.date,
+            ).count(),
+            'day_start_time': shooting_day.general_call,
+            'estimated_wrap_time': shooting_day.estimated_wrap,
+            'crew_total': CrewAssignment.objects.filter(
+                production_id=self.production_id, status='confirmed'
+            ).count(),
+        }
+        defaults.update(self._next_scene_fields(shooting_day))
+
+        data, created = LiveDashboardData.objects.update_or_create(
+            production_id=self.production_id, date=self.date,
+            defaults=defaults,
+        )
+        if not created:
+            # New ETag, other processes compare it with their cached copy
+            LiveDashboardData.objects.filter(pk=data.pk).update(version=F('version') + 1)
+            data.refresh_from_db(fields=['version'])
+        cache.delete(self.cache_key)
+        return data
+
+    def _next_scene_fields(self, shooting_day) -> Dict:
+        next_scene = shooting_day.scene_schedules.filter(
+            status__in=['scheduled', 'setup']
+        ).select_related('scene').order_by('day_order').first()
+        return {
+            'next_scene': next_scene.scene.scene_number if next_scene else '',
+            'next_scene_time': next_scene.estimated_start if next_scene else None,
+        }
+
+    # -- incremental updates -------------------------------------------
+
+    def _update(self, **changes):
+        """Apply changes to today's row (if it exists) and drop the cached copy"""
+        LiveDashboardData.objects.filter(
+            production_id=self.production_id, date=self.date
+        ).update(version=F('version') + 1, last_update=timezone.now(), **changes)
+        cache.delete(self.cache_key)
+
+    def status_posted(self, status_update: StatusUpdate):
+        changes = {}
+        if status_update.update_type in STATUS_BY_UPDATE_TYPE:
+            changes['current_status'] = STATUS_BY_UPDATE_TYPE[status_update.update_type]
+        if status_update.current_scene_id:
+            changes['current_scene'] = status_update.current_scene.scene_number
+        if status_update.update_type == 'day_start':
+            self.rebuild()
+        if changes:
+            self._update(updated_by=status_update.posted_by, **changes)
+
+    def set_status(self, current_status=None, current_scene=None, current_shot=None, user=None):
+        changes = {
+            field: value for field, value in (
+                ('current_status', current_status),
+                ('current_scene', current_scene),
+                ('current_shot', current_shot),
+            ) if value is not None
+        }
+        if changes:
+            self._update(updated_by=user, **changes)
+
+    def scene_started(self, scene_schedule):
+        self._update(
+            current_scene=scene_schedule.scene.scene_number,
+            current_scene_start_time=scene_schedule.actual_start,
+            **self._next_scene_fields(scene_schedule.shooting_day)
+        )
+
+    def scene_completed(self, scene_schedule):
+        self._update(
+            scenes_completed_today=F('scenes_completed_today') + 1,
+            pages_shot_today=F('pages_shot_today') + (scene_schedule.scene.estimated_pages or Decimal('0')),
+            **self._next_scene_fields(scene_schedule.shooting_day)
+        )
+
+    def shots_completed(self, count=1):
+        if count:
+            self._update(
+                setups_completed_today=F('setups_completed_today') + count,
+                last_shot_time=timezone.localtime().time(),
+            )
+
+    def shot_status_changed(self, shot):
+        if shot.status == 'completed':
+            self.shots_completed()
+        else:
+            self._update(current_shot=shot.shot_number, current_scene=shot.scene.scene_number)
+
+    def takes_recorded(self, takes):
+        if takes:
+            self._update(
+                current_take=max(take.take_number for take in takes),
+                takes_completed_today=F('takes_completed_today') + len(takes),
+                last_shot_time=timezone.localtime().time(),
+            )
+
+    def wrap_predicted(self, estimated_wrap):
+        """Median wrap of the Monte Carlo predictor (schedule.wrap) replaces the static estimate"""
+        self._update(estimated_wrap_time=estimated_wrap)
@@ -1,3 +1,104 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.production.models import Production, Location, Scene, Shot
+from apps.schedule.models import ShootingDay, SceneSchedule
+from .models import LiveDashboardData
+
+
+class LiveDashboardTests(TestCase):
+    """Dashboard se čte z jednoho udržovaného řádku LiveDashboardData"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+        today = timezone.localdate()
+        self.production = Production.objects.create(
+            title='Film', start_date=today, end_date=today + timedelta(days=30)
+        )
+        location = Location.objects.create(production=self.production, name='Studio', address='Praha')
+        self.day = ShootingDay.objects.create(
+            production=self.production, shoot_date=today, day_number=1,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        )
+        self.entries = []
+        for n in range(3):
+            scene = Scene.objects.create(
+                production=self.production, scene_number=str(n + 1), int_ext='INT',
+                location=location, location_detail='Kitchen', time_of_day='DAY',
+                estimated_pages=Decimal('1.25'), description='',
+            )
+            Shot.objects.create(scene=scene, shot_number='1')
+            self.entries.append(SceneSchedule.objects.create(
+                shooting_day=self.day, scene=scene, day_order=n,
+                estimated_start=time(7 + n, 0), estimated_duration=timedelta(hours=1),
+            ))
+        self.url = f'/api/v1/production/productions/{self.production.id}/dashboard/'
+
+    def test_cached_read_and_etag(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['next_scene'], '1')
+
+        with self.assertNumQueries(1):  # version check
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.json()['scenes_completed_today'], 0)
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_counters_follow_events(self):
+        etag = self.client.get(self.url)['ETag']
+
+        entry = self.entries[0]
+        self.client.post(f'/api/v1/schedule/scene-schedules/{entry.id}/complete_scene/')
+        self.client.post(f'/api/v1/schedule/scene-schedules/{entry.id}/complete_scene/')
+        shot = entry.scene.shots.get()
+        self.client.post(f'/api/v1/production/shots/{shot.id}/add_take/', {'result': 'print'})
+        self.client.post(f'/api/v1/production/shots/{shot.id}/update_status/', {'status': 'completed'})
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['scenes_completed_today'], 1)
+        self.assertEqual(Decimal(str(data['pages_shot_today'])), Decimal('1.25'))
+        self.assertEqual(data['takes_completed_today'], 1)
+        self.assertEqual(data['shots_completed_today'], 1)
+        self.assertEqual(data['next_scene'], '2')
+
+    def test_update_status_rejects_unknown_status(self):
+        self.client.get(self.url)
+        url = f'/api/v1/production/productions/{self.production.id}/update_status/'
+
+        self.assertEqual(self.client.post(url, {'current_status': 'partying'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'current_status': 'rolling'}).status_code, 200)
+        self.assertEqual(self.client.get(self.url).json()['current_status'], 'rolling')
+
+    def test_write_by_another_process(self):
+        etag = self.client.get(self.url)['ETag']
+        # Another worker's update: bumps the version but cannot drop this process' cache
+        LiveDashboardData.objects.filter(production=self.production).update(
+            version=F('version') + 1, current_status='rolling'
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['current_status'], 'rolling')
+
+    def test_invalid_production_id(self):
+        response = self.client.get('/api/v1/production/productions/not-a-uuid/dashboard/')
+        self.assertEqual(response.status_code, 404)
 
-# Create your tests here.
+    def test_no_shooting_day_today(self):
+        self.day.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
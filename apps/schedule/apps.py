@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ScheduleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.schedule'
-    verbose_name = 'Schedule Management'
\ No newline at end of file
+    verbose_name = 'Schedule Management'
+    
+    def ready(self):
+        import apps.schedule.signals
\ No newline at end of file
@@ -0,0 +1,205 @@
+# apps/schedule/dood.py
+import csv
+import json
+from typing import Dict, Iterator, List
+
+import numpy as np
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.crew.models import Character
+from .incidence import get_incidence
+from .models import SceneSchedule, ShootingDay
+
+# A gap of this many shooting days or more is a drop/pickup instead of holds
+DROP_AFTER_DAYS = 10
+
+# Days that are off the schedule do not get a column
+EXCLUDED_DAY_STATUSES = ('cancelled', 'postponed')
+
+
+def dood_codes(work: np.ndarray, drop_after: int = DROP_AFTER_DAYS):
+    """
+    DOOD codes for a cast x day work matrix, returns (codes, hold, dropped)
+
+    Work days get S (start) / P (pickup) + W + F (finish) / D (drop),
+    e.g. SW, W, WF, SWF, WD, PW; days between two work days are H (hold),
+    or left empty when the gap is at least drop_after days (dropped).
+    Run-length logic over the non-zero cells, no per-actor loop.
+    """
+    n_cast, n_days = work.shape
+    codes = np.full(work.shape, '', dtype='<U3')
+    hold = np.zeros(work.shape, dtype=bool)
+    dropped = np.zeros(work.shape, dtype=bool)
+    rows, cols = np.nonzero(work)
+    if not rows.size:
+        return codes, hold, dropped
+
+    first = np.r_[True, rows[1:] != rows[:-1]]
+    last = np.r_[rows[1:] != rows[:-1], True]
+    gap = np.where(last, 0, np.r_[cols[1:] - cols[:-1] - 1, 0])
+    drop = ~last & (gap >= drop_after)
+    pickup = np.r_[False, drop[:-1]]
+
+    prefix = np.where(first, 'S', np.where(pickup, 'P', ''))
+    suffix = np.where(last, 'F', np.where(drop, 'D', ''))
+    codes[rows, cols] = np.char.add(np.char.add(prefix, 'W'), suffix)
+
+    def fill_gaps(which):
+        # +1 after the work day, -1 at the next one, cumulative sum marks the gap
+        delta = np.zeros(n_cast * n_days + 1, dtype=np.int32)
+        starts = rows[which] * n_days + cols[which] + 1
+        np.add.at(delta, starts, 1)
+        np.add.at(delta, starts + gap[which], -1)
+        return np.cumsum(delta[:-1]).reshape(work.shape) > 0
+
+    hold = fill_gaps(~last & ~drop & (gap > 0))
+    dropped = fill_gaps(drop)
+    codes[hold] = 'H'
+    return codes, hold, dropped
+
+
+def hold_days(work: np.ndarray, drop_after: int = DROP_AFTER_DAYS) -> int:
+    """Total paid hold days of a cast x day work matrix (drops excluded)"""
+    return int(dood_codes(work, drop_after)[1].sum())
+
+
+class Echo:
+    """File-like object handing csv.writer rows straight back"""
+
+    def write(self, value):
+        return value
+
+
+class DayOutOfDays:
+    """
+    Cast x shooting day DOOD of one production
+
+    Built with a fixed number of queries (shooting days, schedule entries,
+    cast names; the scene/cast incidence is cached) regardless of cast size
+    or schedule length. Rows stream as CSV or JSON.
+    """
+
+    def __init__(self, days: List[Dict], cast: List[Dict], work: np.ndarray, drop_after=DROP_AFTER_DAYS):
+        self.days = days
+        self.cast = cast
+        self.work = work
+        self.drop_after = drop_after
+        self.codes, self.hold, self.dropped = dood_codes(work, drop_after)
+
+    @classmethod
+    def build(cls, production_id, drop_after=DROP_AFTER_DAYS) -> 'DayOutOfDays':
+        days = list(
+            ShootingDay.objects.filter(production_id=production_id)
+            .exclude(status__in=EXCLUDED_DAY_STATUSES)
+            .order_by('shoot_date', 'day_number')
+            .values('id', 'day_number', 'shoot_date')
+        )
+        day_index = {day['id']: i for i, day in enumerate(days)}
+        entries = SceneSchedule.objects.filter(shooting_day_id__in=list(day_index)).values_list(
+            'shooting_day_id', 'scene_id'
+        )
+
+        incidence = get_incidence(production_id)
+        work_days = np.zeros((len(days), len(incidence.cast_keys)), dtype=np.int32)
+        entries = list(entries)
+        if entries:
+            day_ids, scene_ids = zip(*entries)
+            np.add.at(
+                work_days,
+                np.array([day_index[day_id] for day_id in day_ids]),
+                incidence._rows(scene_ids, incidence.cast_matrix).astype(np.int32),
+            )
+        work = (work_days > 0).T
+
+        characters = {}
+        for character_id, name, actor_id, preferred, first, last in Character.objects.filter(
+            production_id=production_id
+        ).values_list('id', 'name', 'actor_id', 'actor__preferred_name', 'actor__first_name', 'actor__last_name'):
+            key = ('actor', actor_id) if actor_id else ('character', character_id)
+            entry = characters.setdefault(key, {
+                'name': (preferred or f'{first} {last}') if actor_id else name,
+                'characters': [],
+            })
+            entry['characters'].append(name)
+
+        cast = []
+        for kind, pk in incidence.cast_keys:
+            info = characters.get((kind, pk), {'name': '', 'characters': []})
+            cast.append({
+                'id': f'{kind}-{pk}',
+                'name': info['name'],
+                'characters': sorted(info['characters']),
+            })
+
+        report = cls(days, cast, work, drop_after)
+        report._order_by_start()
+        return report
+
+    def _order_by_start(self):
+        """Cast ordered by first work day, cast without work days last"""
+        worked = self.work.any(axis=1)
+        first = np.where(worked, self.work.argmax(axis=1), len(self.days))
+        order = np.lexsort((np.arange(len(self.cast)), first))
+        self.cast = [self.cast[i] for i in order]
+        self.work, self.codes = self.work[order], self.codes[order]
+        self.hold, self.dropped = self.hold[order], self.dropped[order]
+
+    @property
+    def total_hold_days(self) -> int:
+        return int(self.hold.sum())
+
+    def summary(self) -> Dict:
+        return {
+            'cast': len(self.cast),
+            'shooting_days': len(self.days),
+            'work_days': int(self.work.sum()),
+            'hold_days': self.total_hold_days,
+            'drop_days': int(self.dropped.sum()),
+            'drop_after_days': self.drop_after,
+        }
+
+    def rows(self) -> Iterator[Dict]:
+        """One dict per cast member with codes per day and totals"""
+        work = self.work.sum(axis=1)
+        holds = self.hold.sum(axis=1)
+        drops = self.dropped.sum(axis=1)
+        starts = np.where(self.work.any(axis=1), self.work.argmax(axis=1), -1)
+        finishes = np.where(self.work.any(axis=1), self.work.shape[1] - 1 - self.work[:, ::-1].argmax(axis=1), -1)
+        codes = self.codes.tolist()
+        for i, member in enumerate(self.cast):
+            yield dict(
+                member,
+                codes=codes[i],
+                start=self.days[starts[i]]['shoot_date'] if starts[i] >= 0 else None,
+                finish=self.days[finishes[i]]['shoot_date'] if finishes[i] >= 0 else None,
+                work_days=int(work[i]),
+                hold_days=int(holds[i]),
+                drop_days=int(drops[i]),
+                total_days=int(work[i] + holds[i]),
+            )
+
+    def iter_csv(self) -> Iterator[str]:
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ['Cast', 'Characters']
+            + [f"{day['day_number']} ({day['shoot_date']})" for day in self.days]
+            + ['Start', 'Finish', 'Work', 'Hold', 'Drop', 'Total']
+        )
+        for row in self.rows():
+            yield writer.writerow(
+                [row['name'], ', '.join(row['characters'])] + row['codes']
+                + [row['start'], row['finish'], row['work_days'], row['hold_days'], row['drop_days'], row['total_days']]
+            )
+
+    def iter_json(self) -> Iterator[str]:
+        def dumps(value):
+            return json.dumps(value, cls=DjangoJSONEncoder)
+
+        yield '{"summary": ' + dumps(self.summary())
+        yield ', "days": ' + dumps([
+            {'day_number': day['day_number'], 'date': day['shoot_date']} for day in self.days
+        ])
+        yield ', "cast": ['
+        for i, row in enumerate(self.rows()):
+            yield (', ' if i else '') + dumps(row)
+        yield ']}'
@@ -0,0 +1,431 @@
+# apps/schedule/heuristic.py
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict
+
+import numpy as np
+
+from .optimizer import MOVE_COST_PER_KM, ProductionScheduleOptimizer
+
+
+class HeuristicScheduleOptimizer(ProductionScheduleOptimizer):
+    """
+    Greedy + simulated annealing scheduling engine
+
+    Same optimize_schedule(start_date, constraints) interface as the MILP
+    optimizer, meant for interactive "what if" edits. Days are first packed
+    by location (_pack_days), then scenes are moved and swapped between days
+    to reduce location changes and actor days. Results are deterministic
+    for a given seed and comparable through objective_value.
+
+    Extra constraints:
+    - seed: random seed (default 0)
+    - iterations: annealing moves (default 80 per scene, max 20000)
+    - actor_day_cost: cost of one actor day on the schedule (default 200)
+    - move_cost_per_km: company move cost per km driven (default MOVE_COST_PER_KM)
+    - hold_day_cost: cost of one hold day between two work days of an actor
+      (default 0; drops are not modelled in the search, see evaluate_schedule)
+    - time_limit: wall-clock budget in seconds, the best assignment found so
+      far is returned when it runs out
+    """
+
+    def _solve(self, start_date: datetime, constraints: Dict) -> List[Dict]:
+        started = time.perf_counter()
+        max_pages_per_day = float(constraints.get('max_pages_per_day', 8))
+
+        days = self._pack_days(max_pages_per_day)
+        if not days:
+            self.model_stats = {'engine': 'heuristic', 'iterations': 0}
+            return []
+
+        search = _AnnealingSearch(
+            self, days, max_pages_per_day,
+            location_change_penalty=constraints.get('location_change_penalty', 1000),
+            actor_day_cost=constraints.get('actor_day_cost', 200),
+            seed=constraints.get('seed', 0),
+            move_cost_per_km=constraints.get('move_cost_per_km', MOVE_COST_PER_KM),
+            hold_day_cost=constraints.get('hold_day_cost', 0),
+        )
+        iterations = constraints.get('iterations') or min(20000, 80 * len(self.scenes))
+        initial_cost = search.cost
+        time_limit = constraints.get('time_limit')
+        search.run(
+            iterations,
+            deadline=time.monotonic() + time_limit if time_limit else None,
+            checkpoint=lambda done: self._report_progress(
+                phase='annealing', iteration=done, iterations=iterations, objective=search.best_cost
+            ),
+        )
+
+        day_scenes = self._order_days(search.best_days())
+
+        self.model_stats = {
+            'engine': 'heuristic',
+            'iterations': iterations,
+            'completed_iterations': search.iterations_done,
+            'accepted_moves': search.accepted,
+            'initial_cost': initial_cost,
+            'search_cost': search.best_cost,
+            'solve_seconds': time.perf_counter() - started,
+        }
+        # Day indices stay as searched: blocked days are absolute work days
+        return self._build_schedule(
+            {day: scenes for day, scenes in enumerate(day_scenes) if scenes}, start_date
+        )
+
+    def _order_days(self, days: List[List]) -> List[List]:
+        """
+        Order each day's locations by the shortest drive
+
+        The route starts at yesterday's last location when the day shoots
+        there; without coordinates locations keep the old rule (yesterday's
+        first, tomorrow's last).
+        """
+        ordered = []
+        previous_location = None
+        for index, scenes in enumerate(days):
+            groups = defaultdict(list)
+            for scene in sorted(scenes, key=lambda s: s.scene_number):
+                groups[scene.location_id].append(scene)
+
+            next_locations = set()
+            if index + 1 < len(days):
+                next_locations = {scene.location_id for scene in days[index + 1]}
+
+            locations = sorted(groups, key=lambda loc: (
+                loc != previous_location,       # yesterday's last location first
+                loc in next_locations,          # tomorrow's location last
+                str(loc),
+            ))
+            if len(locations) > 2:
+                locations, _ = self.distances.route(locations, start=previous_location)
+            day = [scene for loc in locations for scene in groups[loc]]
+            ordered.append(day)
+            if day:
+                previous_location = day[-1].location_id
+        return ordered
+
+
+class _AnnealingSearch:
+    """Incremental cost model over scene -> day assignments"""
+
+    def __init__(self, optimizer, days, max_pages_per_day,
+                 location_change_penalty, actor_day_cost, seed, move_cost_per_km=MOVE_COST_PER_KM,
+                 hold_day_cost=0):
+        self.rng = random.Random(seed)
+        self.max_pages = max_pages_per_day
+        self.location_change_penalty = location_change_penalty
+        self.move_cost_per_km = move_cost_per_km
+        self.hold_day_cost = hold_day_cost
+        self.actor_day_cost = actor_day_cost
+        self.violation_penalty = 10 * location_change_penalty
+
+        self.scenes = [scene for day in days for scene in day]
+        self.day_count = len(days)
+
+        location_index = {}
+        cast_index = {}
+        self.pages = []
+        self.location = []
+        self.cast = []
+        for scene in self.scenes:
+            self.pages.append(float(scene.estimated_pages or 0))
+            self.location.append(location_index.setdefault(scene.location_id, len(location_index)))
+            self.cast.append([
+                cast_index.setdefault(key, len(cast_index))
+                for key in optimizer._scene_cast(scene)
+            ])
+
+        scene_blocked = optimizer._scene_blocked_days()
+        self.blocked = [scene_blocked.get(scene.id, set()) for scene in self.scenes]
+
+        self.scenes_by_location = defaultdict(list)
+        for i, loc in enumerate(self.location):
+            self.scenes_by_location[loc].append(i)
+
+        # km between location indices (unknown = 0), route lengths memoized per location set
+        self.location_ids = list(location_index)
+        self.distances = optimizer.distances
+        self.km = np.nan_to_num(self.distances.submatrix(self.location_ids)).tolist()  # Lists: scalar lookups
+        self._route_km = {}
+
+        # Day state
+        self.day_of = []
+        self.day_pages = [0.0] * self.day_count
+        self.day_locations = [defaultdict(int) for _ in range(self.day_count)]
+        self.day_scenes = [set() for _ in range(self.day_count)]
+        self.cast_counts = [[0] * self.day_count for _ in range(len(cast_index))]
+        self.cast_first = [-1] * len(cast_index)
+        self.cast_last = [-1] * len(cast_index)
+        self.cast_work = [0] * len(cast_index)  # Days with at least one scene of the cast member
+
+        for day, scenes in enumerate(days):
+            for scene in scenes:
+                self.day_of.append(day)
+        for i, day in enumerate(self.day_of):
+            self._add(i, day)
+
+        self.cost = self._total_cost()
+        self.best_cost = self.cost
+        self.best_day_of = list(self.day_of)
+        self.accepted = 0
+        self.iterations_done = 0
+
+    # -- state updates -------------------------------------------------
+
+    def _add(self, i, day):
+        self.day_of[i] = day
+        self.day_pages[day] += self.pages[i]
+        self.day_locations[day][self.location[i]] += 1
+        self.day_scenes[day].add(i)
+        for c in self.cast[i]:
+            counts = self.cast_counts[c]
+            counts[day] += 1
+            if counts[day] == 1:
+                self.cast_work[c] += 1
+            if self.cast_first[c] == -1 or day < self.cast_first[c]:
+                self.cast_first[c] = day
+            if day > self.cast_last[c]:
+                self.cast_last[c] = day
+
+    def _remove(self, i):
+        day = self.day_of[i]
+        self.day_pages[day] -= self.pages[i]
+        locations = self.day_locations[day]
+        locations[self.location[i]] -= 1
+        if not locations[self.location[i]]:
+            del locations[self.location[i]]
+        self.day_scenes[day].discard(i)
+        for c in self.cast[i]:
+            counts = self.cast_counts[c]
+            counts[day] -= 1
+            if counts[day]:
+                continue
+            self.cast_work[c] -= 1
+            if self.cast_first[c] == day:
+                self.cast_first[c] = next(
+                    (d for d in range(day + 1, self.day_count) if counts[d]), -1
+                )
+            if self.cast_last[c] == day:
+                self.cast_last[c] = next(
+                    (d for d in range(day - 1, -1, -1) if counts[d]), -1
+                )
+
+    def _move(self, i, day):
+        self._remove(i)
+        self._add(i, day)
+
+    def _swap_days(self, a, b, casts):
+        """Exchange the whole content of days a and b in place (casts: everyone on either day)"""
+        for i in self.day_scenes[a]:
+            self.day_of[i] = b
+        for i in self.day_scenes[b]:
+            self.day_of[i] = a
+        for state in (self.day_pages, self.day_locations, self.day_scenes):
+            state[a], state[b] = state[b], state[a]
+        for c in casts:
+            counts = self.cast_counts[c]
+            if counts[a] == counts[b]:
+                continue
+            counts[a], counts[b] = counts[b], counts[a]
+            if counts[a] and counts[b]:
+                continue  # Works both days, span unchanged
+            # One worked day moved: rescan only past an emptied first/last day
+            moved_to = a if counts[a] else b
+            first, last = self.cast_first[c], self.cast_last[c]
+            if not counts[first]:
+                first = next((d for d in range(first + 1, last + 1) if counts[d]), moved_to)
+            if not counts[last]:
+                last = next((d for d in range(last - 1, first - 1, -1) if counts[d]), moved_to)
+            self.cast_first[c] = min(first, moved_to)
+            self.cast_last[c] = max(last, moved_to)
+
+    # -- cost ----------------------------------------------------------
+
+    def _intra(self, day):
+        """(location changes, shortest drive in km) within the day"""
+        locations = self.day_locations[day]
+        if len(locations) < 2:
+            return 0, 0.0
+        key = frozenset(locations)
+        if key not in self._route_km:
+            ids = [self.location_ids[loc] for loc in key]
+            a, b, *_ = key
+            self._route_km[key] = self.distances.route(ids)[1] if len(ids) > 2 else self.km[a][b]
+        return len(locations) - 1, self._route_km[key]
+
+    def _inter(self, day):
+        """
+        (1, closest hop in km) when day and the day before are both shot and
+        share no location, else (0, 0)
+        """
+        today = self.day_locations[day]
+        yesterday = self.day_locations[day - 1]
+        if not today or not yesterday or any(loc in yesterday for loc in today):
+            return 0, 0.0
+        return 1, min(self.km[a][b] for a in yesterday for b in today)
+
+    def _span(self, c):
+        if self.cast_first[c] == -1:
+            return 0
+        return self.cast_last[c] - self.cast_first[c] + 1
+
+    def _local_cost(self, days, casts, scenes):
+        moves, km = 0, 0.0
+        for d in days:
+            day_moves, day_km = self._intra(d)
+            moves += day_moves
+            km += day_km
+        for d in {d + k for d in days for k in (0, 1)}:
+            if 0 < d < self.day_count:
+                day_moves, day_km = self._inter(d)
+                moves += day_moves
+                km += day_km
+        cast_cost = 0
+        for c in casts:
+            span = self._span(c)
+            cast_cost += self.actor_day_cost * span + self.hold_day_cost * (span - self.cast_work[c])
+        return (
+            self.location_change_penalty * moves
+            + self.move_cost_per_km * km
+            + cast_cost
+            + self.violation_penalty * sum(1 for i in scenes if self.day_of[i] in self.blocked[i])
+        )
+
+    def _total_cost(self):
+        return self._local_cost(
+            range(self.day_count), range(len(self.cast_first)), range(len(self.scenes))
+        )
+
+    def _fits(self, day, pages_in, pages_out=0.0):
+        load = self.day_pages[day] - pages_out
+        return load <= 1e-9 or load + pages_in <= self.max_pages + 1e-9
+
+    # -- search --------------------------------------------------------
+
+    CHECKPOINT_EVERY = 500
+
+    def run(self, iterations, deadline=None, checkpoint=None):
+        """
+        Anneal for `iterations` moves
+
+        Every CHECKPOINT_EVERY moves the deadline (time.monotonic) is
+        checked and checkpoint(iterations done) is called.
+        """
+        if len(self.scenes) < 2 or self.day_count < 2:
+            return
+
+        temperature = 0.3 * self.location_change_penalty
+        final_temperature = 1.0
+        cooling = (final_temperature / temperature) ** (1.0 / iterations)
+
+        for n in range(iterations):
+            if n and n % self.CHECKPOINT_EVERY == 0:
+                if checkpoint is not None:
+                    checkpoint(n)
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+            self.iterations_done = n + 1
+            roll = self.rng.random()
+            if roll < 0.55:
+                self._try_relocate(temperature)
+            elif roll < 0.9:
+                self._try_swap(temperature)
+            else:
+                self._try_day_swap(temperature)
+            temperature *= cooling
+
+    def _accept(self, delta, temperature):
+        if delta <= 0:
+            return True
+        return self.rng.random() < math.exp(-delta / temperature)
+
+    def _pick_target_day(self, i):
+        # Mostly towards a day already shooting the same location
+        if self.rng.random() < 0.7:
+            same_location = self.scenes_by_location[self.location[i]]
+            return self.day_of[self.rng.choice(same_location)]
+        return self.rng.randrange(self.day_count)
+
+    def _try_relocate(self, temperature):
+        i = self.rng.randrange(len(self.scenes))
+        source = self.day_of[i]
+        target = self._pick_target_day(i)
+        if target == source or not self._fits(target, self.pages[i]):
+            return
+
+        days = (source, target)
+        casts = self.cast[i]
+        before = self._local_cost(days, casts, (i,))
+        self._move(i, target)
+        delta = self._local_cost(days, casts, (i,)) - before
+
+        if self._accept(delta, temperature):
+            self._commit(delta)
+        else:
+            self._move(i, source)
+
+    def _try_swap(self, temperature):
+        i = self.rng.randrange(len(self.scenes))
+        target = self._pick_target_day(i)
+        source = self.day_of[i]
+        if target == source or not self.day_scenes[target]:
+            return
+        j = self.rng.choice(tuple(self.day_scenes[target]))
+        if not (self._fits(target, self.pages[i], self.pages[j])
+                and self._fits(source, self.pages[j], self.pages[i])):
+            return
+
+        days = (source, target)
+        casts = set(self.cast[i]) | set(self.cast[j])
+        before = self._local_cost(days, casts, (i, j))
+        self._move(i, target)
+        self._move(j, source)
+        delta = self._local_cost(days, casts, (i, j)) - before
+
+        if self._accept(delta, temperature):
+            self._commit(delta)
+        else:
+            self._move(i, source)
+            self._move(j, target)
+
+    def _try_day_swap(self, temperature):
+        """Exchange the whole content of two days (reorders the shoot)"""
+        a = self.rng.randrange(self.day_count)
+        b = self.rng.randrange(self.day_count)
+        if a == b:
+            return
+        scenes_a = tuple(self.day_scenes[a])
+        scenes_b = tuple(self.day_scenes[b])
+        scenes = scenes_a + scenes_b
+
+        days = (a, b)
+        casts = {c for i in scenes for c in self.cast[i]}
+        # Only cast members working exactly one of the two days change their span
+        counts = self.cast_counts
+        spans = [c for c in casts if bool(counts[c][a]) != bool(counts[c][b])]
+        before = self._local_cost(days, spans, scenes)
+        self._swap_days(a, b, casts)
+        delta = self._local_cost(days, spans, scenes) - before
+
+        if self._accept(delta, temperature):
+            self._commit(delta)
+        else:
+            self._swap_days(a, b, casts)
+
+    def _commit(self, delta):
+        self.accepted += 1
+        self.cost += delta
+        if self.cost < self.best_cost - 1e-9:
+            self.best_cost = self.cost
+            self.best_day_of = list(self.day_of)
+
+    def best_days(self) -> List[List]:
+        """Best assignment found, one list per day index (empty days included)"""
+        days = [[] for _ in range(self.day_count)]
+        for i, day in enumerate(self.best_day_of):
+            days[day].append(self.scenes[i])
+        return days
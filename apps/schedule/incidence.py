@@ -0,0 +1,129 @@
+# apps/schedule/incidence.py
+import numpy as np
+from typing import Dict, List, Iterable
+
+from django.core.cache import cache
+
+from apps.production.models import Scene
+
+CACHE_TIMEOUT = 60 * 60
+
+
+class SceneCharacterIncidence:
+    """
+    Scene x character boolean matrix of one production
+
+    Built from a single query and cached (see get_incidence). Replaces
+    per-scene `scene.characters.all()` lookups in the optimizer and the
+    ordering heuristics; shared-cast counts are matrix products.
+    """
+
+    def __init__(self, scene_ids: List, character_ids: List, matrix: np.ndarray,
+                 actor_by_character: Dict):
+        self.scene_ids = scene_ids
+        self.character_ids = character_ids
+        self.matrix = matrix
+        self.actor_by_character = actor_by_character
+        self.scene_index = {scene_id: i for i, scene_id in enumerate(scene_ids)}
+        self.character_index = {character_id: j for j, character_id in enumerate(character_ids)}
+
+        # Scene x cast matrix: characters played by the same actor share a column
+        self.cast_keys = list(dict.fromkeys(
+            ('actor', actor_by_character[c]) if actor_by_character[c] else ('character', c)
+            for c in character_ids
+        ))
+        cast_index = {key: k for k, key in enumerate(self.cast_keys)}
+        self.cast_matrix = np.zeros((len(scene_ids), len(self.cast_keys)), dtype=bool)
+        for j, character_id in enumerate(character_ids):
+            actor_id = actor_by_character[character_id]
+            key = ('actor', actor_id) if actor_id else ('character', character_id)
+            self.cast_matrix[:, cast_index[key]] |= matrix[:, j]
+
+    @classmethod
+    def build(cls, production_id) -> 'SceneCharacterIncidence':
+        rows = list(
+            Scene.objects.filter(production_id=production_id)
+            .order_by('id')
+            .values_list('id', 'characters__id', 'characters__actor_id')
+        )
+
+        scene_ids = list(dict.fromkeys(scene_id for scene_id, _, _ in rows))
+        actor_by_character = {
+            character_id: actor_id
+            for _, character_id, actor_id in rows if character_id is not None
+        }
+        character_ids = sorted(actor_by_character)
+
+        scene_index = {scene_id: i for i, scene_id in enumerate(scene_ids)}
+        character_index = {character_id: j for j, character_id in enumerate(character_ids)}
+        matrix = np.zeros((len(scene_ids), len(character_ids)), dtype=bool)
+        for scene_id, character_id, _ in rows:
+            if character_id is not None:
+                matrix[scene_index[scene_id], character_index[character_id]] = True
+
+        return cls(scene_ids, character_ids, matrix, actor_by_character)
+
+    def _rows(self, scene_ids: Iterable, matrix: np.ndarray = None) -> np.ndarray:
+        matrix = self.matrix if matrix is None else matrix
+        index = np.array([self.scene_index.get(scene_id, -1) for scene_id in scene_ids], dtype=int)
+        rows = np.zeros((len(index), matrix.shape[1]), dtype=bool)
+        # Scenes created after the build have no characters yet
+        known = index >= 0
+        rows[known] = matrix[index[known]]
+        return rows
+
+    def scene_characters(self, scene_id) -> List:
+        i = self.scene_index.get(scene_id)
+        if i is None:
+            return []
+        return [self.character_ids[j] for j in np.flatnonzero(self.matrix[i])]
+
+    def scene_cast(self, scene_id) -> List:
+        """Cast keys of a scene: the actor when cast, otherwise the character"""
+        i = self.scene_index.get(scene_id)
+        if i is None:
+            return []
+        return [self.cast_keys[k] for k in np.flatnonzero(self.cast_matrix[i])]
+
+    def actor_mask(self, actor_id) -> np.ndarray:
+        """Boolean mask over scene_ids of scenes the actor plays in"""
+        try:
+            return self.cast_matrix[:, self.cast_keys.index(('actor', actor_id))].copy()
+        except ValueError:
+            return np.zeros(len(self.scene_ids), dtype=bool)
+
+    def scenes_with_actor(self, actor_id) -> List:
+        return [self.scene_ids[i] for i in np.flatnonzero(self.actor_mask(actor_id))]
+
+    def shared_counts(self, scene_ids: Iterable = None) -> np.ndarray:
+        """Pairwise number of shared characters (scenes x scenes)"""
+        rows = self.matrix if scene_ids is None else self._rows(list(scene_ids))
+        rows = rows.astype(np.int32)
+        return rows @ rows.T
+
+    def shared_with(self, scene_id, scene_ids: Iterable) -> np.ndarray:
+        """Number of characters each of scene_ids shares with scene_id"""
+        reference = self._rows([scene_id]).astype(np.int32)[0]
+        return self._rows(list(scene_ids)).astype(np.int32) @ reference
+
+    def shared_cast_with(self, scene_id, scene_ids: Iterable) -> np.ndarray:
+        """Number of cast members (actors) each of scene_ids shares with scene_id"""
+        reference = self._rows([scene_id], self.cast_matrix).astype(np.int32)[0]
+        return self._rows(list(scene_ids), self.cast_matrix).astype(np.int32) @ reference
+
+
+def _cache_key(production_id):
+    return f'scene_incidence_{production_id}'
+
+
+def get_incidence(production_id) -> SceneCharacterIncidence:
+    """Cached incidence for a production, built with one query on miss"""
+    incidence = cache.get(_cache_key(production_id))
+    if incidence is None:
+        incidence = SceneCharacterIncidence.build(production_id)
+        cache.set(_cache_key(production_id), incidence, CACHE_TIMEOUT)
+    return incidence
+
+
+def invalidate_incidence(production_id):
+    cache.delete(_cache_key(production_id))
@@ -0,0 +1,380 @@
+# apps/schedule/jobs.py
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time as clock, timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.production.solar import fill_solar_times
+from apps.realtime.services import broadcast
+from .heuristic import HeuristicScheduleOptimizer
+from .models import OptimizationJob, SceneSchedule, ShootingDay
+from .optimizer import OptimizationCancelled, ProductionScheduleOptimizer
+from .services import deferred_day_totals, invalidate_progress, touch_days
+from .workers import init_worker
+
+logger = logging.getLogger(__name__)
+
+# OptimizationJob.engine -> (optimizer class, fixed constraints)
+ENGINES = {
+    'compact': (ProductionScheduleOptimizer, {'mode': 'compact'}),
+    'full': (ProductionScheduleOptimizer, {}),
+    'heuristic': (HeuristicScheduleOptimizer, {}),
+}
+
+CANCEL_POLL_SECONDS = 2
+PROGRESS_PUSH_SECONDS = 1
+# CBC windows get at least a second each; past budget * factor the job is abandoned
+HARD_BUDGET_FACTOR = 1.2
+# Stale jobs (lost with their web process, see stale_jobs)
+STALE_GRACE_SECONDS = 60
+STALE_QUEUED_SECONDS = 6 * 60 * 60
+
+# Scenes already being shot are never moved by an applied result
+REPLACEABLE_STATUSES = ('scheduled', 'postponed')
+DEFAULT_GENERAL_CALL = clock(6, 0)
+DEFAULT_SHOOTING_CALL = clock(7, 0)
+
+_executor = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Worker pool shared by the web process
+
+    spawn start method: workers never inherit forked DB connections or
+    channel layer state of the web worker. Each web process has its own
+    pool and its jobs die with it, run `manage.py fail_stale_jobs`
+    periodically (and with --all on a full restart).
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.OPTIMIZER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+        )
+    return _executor
+
+
+def submit_job(job: OptimizationJob):
+    """Hand the job to the worker pool once the creating transaction commits"""
+    job_id = str(job.pk)
+    transaction.on_commit(lambda: get_executor().submit(run_job, job_id))
+
+
+def cancel_job(job: OptimizationJob) -> bool:
+    """Request cancellation; queued jobs are cancelled right away, running ones at the next checkpoint"""
+    requested = OptimizationJob.objects.filter(
+        pk=job.pk, status__in=('queued', 'running')
+    ).update(cancel_requested=True)
+    if OptimizationJob.objects.filter(pk=job.pk, status='queued').update(
+        status='cancelled', finished_at=timezone.now()
+    ):
+        _push(job.production_id, job.pk, 'cancelled', job.progress)
+    return bool(requested)
+
+
+def run_job(job_id):
+    """Worker process entry point"""
+    close_old_connections()
+    try:
+        execute_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def execute_job(job_id):
+    """Solve the job, storing progress and the result on the OptimizationJob row"""
+    claimed = OptimizationJob.objects.filter(
+        pk=job_id, status='queued', cancel_requested=False
+    ).update(status='running', started_at=timezone.now())
+    if not claimed:
+        return  # Cancelled (or picked up) before it started
+
+    job = OptimizationJob.objects.select_related('production').get(pk=job_id)
+    if job.engine == 'scenarios':
+        return _execute_scenarios(job)
+
+    optimizer_class, fixed_constraints = ENGINES[job.engine]
+    constraints = dict(job.constraints, **fixed_constraints, time_limit=job.time_budget)
+
+    reporter = _ProgressReporter(job)
+    _push(job.production_id, job.pk, 'running', {})
+    try:
+        optimizer = optimizer_class(job.production)
+        optimizer.progress_callback = reporter
+        schedule = optimizer.optimize_schedule(job.start_date, constraints)
+    except OptimizationCancelled as exc:
+        reporter.flush()
+        _finish(job, 'cancelled' if reporter.cancelled else 'failed', error=str(exc))
+        return
+    except Exception as exc:
+        logger.exception("Optimization job %s failed", job.pk)
+        reporter.flush()
+        _finish(job, 'failed', error=str(exc))
+        return
+
+    reporter.flush()
+    _finish(
+        job, 'completed',
+        result=serialize_schedule(schedule),
+        evaluation=optimizer.evaluation,
+        model_stats=optimizer.model_stats,
+    )
+
+
+def _execute_scenarios(job):
+    """
+    Scenario exploration job: constraints = {'scenarios': [...], 'workers': n}
+
+    time_budget applies to each scenario; the hard budget covers the
+    waves of scenarios the workers run one after another. Cancellation
+    is checked whenever a scenario finishes.
+    """
+    from .scenarios import ScenarioExplorer  # scenarios imports this module
+
+    scenarios = job.constraints['scenarios']
+    workers = max(1, min(job.constraints.get('workers') or 1, len(scenarios)))
+    reporter = _ProgressReporter(job)
+    _push(job.production_id, job.pk, 'running', {})
+    try:
+        exploration = ScenarioExplorer(job.production).run(
+            scenarios, job.start_date, time_budget=job.time_budget, workers=workers,
+            progress_callback=reporter,
+        )
+    except OptimizationCancelled as exc:
+        reporter.flush()
+        _finish(job, 'cancelled' if reporter.cancelled else 'failed', error=str(exc))
+        return
+    except Exception as exc:
+        logger.exception("Scenario exploration job %s failed", job.pk)
+        reporter.flush()
+        _finish(job, 'failed', error=str(exc))
+        return
+
+    reporter.flush()
+    best = min(exploration['scenarios'], key=lambda result: result['objective'])
+    _finish(
+        job, 'completed',
+        result=exploration,
+        evaluation={'objective': best['objective'], 'best': best['name'], 'pareto': exploration['pareto']},
+    )
+
+
+def job_budget(job: OptimizationJob) -> int:
+    """Seconds a job may run; scenario jobs run their scenarios in waves of `workers`"""
+    if job.engine != 'scenarios':
+        return job.time_budget
+    scenarios = job.constraints['scenarios']
+    workers = max(1, min(job.constraints.get('workers') or 1, len(scenarios)))
+    return job.time_budget * math.ceil(len(scenarios) / workers)
+
+
+def stale_jobs(queued_seconds=STALE_QUEUED_SECONDS, now=None) -> List[OptimizationJob]:
+    """
+    Queued or running jobs whose worker pool is gone
+
+    Every web process has its own pool, a restart or crash of the process
+    loses its jobs without touching their rows. A running job stops
+    itself at job_budget * HARD_BUDGET_FACTOR, so one still running
+    STALE_GRACE_SECONDS later has no worker; a queued job is stale once it
+    waited queued_seconds.
+    """
+    now = now or timezone.now()
+    stale = list(OptimizationJob.objects.filter(
+        status='queued', created_at__lt=now - timedelta(seconds=queued_seconds)
+    ))
+    for job in OptimizationJob.objects.filter(status='running'):
+        limit = job_budget(job) * HARD_BUDGET_FACTOR + STALE_GRACE_SECONDS
+        if job.started_at < now - timedelta(seconds=limit):
+            stale.append(job)
+    return stale
+
+
+def fail_jobs(jobs: List[OptimizationJob], error: str) -> int:
+    """Mark queued/running jobs failed (see stale_jobs), returns how many changed"""
+    failed = 0
+    for job in jobs:
+        if OptimizationJob.objects.filter(pk=job.pk, status__in=('queued', 'running')).update(
+            status='failed', finished_at=timezone.now(), error=error
+        ):
+            _push(job.production_id, job.pk, 'failed', {'error': error})
+            failed += 1
+    return failed
+
+
+def _finish(job, status, **fields):
+    OptimizationJob.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), **fields)
+    if status == 'completed':
+        _push(job.production_id, job.pk, status, {'objective': fields['evaluation']['objective']})
+    else:
+        _push(job.production_id, job.pk, status, {'error': fields.get('error', '')})
+
+
+def _push(production_id, job_id, status, progress):
+    broadcast(production_id, 'optimization_progress', {
+        'job': str(job_id),
+        'status': status,
+        'progress': progress,
+    })
+
+
+class _ProgressReporter:
+    """
+    progress_callback of a job's optimizer
+
+    Keeps the latest incumbent, persists and pushes it at most once per
+    PROGRESS_PUSH_SECONDS, polls cancel_requested and enforces the hard
+    wall-clock budget by raising OptimizationCancelled.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.time_budget = job_budget(job)
+        self.started = time.monotonic()
+        self.deadline = self.started + self.time_budget * HARD_BUDGET_FACTOR
+        self.last_poll = self.started
+        self.last_push = None
+        self.pending = None
+        self.cancelled = False
+
+    def __call__(self, progress: Dict):
+        now = time.monotonic()
+        if now - self.last_poll >= CANCEL_POLL_SECONDS:
+            self.last_poll = now
+            if OptimizationJob.objects.filter(pk=self.job.pk, cancel_requested=True).exists():
+                self.cancelled = True
+                raise OptimizationCancelled('Cancelled by user')
+        if now > self.deadline:
+            raise OptimizationCancelled(f'Time budget of {self.time_budget} s exceeded')
+
+        self.pending = dict(progress, elapsed=round(now - self.started, 2))
+        if self.last_push is None or now - self.last_push >= PROGRESS_PUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.pending is None:
+            return
+        self.last_push = time.monotonic()
+        OptimizationJob.objects.filter(pk=self.job.pk).update(progress=self.pending)
+        _push(self.job.production_id, self.job.pk, 'running', self.pending)
+        self.pending = None
+
+
+def serialize_schedule(schedule: List[Dict]) -> List[Dict]:
+    """JSON form of optimizer output; scene starts follow each other from the day's first start"""
+    days = []
+    for day in schedule:
+        scenes = []
+        start = None
+        for entry in day['scenes']:
+            if start is None:
+                start = datetime.combine(day['date'], datetime.strptime(entry['estimated_start'], '%H:%M').time())
+            minutes = float(entry['estimated_duration'] or 0)
+            scenes.append({
+                'scene': entry['scene'].id,
+                'scene_number': entry['scene'].scene_number,
+                'estimated_start': start.time().strftime('%H:%M'),
+                'estimated_minutes': minutes,
+            })
+            start += timedelta(minutes=minutes)
+        days.append({
+            'date': day['date'].isoformat(),
+            'primary_location': day['primary_location'].id if day['primary_location'] else None,
+            'total_pages': float(day['total_pages'] or 0),
+            'scenes': scenes,
+        })
+    return days
+
+
+@transaction.atomic
+def apply_job(job: OptimizationJob) -> Dict:
+    """
+    Write a completed job's schedule as ShootingDay/SceneSchedule rows
+
+    Shooting days are reused by date or created; unstarted schedule entries
+    of the scheduled scenes are replaced, scenes already set up, shooting
+    or completed keep their entry. On a reused day the new entries follow
+    the entries that stay, in order and time. Scene schedules are written with one
+    bulk_create and day totals refreshed once. Missing sunrise/sunset of
+    the days are filled from their primary location.
+    """
+    production = job.production
+    result = job.result or []
+    dates = [datetime.strptime(day['date'], '%Y-%m-%d').date() for day in result]
+
+    days = {
+        day.shoot_date: day
+        for day in ShootingDay.objects.filter(production=production, shoot_date__in=dates)
+    }
+    next_number = (ShootingDay.objects.filter(production=production).aggregate(
+        last=Max('day_number')
+    )['last'] or 0) + 1
+    new_days = []
+    for day_date, day in zip(dates, result):
+        if day_date not in days:
+            days[day_date] = ShootingDay(
+                production=production, shoot_date=day_date, day_number=next_number,
+                general_call=DEFAULT_GENERAL_CALL, shooting_call=DEFAULT_SHOOTING_CALL,
+                primary_location_id=day['primary_location'],
+            )
+            new_days.append(days[day_date])
+            next_number += 1
+    ShootingDay.objects.bulk_create(new_days)
+
+    scene_ids = [entry['scene'] for day in result for entry in day['scenes']]
+    entries = SceneSchedule.objects.filter(scene__production=production, scene_id__in=scene_ids)
+    locked = set(entries.exclude(status__in=REPLACEABLE_STATUSES).values_list('scene_id', flat=True))
+
+    with deferred_day_totals():
+        replaced = entries.filter(status__in=REPLACEABLE_STATUSES).delete()[1].get(SceneSchedule._meta.label, 0)
+
+        # Entries staying on reused days (started scenes, scenes outside the result) keep
+        # their place; new entries are ordered and timed after them
+        kept = {}
+        for day_id, day_date, order, start, duration in SceneSchedule.objects.filter(
+            shooting_day__in=[day.pk for day in days.values() if day not in new_days]
+        ).values_list('shooting_day_id', 'shooting_day__shoot_date', 'day_order',
+                      'estimated_start', 'estimated_duration'):
+            end = datetime.combine(day_date, start) + duration
+            last_order, busy_until = kept.get(day_id, (order, end))
+            kept[day_id] = (max(last_order, order), max(busy_until, end))
+
+        new_entries = []
+        for day_date, day in zip(dates, result):
+            shooting_day = days[day_date]
+            last_order, busy_until = kept.get(shooting_day.pk, (-1, None))
+            for entry in day['scenes']:
+                if entry['scene'] in locked:
+                    continue
+                last_order += 1
+                start = datetime.combine(day_date, datetime.strptime(entry['estimated_start'], '%H:%M').time())
+                duration = timedelta(minutes=entry['estimated_minutes'])
+                if busy_until is not None:
+                    start = max(start, busy_until)
+                    busy_until = start + duration
+                new_entries.append(SceneSchedule(
+                    shooting_day=shooting_day, scene_id=entry['scene'], day_order=last_order,
+                    estimated_start=start.time(), estimated_duration=duration,
+                ))
+        created = SceneSchedule.objects.bulk_create(new_entries)
+        touch_days(day.pk for day in days.values())
+
+    invalidate_progress(production_id=production.pk)
+    if dates:
+        fill_solar_times(production, min(dates), max(dates))
+    OptimizationJob.objects.filter(pk=job.pk).update(applied_at=timezone.now())
+    return {
+        'days_created': len(new_days),
+        'scenes_scheduled': len(created),
+        'entries_replaced': replaced,
+        'scenes_locked': len(locked),
+    }
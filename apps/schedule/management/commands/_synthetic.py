@@ -0,0 +1,58 @@
+# apps/schedule/management/commands/_synthetic.py
+"""Synthetic production data for the schedule benchmarks"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from apps.production.models import Production, Location, Scene
+from apps.crew.models import Character
+
+
+def create_synthetic_production(scene_count, location_count, character_count=0, seed=42):
+    """Create a production with random scenes spread over locations"""
+    rng = random.Random(seed)
+    
+    production = Production.objects.create(
+        title=f'Benchmark {scene_count}x{location_count}',
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=120),
+    )
+    
+    locations = Location.objects.bulk_create([
+        Location(
+            production=production,
+            name=f'Location {i + 1}',
+            address='Benchmark',
+            latitude=Decimal(str(round(50.0 + rng.uniform(-0.5, 0.5), 6))),
+            longitude=Decimal(str(round(14.4 + rng.uniform(-0.5, 0.5), 6))),
+        )
+        for i in range(location_count)
+    ])
+    
+    scenes = Scene.objects.bulk_create([
+        Scene(
+            production=production,
+            scene_number=str(i + 1),
+            int_ext=rng.choice(['INT', 'INT', 'EXT']),
+            location=rng.choice(locations),
+            location_detail='Set',
+            time_of_day=rng.choice(['DAY', 'DAY', 'DAY', 'NIGHT', 'DUSK']),
+            estimated_pages=Decimal(rng.choice(['0.25', '0.50', '1.00', '1.50', '2.00', '3.00'])),
+            description='',
+        )
+        for i in range(scene_count)
+    ])
+    
+    if character_count:
+        characters = Character.objects.bulk_create([
+            Character(production=production, name=f'Character {i + 1}')
+            for i in range(character_count)
+        ])
+        through = Scene.characters.through
+        links = []
+        for scene in scenes:
+            for character in rng.sample(characters, k=min(len(characters), rng.randint(1, 4))):
+                links.append(through(scene_id=scene.id, character_id=character.id))
+        through.objects.bulk_create(links)
+    
+    return production
@@ -0,0 +1,79 @@
+# apps/schedule/management/commands/benchmark_day_list.py
+import time
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+from apps.schedule.models import ShootingDay, SceneSchedule
+from apps.schedule.serializers import ShootingDayListSerializer
+from apps.schedule.services import refresh_day_totals
+from ._synthetic import create_synthetic_production
+
+
+class LegacyShootingDayListSerializer(ShootingDayListSerializer):
+    """Totals computed per row, as before the stored scene_count/page_total"""
+    total_scenes = serializers.SerializerMethodField()
+    total_pages = serializers.SerializerMethodField()
+
+    def get_total_scenes(self, obj):
+        return obj.scene_schedules.count()
+
+    def get_total_pages(self, obj):
+        return sum(ss.scene.estimated_pages or 0 for ss in obj.scene_schedules.all())
+
+
+class Command(BaseCommand):
+    help = 'Compare shooting day list latency with per-row and stored day totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=200)
+        parser.add_argument('--scenes-per-day', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        days = options['days']
+        per_day = options['scenes_per_day']
+
+        # Synthetic data lives only for the duration of the run
+        with transaction.atomic():
+            production = create_synthetic_production(days * per_day, 10)
+            scenes = list(production.scenes.order_by('id'))
+            shooting_days = ShootingDay.objects.bulk_create([
+                ShootingDay(
+                    production=production, shoot_date=production.start_date + timedelta(days=n),
+                    day_number=n + 1, general_call=clock(6), shooting_call=clock(7),
+                ) for n in range(days)
+            ])
+            SceneSchedule.objects.bulk_create([
+                SceneSchedule(
+                    shooting_day=shooting_days[i // per_day], scene=scene, day_order=i % per_day,
+                    estimated_start=clock(7 + i % per_day), estimated_duration=timedelta(hours=1),
+                ) for i, scene in enumerate(scenes)
+            ])
+            refresh_day_totals(day.pk for day in shooting_days)
+
+            base = ShootingDay.objects.filter(production=production).select_related(
+                'production', 'primary_location'
+            ).order_by('shoot_date', 'day_number')
+            cases = [
+                ('per-row, no prefetch', LegacyShootingDayListSerializer, base),
+                ('per-row, prefetch', LegacyShootingDayListSerializer,
+                 base.prefetch_related('scene_schedules__scene', 'breaks', 'status_updates')),
+                ('stored totals', ShootingDayListSerializer, base),
+            ]
+
+            self.stdout.write(f"{days} days x {per_day} scenes")
+            self.stdout.write(f"{'variant':<22} {'queries':>8} {'ms':>9}")
+            for label, serializer_class, queryset in cases:
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        serializer_class(queryset.all(), many=True).data
+                        timings.append(time.perf_counter() - started)
+                self.stdout.write(f"{label:<22} {len(queries):>8} {min(timings) * 1000:>9.1f}")
+
+            transaction.set_rollback(True)
@@ -0,0 +1,92 @@
+# apps/schedule/management/commands/benchmark_dood.py
+import time
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.crew.models import Character
+from apps.schedule.dood import DROP_AFTER_DAYS, DayOutOfDays
+from apps.schedule.models import SceneSchedule, ShootingDay
+from ._synthetic import create_synthetic_production
+
+
+def legacy_dood(production, drop_after=DROP_AFTER_DAYS):
+    """One query per character and a per-day loop, as a report view would do it naively"""
+    days = list(ShootingDay.objects.filter(production=production).order_by('shoot_date', 'day_number'))
+    report = []
+    for character in Character.objects.filter(production=production):
+        worked = set(SceneSchedule.objects.filter(
+            shooting_day__production=production, scene__characters=character
+        ).values_list('shooting_day_id', flat=True))
+        flags = [day.pk in worked for day in days]
+        work_days = [i for i, flag in enumerate(flags) if flag]
+        codes = [''] * len(days)
+        for n, i in enumerate(work_days):
+            gap_before = i - work_days[n - 1] - 1 if n else None
+            gap_after = work_days[n + 1] - i - 1 if n + 1 < len(work_days) else None
+            prefix = 'S' if n == 0 else ('P' if gap_before >= drop_after else '')
+            suffix = 'F' if gap_after is None else ('D' if gap_after >= drop_after else '')
+            codes[i] = prefix + 'W' + suffix
+            if gap_after is not None and gap_after < drop_after:
+                for j in range(i + 1, work_days[n + 1]):
+                    codes[j] = 'H'
+        report.append((character.name, codes))
+    return report
+
+
+class Command(BaseCommand):
+    help = 'Compare DOOD report build time: per-character queries vs matrix engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cast', type=int, default=200)
+        parser.add_argument('--days', type=int, default=120)
+        parser.add_argument('--scenes-per-day', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        days = options['days']
+        per_day = options['scenes_per_day']
+
+        # Synthetic data lives only for the duration of the run
+        with transaction.atomic():
+            production = create_synthetic_production(days * per_day, 10, character_count=options['cast'])
+            scenes = list(production.scenes.order_by('id'))
+            shooting_days = ShootingDay.objects.bulk_create([
+                ShootingDay(
+                    production=production, shoot_date=production.start_date + timedelta(days=n),
+                    day_number=n + 1, general_call=clock(6), shooting_call=clock(7),
+                ) for n in range(days)
+            ])
+            SceneSchedule.objects.bulk_create([
+                SceneSchedule(
+                    shooting_day=shooting_days[i // per_day], scene=scene, day_order=i % per_day,
+                    estimated_start=clock(7 + i % per_day), estimated_duration=timedelta(hours=1),
+                ) for i, scene in enumerate(scenes)
+            ])
+
+            def matrix():
+                report = DayOutOfDays.build(production.id)
+                return sum(len(chunk) for chunk in report.iter_csv())
+
+            cases = [
+                ('per-character queries', lambda: legacy_dood(production)),
+                ('matrix engine + CSV', matrix),
+            ]
+
+            self.stdout.write(f"{options['cast']} cast x {days} days")
+            self.stdout.write(f"{'variant':<24} {'queries':>8} {'ms':>9}")
+            for label, run in cases:
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        run()
+                        timings.append(time.perf_counter() - started)
+                self.stdout.write(f"{label:<24} {len(queries):>8} {min(timings) * 1000:>9.1f}")
+
+            report = DayOutOfDays.build(production.id)
+            self.stdout.write(f"hold days: {report.total_hold_days}, drop days: {report.summary()['drop_days']}")
+
+            transaction.set_rollback(True)
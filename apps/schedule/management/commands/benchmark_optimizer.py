@@ -0,0 +1,60 @@
+# apps/schedule/management/commands/benchmark_optimizer.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.schedule.optimizer import ProductionScheduleOptimizer
+from ._synthetic import create_synthetic_production
+
+
+class Command(BaseCommand):
+    help = 'Benchmark model size and solve time of the compact schedule optimizer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenes', default='30,60,120,150',
+                            help='Comma separated scene counts')
+        parser.add_argument('--locations', default='5,10,15',
+                            help='Comma separated location counts')
+        parser.add_argument('--max-pages', type=float, default=8)
+        parser.add_argument('--window-days', type=int, default=None,
+                            help='Rolling window length (default scales with locations)')
+        parser.add_argument('--time-limit', type=int, default=60,
+                            help='Solver budget per run in seconds')
+        parser.add_argument('--mip-gap', type=float, default=0.05)
+
+    def handle(self, *args, **options):
+        scene_counts = [int(v) for v in options['scenes'].split(',')]
+        location_counts = [int(v) for v in options['locations'].split(',')]
+
+        self.stdout.write(
+            f"{'scenes':>7} {'locs':>5} {'strips':>7} {'windows':>8} {'w.days':>7} {'vars':>8} "
+            f"{'constr':>8} {'days':>5} {'status':>9} {'seconds':>8}"
+        )
+
+        for location_count in location_counts:
+            for scene_count in scene_counts:
+                # Synthetic data lives only for the duration of the run
+                with transaction.atomic():
+                    production = create_synthetic_production(scene_count, location_count)
+                    optimizer = ProductionScheduleOptimizer(production)
+
+                    started = time.perf_counter()
+                    schedule = optimizer.optimize_schedule(date.today(), {
+                        'mode': 'compact',
+                        'max_pages_per_day': options['max_pages'],
+                        'window_days': options['window_days'],
+                        'time_limit': options['time_limit'],
+                        'mip_gap': options['mip_gap'],
+                    })
+                    elapsed = time.perf_counter() - started
+
+                    stats = optimizer.model_stats
+                    self.stdout.write(
+                        f"{scene_count:>7} {location_count:>5} {stats.get('strips', 0):>7} "
+                        f"{stats.get('windows', 0):>8} {stats.get('window_days', ''):>7} {stats.get('variables', 0):>8} "
+                        f"{stats.get('constraints', 0):>8} {len(schedule):>5} "
+                        f"{stats.get('status', ''):>9} {elapsed:>8.2f}"
+                    )
+                    transaction.set_rollback(True)
@@ -0,0 +1,65 @@
+# apps/schedule/management/commands/benchmark_scenarios.py
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.schedule.scenarios import ScenarioExplorer
+from ._synthetic import create_synthetic_production
+
+
+class Command(BaseCommand):
+    help = 'Benchmark parallel scenario exploration against worker count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenes', type=int, default=150)
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--characters', type=int, default=20)
+        parser.add_argument('--scenarios', type=int, default=8)
+        parser.add_argument('--workers', default=None,
+                            help='Comma separated worker counts (default 1,2,4,... up to the CPU count)')
+        parser.add_argument('--iterations', type=int, default=20000,
+                            help='Annealing moves per scenario')
+
+    def handle(self, *args, **options):
+        if options['workers']:
+            worker_counts = [int(v) for v in options['workers'].split(',')]
+        else:
+            cpus = os.cpu_count() or 1
+            worker_counts = sorted({1, cpus} | {2 ** n for n in range(cpus.bit_length()) if 2 ** n <= cpus})
+
+        # Heuristic scenarios differing in seed and weights, comparable in work
+        scenarios = [
+            {'name': f'scenario_{n}', 'engine': 'heuristic', 'constraints': {
+                'seed': n, 'iterations': options['iterations'],
+                'location_change_penalty': 500 + 250 * n, 'actor_day_cost': 100 + 50 * (n % 4),
+            }}
+            for n in range(options['scenarios'])
+        ]
+
+        # Synthetic data lives only for the duration of the run; workers never query it
+        with transaction.atomic():
+            production = create_synthetic_production(
+                options['scenes'], options['locations'], options['characters']
+            )
+            started = time.perf_counter()
+            explorer = ScenarioExplorer(production)
+            load = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{options['scenes']} scenes, {len(scenarios)} scenarios, "
+                f"{os.cpu_count()} CPUs, problem load {load * 1000:.0f} ms"
+            )
+            self.stdout.write(f"{'workers':>8} {'seconds':>8} {'speedup':>8} {'pareto':>7}")
+            baseline = None
+            for workers in worker_counts:
+                result = explorer.run(scenarios, date.today(), workers=workers)
+                baseline = baseline or result['seconds']
+                self.stdout.write(
+                    f"{result['workers']:>8} {result['seconds']:>8.2f} "
+                    f"{baseline / result['seconds']:>8.2f} {len(result['pareto']):>7}"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,51 @@
+# apps/schedule/management/commands/benchmark_shot_order.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.production.models import Shot
+from apps.schedule.shot_order import path_cost, sequence_shots, setup_costs
+
+LIGHTING = ('window key left', 'window key right', 'night practicals', 'hard sun', '')
+CAMERA = ('A', 'B', 'C', 'reverse', '')
+
+
+class Command(BaseCommand):
+    help = 'Time the shot sequencer on synthetic days and report setup minutes saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='25,50,100,200', help='Comma separated shot counts')
+        parser.add_argument('--shots-per-scene', type=int, default=12)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        shot_types = [value for value, _ in Shot.SHOT_TYPE_CHOICES]
+        self.stdout.write(f"{'shots':>6} {'ms':>8} {'current min':>12} {'suggested min':>14} {'saved':>7}")
+
+        for size in sorted(int(v) for v in options['sizes'].split(',')):
+            scenes = -(-size // options['shots_per_scene'])
+            shots = [
+                {
+                    'scene_id': i // options['shots_per_scene'],
+                    'location_id': (i // options['shots_per_scene']) * 3 // scenes,
+                    'shot_type': rng.choice(shot_types),
+                    'camera_notes': rng.choice(CAMERA),
+                    'lighting_notes': rng.choice(LIGHTING),
+                }
+                for i in range(size)
+            ]
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                costs = setup_costs(shots)
+                order = sequence_shots(costs)
+                timings.append(time.perf_counter() - started)
+
+            current = path_cost(costs, range(size))
+            suggested = path_cost(costs, order)
+            self.stdout.write(
+                f"{size:>6} {min(timings) * 1000:>8.1f} {current:>12.0f} {suggested:>14.0f} {current - suggested:>7.0f}"
+            )
@@ -0,0 +1,80 @@
+# apps/schedule/management/commands/benchmark_stripboard.py
+import json
+import time
+import tracemalloc
+from datetime import time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.schedule.models import SceneSchedule, ShootingDay
+from apps.schedule.serializers import SceneScheduleListSerializer
+from apps.schedule.stripboard import export_stripboard
+from ._synthetic import create_synthetic_production
+
+
+def serialized_list(production_id):
+    """Whole production through the list serializer, as paging the API and joining would"""
+    queryset = SceneSchedule.objects.filter(shooting_day__production_id=production_id).select_related(
+        'scene__location'
+    ).prefetch_related('scene__characters').order_by('shooting_day__shoot_date', 'day_order')
+    rows = SceneScheduleListSerializer(queryset, many=True).data
+    for row, entry in zip(rows, queryset):
+        row['cast'] = [character.name for character in entry.scene.characters.all()]
+    yield json.dumps(rows, default=str)
+
+
+class Command(BaseCommand):
+    help = 'Peak memory and time of the stripboard export for growing productions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,5000,10000', help='Comma separated strip counts')
+        parser.add_argument('--per-day', type=int, default=8)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(v) for v in options['sizes'].split(','))
+        self.stdout.write(f"{'strips':>7} {'variant':<18} {'queries':>8} {'ms':>8} {'peak KiB':>9} {'MiB out':>8}")
+
+        # Synthetic data lives only for the duration of the run
+        with transaction.atomic():
+            for size in sizes:
+                production = self._production(size, options['per_day'])
+                cases = [('serializer list', lambda: serialized_list(production.id))] + [
+                    (f'stream {output}', lambda output=output: export_stripboard(production.id, output))
+                    for output in ('csv', 'ndjson', 'json')
+                ]
+                for label, run in cases:
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        size_out = sum(len(chunk) for chunk in run())
+                        elapsed = time.perf_counter() - started
+
+                    tracemalloc.start()
+                    for _ in run():
+                        pass
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                    self.stdout.write(
+                        f"{size:>7} {label:<18} {len(queries):>8} {elapsed * 1000:>8.0f} "
+                        f"{peak / 1024:>9.0f} {size_out / 2 ** 20:>8.2f}"
+                    )
+
+            transaction.set_rollback(True)
+
+    def _production(self, size, per_day):
+        production = create_synthetic_production(size, 20, character_count=60)
+        days = ShootingDay.objects.bulk_create([
+            ShootingDay(
+                production=production, shoot_date=production.start_date + timedelta(days=n),
+                day_number=n + 1, general_call=clock(6), shooting_call=clock(7),
+            ) for n in range(-(-size // per_day))
+        ])
+        SceneSchedule.objects.bulk_create([
+            SceneSchedule(
+                shooting_day=days[i // per_day], scene=scene, day_order=i % per_day,
+                estimated_start=clock(7 + i % per_day), estimated_duration=timedelta(hours=1),
+            ) for i, scene in enumerate(production.scenes.order_by('id'))
+        ], batch_size=2000)
+        return production
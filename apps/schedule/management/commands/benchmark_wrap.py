@@ -0,0 +1,106 @@
+# apps/schedule/management/commands/benchmark_wrap.py
+import random
+import time
+from datetime import time as clock, timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.production.models import Shot
+from apps.schedule.models import SceneSchedule, ShootingDay
+from apps.schedule.wrap import SIMULATIONS, WrapPredictor, get_residual_pools, simulate_remaining
+from ._synthetic import create_synthetic_production
+
+
+class Command(BaseCommand):
+    help = 'Time one Monte Carlo wrap prediction (cold and warm residual pools)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-days', type=int, default=40)
+        parser.add_argument('--scenes-per-day', type=int, default=10)
+        parser.add_argument('--setups', type=int, default=8, help='Setups per scene')
+        parser.add_argument('--simulations', type=int, default=SIMULATIONS)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        # Synthetic data lives only for the duration of the run
+        with transaction.atomic():
+            today = self._production(rng, options)
+            predictor = WrapPredictor(today, simulations=options['simulations'], seed=options['seed'])
+            now = timezone.make_aware(timezone.datetime.combine(today.shoot_date, clock(10)))
+
+            cache.delete(f'wrap_residuals_{today.production_id}')
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                prediction = predictor.predict(now)
+                cold = time.perf_counter() - started
+
+            with CaptureQueriesContext(connection) as warm_queries:
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    predictor.predict(now)
+                warm = (time.perf_counter() - started) / options['repeat']
+
+            pools = get_residual_pools(today.production_id)
+            planned = [60.0] * options['scenes_per_day']
+            pages = [1.5] * options['scenes_per_day']
+            setups = [options['setups']] * options['scenes_per_day']
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                simulate_remaining(planned, pages, setups, pools, options['simulations'], predictor.rng)
+            simulation = (time.perf_counter() - started) / options['repeat']
+
+            self.stdout.write(
+                f"{options['simulations']} simulations, {prediction['remaining_scenes']} scenes left, "
+                f"history {prediction['history']}"
+            )
+            self.stdout.write(f"{'cold (pools loaded)':<22} {cold * 1000:>7.1f} ms  {len(queries)} queries")
+            self.stdout.write(
+                f"{'warm':<22} {warm * 1000:>7.1f} ms  {len(warm_queries) // options['repeat']} queries"
+            )
+            self.stdout.write(f"{'simulation only':<22} {simulation * 1000:>7.1f} ms")
+            self.stdout.write(f"planned {prediction['planned_wrap']}  P50 {prediction['p50']}  P90 {prediction['p90']}")
+
+            transaction.set_rollback(True)
+
+    def _production(self, rng, options):
+        per_day = options['scenes_per_day']
+        days = options['history_days'] + 1
+        production = create_synthetic_production(days * per_day, 10)
+        scenes = list(production.scenes.order_by('id'))
+        shooting_days = ShootingDay.objects.bulk_create([
+            ShootingDay(
+                production=production, shoot_date=timezone.localdate() - timedelta(days=days - 1 - n),
+                day_number=n + 1, general_call=clock(6), shooting_call=clock(7),
+            ) for n in range(days)
+        ])
+
+        entries, shots = [], []
+        for i, scene in enumerate(scenes):
+            day = i // per_day
+            past = day < days - 1
+            start = clock(7 + i % per_day)
+            overrun = rng.gauss(10, 20) if past else 0
+            entries.append(SceneSchedule(
+                shooting_day=shooting_days[day], scene=scene, day_order=i % per_day,
+                estimated_start=start, estimated_duration=timedelta(hours=1),
+                status='completed' if past else 'scheduled',
+                actual_start=start if past else None,
+                actual_end=clock(7 + i % per_day + 1, int(max(0, min(overrun, 59)))) if past else None,
+            ))
+            for n in range(options['setups']):
+                planned = timedelta(minutes=20)
+                shots.append(Shot(
+                    scene=scene, shot_number=str(n + 1), status='completed' if past else 'not_shot',
+                    estimated_duration=planned,
+                    actual_duration=planned + timedelta(minutes=max(-15, rng.gauss(3, 8))) if past else None,
+                ))
+        SceneSchedule.objects.bulk_create(entries, batch_size=2000)
+        Shot.objects.bulk_create(shots, batch_size=2000)
+        return shooting_days[-1]
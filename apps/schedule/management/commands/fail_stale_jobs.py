@@ -0,0 +1,35 @@
+# apps/schedule/management/commands/fail_stale_jobs.py
+from django.core.management.base import BaseCommand
+
+from apps.schedule.jobs import STALE_QUEUED_SECONDS, fail_jobs, stale_jobs
+from apps.schedule.models import OptimizationJob
+
+
+class Command(BaseCommand):
+    help = 'Fail optimization jobs whose worker pool is gone (web process restarted or crashed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queued-hours', type=float, default=STALE_QUEUED_SECONDS / 3600,
+            help='Queued jobs older than this are stale'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Every queued/running job, for a restart of all web processes'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report stale jobs without failing them')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            jobs = list(OptimizationJob.objects.filter(status__in=('queued', 'running')))
+        else:
+            jobs = stale_jobs(queued_seconds=options['queued_hours'] * 3600)
+
+        for job in jobs:
+            self.stdout.write(f'{job.pk} {job.engine} {job.status} since {job.started_at or job.created_at}')
+
+        if jobs and not options['dry_run']:
+            fail_jobs(jobs, 'Worker lost (process restarted), submit the job again')
+
+        verb = 'found' if options['dry_run'] else 'failed'
+        self.stdout.write(self.style.SUCCESS(f'{len(jobs)} stale optimization jobs {verb}'))
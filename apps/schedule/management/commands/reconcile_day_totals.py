@@ -0,0 +1,31 @@
+# apps/schedule/management/commands/reconcile_day_totals.py
+from django.core.management.base import BaseCommand
+
+from apps.schedule.models import ShootingDay
+from apps.schedule.services import refresh_day_totals, stale_day_totals
+
+
+class Command(BaseCommand):
+    help = 'Recompute ShootingDay.scene_count/page_total where they drifted from the schedule'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--production', help='Only days of this production')
+        parser.add_argument('--dry-run', action='store_true', help='Report stale days without fixing them')
+
+    def handle(self, *args, **options):
+        days = ShootingDay.objects.select_related('production')
+        if options['production']:
+            days = days.filter(production_id=options['production'])
+
+        stale = stale_day_totals(days)
+        for day in stale:
+            self.stdout.write(
+                f'{day.production.title} {day}: scenes {day.scene_count} -> {day.actual_scene_count}, '
+                f'pages {day.page_total} -> {day.actual_page_total}'
+            )
+
+        if stale and not options['dry_run']:
+            refresh_day_totals(day.pk for day in stale)
+
+        verb = 'found' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f'{len(stale)} stale shooting days {verb}'))
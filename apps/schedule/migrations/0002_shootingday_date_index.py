@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shootingday',
+            index=models.Index(fields=['shoot_date', 'production'], name='schedule_sh_shoot_d_fb3ed8_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:03
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_day_totals(apps, schema_editor):
+    ShootingDay = apps.get_model('schedule', 'ShootingDay')
+    SceneSchedule = apps.get_model('schedule', 'SceneSchedule')
+
+    entries = SceneSchedule.objects.filter(
+        shooting_day=OuterRef('pk')
+    ).order_by().values('shooting_day')
+
+    ShootingDay.objects.update(
+        scene_count=Coalesce(
+            Subquery(entries.annotate(count=Count('pk')).values('count')),
+            Value(0), output_field=IntegerField()
+        ),
+        page_total=Coalesce(
+            Subquery(entries.annotate(pages=Sum('scene__estimated_pages')).values('pages')),
+            Value(0), output_field=DecimalField(max_digits=6, decimal_places=2)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0002_shootingday_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shootingday',
+            name='page_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=6),
+        ),
+        migrations.AddField(
+            model_name='shootingday',
+            name='scene_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_day_totals, migrations.RunPython.noop),
+    ]
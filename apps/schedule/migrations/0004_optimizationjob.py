@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-17 01:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('production', '0003_alter_shot_options_alter_take_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('schedule', '0003_shootingday_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptimizationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('engine', models.CharField(choices=[('compact', 'MILP - Compact'), ('full', 'MILP - Full'), ('heuristic', 'Heuristic')], default='compact', max_length=15)),
+                ('start_date', models.DateField()),
+                ('constraints', models.JSONField(blank=True, default=dict)),
+                ('time_budget', models.PositiveIntegerField(default=300)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=15)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('progress', models.JSONField(blank=True, default=dict)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('evaluation', models.JSONField(blank=True, null=True)),
+                ('model_stats', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('production', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='optimization_jobs', to='production.production')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule', '0004_optimizationjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='optimizationjob',
+            name='engine',
+            field=models.CharField(choices=[('compact', 'MILP - Compact'), ('full', 'MILP - Full'), ('heuristic', 'Heuristic'), ('scenarios', 'Scenario exploration')], default='compact', max_length=15),
+        ),
+    ]
@@ -42,23 +42,30 @@ class ShootingDay(models.Model):
     ]
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='scheduled')
     
+    # Denormalized totals, maintained by schedule.signals / services.refresh_day_totals
+    scene_count = models.IntegerField(default=0)
+    page_total = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['shoot_date', 'day_number']
         unique_together = ['production', 'day_number']
+        indexes = [
+            models.Index(fields=['shoot_date', 'production']),  # Cross-production date ranges
+        ]
     
     def __str__(self):
         return f"Day {self.day_number} - {self.shoot_date}"
     
     @property
     def total_scenes(self):
-        return self.scene_schedules.count()
+        return self.scene_count
     
     @property
     def total_pages(self):
-        return sum(ss.scene.estimated_pages or 0 for ss in self.scene_schedules.all())
+        return self.page_total
 
 class SceneSchedule(models.Model):
     """Scenes scheduled for specific shooting day"""
@@ -211,15 +218,20 @@ class ProductionCalendar(models.Model):
         if self.sunday: days.append(6)
         return days
     
+    @property
+    def work_calendar(self):
+        """Compiled WorkCalendar, rebuilt when the work week or dates change"""
+        from .workdays import WorkCalendar
+        
+        key = (self.work_days, tuple(self.holidays or ()), tuple(self.blackout_dates or ()))
+        if getattr(self, '_work_calendar_key', None) != key:
+            self._work_calendar = WorkCalendar.from_calendar(self)
+            self._work_calendar_key = key
+        return self._work_calendar
+    
     def is_work_day(self, date):
         """Check if date is a work day"""
-        if date.weekday() not in self.work_days:
-            return False
-        if str(date) in self.holidays:
-            return False
-        if str(date) in self.blackout_dates:
-            return False
-        return True
+        return self.work_calendar.is_work_day(date)
 
 class ScheduleChange(models.Model):
     """Track all schedule changes for audit trail"""
@@ -254,4 +266,57 @@ class ScheduleChange(models.Model):
         ordering = ['-changed_at']
     
     def __str__(self):
-        return f"{self.get_change_type_display()} - {self.changed_at}"
\ No newline at end of file
+        return f"{self.get_change_type_display()} - {self.changed_at}"
+
+class OptimizationJob(models.Model):
+    """Schedule optimization running in the background worker pool (see schedule.jobs)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    production = models.ForeignKey(Production, on_delete=models.CASCADE, related_name='optimization_jobs')
+    
+    # Input
+    ENGINE_CHOICES = [
+        ('compact', 'MILP - Compact'),
+        ('full', 'MILP - Full'),
+        ('heuristic', 'Heuristic'),
+        ('scenarios', 'Scenario exploration'),  # constraints = {scenarios, workers}, see schedule.scenarios
+    ]
+    engine = models.CharField(max_length=15, choices=ENGINE_CHOICES, default='compact')
+    start_date = models.DateField()
+    constraints = models.JSONField(default=dict, blank=True)
+    time_budget = models.PositiveIntegerField(default=300)  # Wall-clock seconds
+    
+    # State
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='queued')
+    cancel_requested = models.BooleanField(default=False)
+    progress = models.JSONField(default=dict, blank=True)  # Last incumbent reported by the worker
+    
+    # Output
+    # [{date, scenes: [{scene, estimated_start, estimated_minutes}]}], scenario jobs {scenarios, pareto, ...}
+    result = models.JSONField(null=True, blank=True)
+    evaluation = models.JSONField(null=True, blank=True)
+    model_stats = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    # Metadata
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_engine_display()} job {self.id} - {self.status}"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
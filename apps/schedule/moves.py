@@ -0,0 +1,217 @@
+# apps/schedule/moves.py
+"""
+Bulk strip moves: the new scene order of one or more shooting days
+
+The whole move is validated in memory, written with bulk_update in one
+transaction and logged as a compact ScheduleChange diff: strips that only
+shifted because a neighbour was dragged are not logged as moved.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Sequence, Set
+
+from django.db import IntegrityError, transaction
+
+from .models import DayBreak, SceneSchedule, ScheduleChange, ShootingDay
+from .repair import FROZEN_DAY_STATUSES, MOVABLE_STATUSES, REMOVED_DAY_STATUSES
+from .services import deferred_day_totals, touch_days
+
+
+def longest_kept_order(values: Sequence) -> Set[int]:
+    """Indices of a longest strictly increasing subsequence (patience sorting, O(n log n))"""
+    tails, tail_index, previous = [], [], [None] * len(values)
+    for i, value in enumerate(values):
+        position = bisect_left(tails, value)
+        if position == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[position] = value
+            tail_index[position] = i
+        previous[i] = tail_index[position - 1] if position else None
+    kept = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        kept.add(i)
+        i = previous[i]
+    return kept
+
+
+def _label(day: ShootingDay, order: int) -> str:
+    return f'Day {day.day_number} ({day.shoot_date}) #{order + 1}'
+
+
+class BulkMove:
+    """
+    New strip order for a set of shooting days
+
+    day_orders maps a shooting day id to the full, ordered list of
+    SceneSchedule ids the day should hold: every entry currently on a listed
+    day has to be listed somewhere, entries from other days move in. With
+    retime, estimated starts are chained from the day's shooting call and
+    around its breaks; without it hand-set starts are kept.
+    """
+
+    def __init__(self, day_orders: Dict, retime: bool = False):
+        self.day_orders = {day_id: list(entry_ids) for day_id, entry_ids in day_orders.items()}
+        self.retime = retime
+
+    def _load(self):
+        days = {day.pk: day for day in ShootingDay.objects.filter(pk__in=list(self.day_orders))}
+        missing = [str(day_id) for day_id in self.day_orders if day_id not in days]
+        if missing:
+            raise ValueError(f"Unknown shooting days: {', '.join(missing)}")
+        productions = {day.production_id for day in days.values()}
+        if len(productions) > 1:
+            raise ValueError("All days must belong to one production")
+        for day in days.values():
+            if day.status in FROZEN_DAY_STATUSES + REMOVED_DAY_STATUSES:
+                raise ValueError(f'Day {day.day_number} is {day.status}')
+
+        listed = [entry_id for entry_ids in self.day_orders.values() for entry_id in entry_ids]
+        entries = {
+            entry.pk: entry for entry in SceneSchedule.objects.filter(
+                pk__in=listed
+            ).select_related('shooting_day') | SceneSchedule.objects.filter(
+                shooting_day_id__in=list(days)
+            ).select_related('shooting_day')
+        }
+        return days, productions.pop(), listed, entries
+
+    def _validate(self, days, production_id, listed, entries):
+        unknown = [str(entry_id) for entry_id in listed if entry_id not in entries]
+        if unknown:
+            raise ValueError(f"Unknown schedule entries: {', '.join(unknown)}")
+        if len(set(listed)) != len(listed):
+            raise ValueError("An entry is listed more than once")
+        other = [str(pk) for pk, entry in entries.items() if entry.shooting_day.production_id != production_id]
+        if other:
+            raise ValueError(f"Entries of another production: {', '.join(other)}")
+
+        left_out = set(entries).difference(listed)
+        if left_out:
+            numbers = sorted({entries[pk].shooting_day.day_number for pk in left_out})
+            raise ValueError(
+                f"The new order of day {', '.join(map(str, numbers))} leaves out {len(left_out)} entries"
+            )
+
+        # unique_together (shooting_day, scene) checked before anything is written
+        for day_id, entry_ids in self.day_orders.items():
+            scene_ids = [entries[pk].scene_id for pk in entry_ids]
+            if len(set(scene_ids)) != len(scene_ids):
+                raise ValueError(f"Day {days[day_id].day_number} would hold a scene twice")
+            for pk in entry_ids:
+                entry = entries[pk]
+                if entry.shooting_day_id != day_id and entry.status not in MOVABLE_STATUSES:
+                    raise ValueError(f'Entry {pk} is {entry.status} and cannot change days')
+
+    def _breaks(self, days) -> Dict:
+        """(start, duration) of each day's breaks in time order, only needed to retime"""
+        breaks = defaultdict(list)
+        if self.retime:
+            for day_break in DayBreak.objects.filter(shooting_day_id__in=list(days)):
+                day = days[day_break.shooting_day_id]
+                breaks[day.pk].append(
+                    (datetime.combine(day.shoot_date, day_break.scheduled_start), day_break.scheduled_duration)
+                )
+        return breaks
+
+    def _plan(self, days, entries, breaks):
+        """
+        Changed entries and (entry, old day, old order) of the strips to log as moved
+
+        A break is taken after the strip running at its scheduled start, the
+        following strips start that much later.
+        """
+        changed, moved = [], []
+        for day_id, entry_ids in self.day_orders.items():
+            day = days[day_id]
+            start = datetime.combine(day.shoot_date, day.shooting_call)
+            day_breaks = list(breaks.get(day_id, ()))
+            stayed = [i for i, pk in enumerate(entry_ids) if entries[pk].shooting_day_id == day_id]
+            kept = {stayed[i] for i in longest_kept_order([entries[entry_ids[i]].day_order for i in stayed])}
+
+            for order, pk in enumerate(entry_ids):
+                entry = entries[pk]
+                while day_breaks and day_breaks[0][0] <= start:
+                    start += day_breaks.pop(0)[1]
+                estimated_start = start.time() if self.retime else entry.estimated_start
+                start += entry.estimated_duration
+                if order not in kept:
+                    moved.append((entry, entry.shooting_day, entry.day_order))
+                if (entry.shooting_day_id, entry.day_order, entry.estimated_start) != (day_id, order, estimated_start):
+                    entry.shooting_day = day
+                    entry.day_order = order
+                    entry.estimated_start = estimated_start
+                    changed.append(entry)
+        return changed, moved
+
+    @staticmethod
+    def _waves(changed: List, held: Dict) -> List[List]:
+        """
+        Changed entries in write batches that never hold a scene twice on a day
+
+        One UPDATE checks unique_together row by row, so an entry moving onto
+        a (day, scene) another entry is leaving waits for the next batch. held
+        maps each entry id to the day it is on before the move.
+        """
+        taken = {(day_id, scene_id) for day_id, scene_id in held.values()}
+        waves, pending = [], changed
+        while pending:
+            ready = [
+                entry for entry in pending
+                if entry.shooting_day_id == held[entry.pk][0] or (entry.shooting_day_id, entry.scene_id) not in taken
+            ]
+            if not ready:
+                raise ValueError(
+                    f"Entries {', '.join(str(entry.pk) for entry in pending)} trade days for the same scene"
+                )
+            for entry in ready:
+                taken.discard(held[entry.pk])
+                taken.add((entry.shooting_day_id, entry.scene_id))
+            waves.append(ready)
+            written = {entry.pk for entry in ready}
+            pending = [entry for entry in pending if entry.pk not in written]
+        return waves
+
+    def apply(self, reason: str = '', user=None) -> Dict:
+        days, production_id, listed, entries = self._load()
+        self._validate(days, production_id, listed, entries)
+        held = {pk: (entry.shooting_day_id, entry.scene_id) for pk, entry in entries.items()}
+        source_days = {day_id for day_id, _ in held.values()}
+        changed, moved = self._plan(days, entries, self._breaks(days))
+        waves = self._waves(changed, held)
+        reason = reason or 'Stripboard reordered'
+
+        try:
+            with transaction.atomic(), deferred_day_totals():
+                for wave in waves:
+                    SceneSchedule.objects.bulk_update(
+                        wave, ['shooting_day', 'day_order', 'estimated_start'], batch_size=500
+                    )
+                touch_days(source_days | set(days))
+                ScheduleChange.objects.bulk_create([
+                    ScheduleChange(
+                        production_id=production_id, change_type='scene_moved',
+                        shooting_day=entry.shooting_day, scene_id=entry.scene_id,
+                        old_value=_label(old_day, old_order),
+                        new_value=_label(entry.shooting_day, entry.day_order),
+                        reason=reason, changed_by=user,
+                    ) for entry, old_day, old_order in moved
+                ])
+        except IntegrityError:
+            # Another request moved one of the scenes in the meantime
+            raise ValueError("The schedule changed while moving, reload and try again")
+
+        return {
+            'entries_updated': len(changed),
+            'moves': [
+                {
+                    'entry': entry.pk, 'scene': entry.scene_id,
+                    'from': _label(old_day, old_order), 'to': _label(entry.shooting_day, entry.day_order),
+                }
+                for entry, old_day, old_order in moved
+            ],
+            'days_refreshed': len(source_days | set(days)),
+        }
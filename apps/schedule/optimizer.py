@@ -1,18 +1,65 @@
 # apps/scheduling/optimizer.py
+import logging
+import math
+import time
 import numpy as np
-from datetime import datetime, timedelta
-from django.db.models import Q, Avg, Sum
+from collections import defaultdict
+from datetime import datetime
+from django.core.cache import cache
+from django.db.models import Q, Avg, Sum, Count
 from typing import List, Dict, Tuple
 import pulp
 
+from apps.production.geo import get_distances
+from apps.production.solar import solar_events
+from .dood import DROP_AFTER_DAYS, hold_days
+from .incidence import get_incidence
+from .workdays import get_work_calendar
+
+logger = logging.getLogger(__name__)
+
+# Company move cost on top of location_change_penalty, per km driven
+MOVE_COST_PER_KM = 20
+
+# Natural light window an EXT scene needs, by time of day (see _light_blocked_days)
+LIGHT_WINDOWS = {'DAY': 'day', 'DAWN': 'twilight', 'DUSK': 'twilight', 'NIGHT': 'night'}
+MIN_TWILIGHT_MINUTES = 20
+LIGHT_HORIZON_DAYS = 366
+
+# Compact mode: a window has ~locations x days location-day variables, so
+# productions with many locations get shorter windows (CBC time grows much
+# faster than linearly with the window)
+WINDOW_LOCATION_DAYS = 50
+MIN_WINDOW_DAYS, MAX_WINDOW_DAYS = 3, 7
+
+
+class OptimizationCancelled(Exception):
+    """Raised from a progress callback to abandon a running optimization"""
+
+
 class ProductionScheduleOptimizer:
     """AI-powered scheduling optimization using linear programming"""
     
     def __init__(self, production):
+        from apps.crew.models import CrewMember
+        
         self.production = production
-        self.scenes = list(production.scenes.all())
-        self.crew = list(production.crew.filter(is_active=True))
+        self.scenes = list(production.scenes.select_related('location'))
+        self.incidence = get_incidence(production.id)
+        self.crew = list(
+            CrewMember.objects.filter(
+                assignments__production=production, status='active'
+            ).distinct()
+        )
         self.locations = list(production.locations.all())
+        self.distances = get_distances(production.id)
+        # Day indices of the models count work days of the production calendar
+        self.calendar = get_work_calendar(production.id)
+        # {scene id: day indices} without enough natural light, set per optimize_schedule call
+        self.light_blocked = {}
+        self.model_stats = {}
+        # Called with intermediate results, see _report_progress
+        self.progress_callback = None
     
     def optimize_schedule(self, start_date: datetime, constraints: Dict) -> List[Dict]:
         """
@@ -25,8 +72,58 @@ class ProductionScheduleOptimizer:
         - Equipment requirements
         - Crew preferences
         - Budget optimization
+        
+        constraints['mode'] == 'compact' switches to the location-block
+        formulation (see _optimize_compact), which scales to full features.
+        
+        EXT scenes are kept off days whose daylight, civil twilight or night
+        at their location is too short (light_windows=False disables it).
+        
+        After the call, self.evaluation / self.objective_value hold the
+        engine-independent cost of the result (see evaluate_schedule).
+        """
+        self.light_blocked = (
+            self._light_blocked_days(start_date, constraints)
+            if constraints.get('light_windows', True) else {}
+        )
+        schedule = self._solve(start_date, constraints)
+        self.evaluation = self.evaluate_schedule(schedule, constraints)
+        self.objective_value = self.evaluation['objective']
+        return schedule
+    
+    def _report_progress(self, **progress):
+        """
+        Hand an intermediate result (phase, objective, ...) to progress_callback
+        
+        The callback may raise OptimizationCancelled to stop the solve.
+        """
+        if self.progress_callback is not None:
+            self.progress_callback(progress)
+    
+    def _move_cost(self, from_location_id, to_location_id, constraints: Dict) -> float:
+        """Company move: flat location_change_penalty plus move_cost_per_km (unknown distance = flat)"""
+        if from_location_id == to_location_id:
+            return 0.0
+        km = self.distances.distance(from_location_id, to_location_id) or 0.0
+        return (
+            constraints.get('location_change_penalty', 1000)
+            + constraints.get('move_cost_per_km', MOVE_COST_PER_KM) * km
+        )
+    
+    def _solve(self, start_date: datetime, constraints: Dict) -> List[Dict]:
+        """Engine hook, subclasses replace the solving strategy"""
+        if constraints.get('mode') == 'compact':
+            return self._optimize_compact(start_date, constraints)
+        return self._optimize_full(start_date, constraints)
+    
+    def _optimize_full(self, start_date: datetime, constraints: Dict) -> List[Dict]:
         """
+        Scene-day formulation over a fixed 30-day window
         
+        Building the model reports progress per day and location (the
+        callback may cancel), CBC gets what is left of time_limit.
+        """
+        started = time.monotonic()
         # Create optimization problem
         prob = pulp.LpProblem("FilmScheduleOptimization", pulp.LpMinimize)
         
@@ -43,13 +140,13 @@ class ProductionScheduleOptimizer:
         
         # Objective: Minimize total cost + setup changes + overtime
         setup_cost = self._calculate_setup_costs()
-        location_change_penalty = 1000  # Cost of moving between locations
         overtime_cost = 500  # Cost per overtime hour
         
         objective_terms = []
         
         # Location change penalties
         for day in days[1:]:
+            self._report_progress(phase='model', day=day)
             for loc1 in self.locations:
                 for loc2 in self.locations:
                     if loc1 != loc2:
@@ -74,7 +171,7 @@ class ProductionScheduleOptimizer:
                             ) / len(scenes_loc1_prev + scenes_loc2_curr)
                             
                             objective_terms.append(
-                                location_change_penalty * change_indicator
+                                self._move_cost(loc1.id, loc2.id, constraints) * change_indicator
                             )
         
         prob += sum(objective_terms)
@@ -97,17 +194,11 @@ class ProductionScheduleOptimizer:
             prob += daily_pages <= max_pages_per_day
         
         # 3. Actor availability constraints
-        for crew_member in self.crew:
-            if hasattr(crew_member, 'availability'):
-                unavailable_days = self._get_unavailable_days(crew_member)
-                for day in unavailable_days:
-                    # Scenes requiring this actor cannot be shot on unavailable days
-                    actor_scenes = [
-                        s for s in self.scenes 
-                        if crew_member in s.characters.all()
-                    ]
-                    for scene in actor_scenes:
-                        prob += scene_day_vars[(scene.id, day)] == 0
+        # Scenes requiring an actor cannot be shot on the actor's unavailable days
+        for scene_id, unavailable_days in self._scene_blocked_days().items():
+            for day in unavailable_days:
+                if (scene_id, day) in scene_day_vars:
+                    prob += scene_day_vars[(scene_id, day)] == 0
         
         # 4. Weather constraints for exterior scenes
         weather_data = self._get_weather_forecast(start_date, 30)
@@ -120,6 +211,7 @@ class ProductionScheduleOptimizer:
         # 5. Location sequence optimization (group by location)
         # Encourage shooting scenes at same location close together
         for location in self.locations:
+            self._report_progress(phase='model', location=str(location.id))
             location_scenes = [s for s in self.scenes if s.location == location]
             if len(location_scenes) > 1:
                 for i, scene1 in enumerate(location_scenes):
@@ -139,12 +231,334 @@ class ProductionScheduleOptimizer:
                                     objective_terms.append(-50 * proximity_bonus)
         
         # Solve the optimization problem
-        prob.solve(pulp.PULP_CBC_CMD(msg=0))
+        time_limit = constraints.get('time_limit')
+        if time_limit:
+            time_limit = max(1, int(time_limit - (time.monotonic() - started)))
+        self._report_progress(phase='solve', variables=len(scene_day_vars), time_limit=time_limit)
+        prob.solve(self._solver(time_limit))
+        self._report_progress(phase='solved', status=pulp.LpStatus[prob.status])
         
         if prob.status == pulp.LpStatusOptimal:
             return self._extract_schedule(scene_day_vars, start_date, days)
         else:
-            return self._fallback_schedule(start_date)
+            return self._fallback_schedule(start_date, max_pages_per_day)
+    
+    def _optimize_compact(self, start_date: datetime, constraints: Dict) -> List[Dict]:
+        """
+        Compact formulation solved over a rolling horizon
+        
+        Scenes are aggregated into strips (same location and time of day,
+        packed up to max_pages_per_day), so the model only has strip-day
+        and location-day variables. Each window of `window_days` days is
+        solved on its own, fixed, and the next window continues from the
+        locations used on the last day.
+        
+        Extra constraints:
+        - window_days: length of one rolling window (default 7 days, shorter
+          with many locations, see WINDOW_LOCATION_DAYS)
+        - horizon_days: hard stop for the whole schedule (default derived from pages)
+        - time_limit: total solver budget in seconds, split across windows
+        - mip_gap: relative optimality gap accepted by CBC (default 0.05)
+        - return_best: accept the best feasible incumbent when the time limit
+          hits (default True), otherwise fall back to _fallback_schedule
+        """
+        max_pages_per_day = float(constraints.get('max_pages_per_day', 8))
+        time_limit = constraints.get('time_limit')
+        return_best = constraints.get('return_best', True)
+        mip_gap = constraints.get('mip_gap', 0.05)
+        location_change_penalty = constraints.get('location_change_penalty', 1000)
+        
+        strips = self._build_strips(max_pages_per_day)
+        
+        # Opening a location costs the flat penalty plus the mean drive to it
+        per_km = constraints.get('move_cost_per_km', MOVE_COST_PER_KM)
+        location_ids = sorted({strip['location_id'] for strip in strips}, key=str)
+        move_costs = {
+            location_id: location_change_penalty + per_km * km
+            for location_id, km in self.distances.mean_distances(location_ids).items()
+        }
+        window_days = int(constraints.get('window_days') or min(
+            MAX_WINDOW_DAYS, max(MIN_WINDOW_DAYS, WINDOW_LOCATION_DAYS // max(len(location_ids), 1))
+        ))
+        total_pages = sum(strip['pages'] for strip in strips)
+        horizon_days = int(constraints.get('horizon_days') or (
+            math.ceil(total_pages / max_pages_per_day) * 3 + window_days
+        ))
+        
+        # Strips that can never be shot on a given absolute day
+        blocked_days = self._strip_blocked_days(strips)
+        
+        deadline = time.monotonic() + time_limit if time_limit else None
+        started = time.monotonic()
+        
+        remaining = set(range(len(strips)))
+        strip_days = {}
+        previous_locations = set()
+        day_offset = 0
+        stats = {'windows': 0, 'window_days': window_days, 'variables': 0, 'constraints': 0, 'strips': len(strips)}
+        proven_optimal = True
+        
+        while remaining and day_offset < horizon_days:
+            days = list(range(day_offset, min(day_offset + window_days, horizon_days)))
+            weather = self._get_weather_forecast(self.calendar.offset(start_date, day_offset), len(days))
+            rainy_days = {
+                day for day, forecast in zip(days, weather)
+                if forecast['precipitation_chance'] > 70
+            }
+            
+            seconds_left = None
+            if deadline is not None:
+                seconds_left = max(1, int(deadline - time.monotonic()))
+            
+            placed, last_locations, prob = self._solve_window(
+                strips, sorted(remaining), days, rainy_days, blocked_days,
+                previous_locations, max_pages_per_day, move_costs,
+                seconds_left, mip_gap
+            )
+            
+            stats['windows'] += 1
+            stats['variables'] += prob.numVariables()
+            stats['constraints'] += prob.numConstraints()
+            
+            solved = prob.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+            if not solved or (prob.status != pulp.LpStatusOptimal and not return_best):
+                logger.warning(
+                    "Compact optimizer window %s-%s not solved (%s), using fallback",
+                    days[0], days[-1], pulp.LpStatus[prob.status]
+                )
+                self.model_stats = dict(stats, status='fallback',
+                                        solve_seconds=time.monotonic() - started)
+                return self._fallback_schedule(start_date, max_pages_per_day)
+            
+            proven_optimal = proven_optimal and prob.status == pulp.LpStatusOptimal
+            strip_days.update(placed)
+            remaining.difference_update(placed)
+            if last_locations is not None:
+                previous_locations = last_locations
+            day_offset = days[-1] + 1
+            
+            if self.progress_callback is not None:
+                # Incumbent = cost of the windows fixed so far
+                partial = defaultdict(list)
+                for strip_index, day in sorted(strip_days.items(), key=lambda item: item[1]):
+                    partial[day].extend(strips[strip_index]['scenes'])
+                self._report_progress(
+                    phase='window', window=stats['windows'],
+                    objective=self.evaluate_schedule(self._build_schedule(partial, start_date), constraints)['objective'],
+                    scheduled_scenes=sum(len(scenes) for scenes in partial.values()),
+                    remaining_scenes=sum(len(strips[i]['scenes']) for i in remaining),
+                )
+        
+        if remaining:
+            logger.warning(
+                "Compact optimizer left %s strips unscheduled within %s days",
+                len(remaining), horizon_days
+            )
+        
+        day_scenes = defaultdict(list)
+        for strip_index, day in sorted(strip_days.items(), key=lambda item: item[1]):
+            day_scenes[day].extend(strips[strip_index]['scenes'])
+        
+        self.model_stats = dict(
+            stats,
+            status='partial' if remaining else ('optimal' if proven_optimal else 'best_found'),
+            unscheduled_scenes=sum(len(strips[i]['scenes']) for i in remaining),
+            solve_seconds=time.monotonic() - started,
+        )
+        return self._build_schedule(day_scenes, start_date)
+    
+    def _solve_window(self, strips, strip_ids, days, rainy_days, blocked_days,
+                      previous_locations, max_pages_per_day,
+                      move_costs, time_limit, mip_gap=None):
+        """
+        Solve one rolling-horizon window, returns ({strip: day}, last day locations, problem)
+        
+        move_costs: {location id: cost of a company move into the location}
+        """
+        prob = pulp.LpProblem("FilmScheduleWindow", pulp.LpMinimize)
+        
+        strip_day_vars = {}
+        for i in strip_ids:
+            strip = strips[i]
+            for day in days:
+                if day in blocked_days[i]:
+                    continue
+                if strip['int_ext'] == 'EXT' and day in rainy_days:
+                    continue
+                strip_day_vars[(i, day)] = pulp.LpVariable(f"strip_{i}_day_{day}", cat='Binary')
+        
+        location_ids = sorted({strips[i]['location_id'] for i in strip_ids} | set(previous_locations))
+        location_day_vars = {
+            (loc, day): pulp.LpVariable(f"loc_{loc}_day_{day}", cat='Binary')
+            for loc in location_ids for day in days
+        }
+        # Number of newly opened locations = company moves
+        move_vars = {
+            (loc, day): pulp.LpVariable(f"move_{loc}_day_{day}", lowBound=0)
+            for loc in location_ids for day in days
+        }
+        
+        # Scheduling pages dominates, moves are second, earlier days break ties
+        page_weight = 20 * max(move_costs.values(), default=1000)
+        prob += (
+            pulp.lpSum(
+                (-page_weight + (day - days[0])) * strips[i]['pages'] * var
+                for (i, day), var in strip_day_vars.items()
+            )
+            + pulp.lpSum(move_costs[loc] * var for (loc, day), var in move_vars.items())
+        )
+        
+        by_strip = defaultdict(list)
+        by_day = defaultdict(list)
+        for (i, day), var in strip_day_vars.items():
+            by_strip[i].append(var)
+            by_day[day].append((i, var))
+        
+        # 1. Each strip at most once in the window
+        for i, variables in by_strip.items():
+            prob += pulp.lpSum(variables) <= 1
+        
+        for day in days:
+            # 2. Daily page limit; an oversized strip gets a day of its own
+            prob += pulp.lpSum(strips[i]['pages'] * var for i, var in by_day[day]) <= (
+                max_pages_per_day + pulp.lpSum(
+                    (strips[i]['pages'] - max_pages_per_day) * var
+                    for i, var in by_day[day] if strips[i]['pages'] > max_pages_per_day
+                )
+            )
+            
+            # 3. Strip on a day opens its location
+            for i, var in by_day[day]:
+                prob += var <= location_day_vars[(strips[i]['location_id'], day)]
+            
+            # 4. Location opened today but not used the day before is a move
+            for loc in location_ids:
+                if day == days[0]:
+                    used_before = 1 if loc in previous_locations else 0
+                else:
+                    used_before = location_day_vars[(loc, day - 1)]
+                prob += move_vars[(loc, day)] >= location_day_vars[(loc, day)] - used_before
+        
+        prob.solve(self._solver(time_limit, mip_gap))
+        
+        placed = {
+            i: day for (i, day), var in strip_day_vars.items()
+            if var.value() is not None and var.value() > 0.5
+        }
+        
+        last_locations = None
+        for day in reversed(days):
+            used = {strips[i]['location_id'] for i, placed_day in placed.items() if placed_day == day}
+            if used:
+                last_locations = used
+                break
+        
+        return placed, last_locations, prob
+    
+    def _solver(self, time_limit=None, mip_gap=None):
+        options = {'msg': 0}
+        if time_limit:
+            options['timeLimit'] = time_limit
+        if mip_gap:
+            options['gapRel'] = mip_gap
+        return pulp.PULP_CBC_CMD(**options)
+    
+    def _build_strips(self, max_pages_per_day: float) -> List[Dict]:
+        """Pack scenes of the same location and time of day into day-sized strips"""
+        blocks = defaultdict(list)
+        for scene in self.scenes:
+            blocks[(scene.location_id, scene.time_of_day)].append(scene)
+        
+        strips = []
+        for (location_id, time_of_day), scenes in sorted(blocks.items(), key=lambda item: str(item[0])):
+            # First-fit decreasing within the block
+            block_strips = []
+            for scene in sorted(scenes, key=lambda s: float(s.estimated_pages or 0), reverse=True):
+                pages = float(scene.estimated_pages or 0)
+                for strip in block_strips:
+                    if strip['pages'] + pages <= max_pages_per_day:
+                        strip['scenes'].append(scene)
+                        strip['pages'] += pages
+                        break
+                else:
+                    block_strips.append({
+                        'location_id': location_id,
+                        'time_of_day': time_of_day,
+                        'int_ext': scene.int_ext,
+                        'scenes': [scene],
+                        'pages': pages,
+                    })
+            
+            for strip in block_strips:
+                # Mixed INT/EXT strip is weather dependent
+                if any(s.int_ext == 'EXT' for s in strip['scenes']):
+                    strip['int_ext'] = 'EXT'
+                strip['scenes'].sort(key=lambda s: s.scene_number)
+            strips.extend(block_strips)
+        
+        return strips
+    
+    def _strip_blocked_days(self, strips: List[Dict]) -> List[set]:
+        """Absolute day indices on which each strip cannot be shot (actor availability)"""
+        scene_blocked = self._scene_blocked_days()
+        return [
+            set().union(*(scene_blocked.get(scene.id, set()) for scene in strip['scenes']))
+            for strip in strips
+        ]
+    
+    def _scene_blocked_days(self) -> Dict:
+        """{scene id: day indices} when a cast actor is unavailable or the light is wrong"""
+        blocked = defaultdict(set)
+        for scene_id, days in self.light_blocked.items():
+            blocked[scene_id].update(days)
+        for crew_member in self.crew:
+            unavailable_days = self._get_unavailable_days(crew_member)
+            if unavailable_days:
+                for scene_id in self.incidence.scenes_with_actor(crew_member.id):
+                    blocked[scene_id].update(unavailable_days)
+        return dict(blocked)
+    
+    def _light_blocked_days(self, start_date, constraints: Dict) -> Dict:
+        """
+        {scene id: work day indices} an EXT scene cannot get its light on
+        
+        DAY and NIGHT scenes need daylight / darkness (after civil dusk) at
+        least as long as the scene, DAWN and DUSK scenes a civil twilight of
+        min_twilight_minutes. Computed for LIGHT_HORIZON_DAYS work days at
+        the scene's location; locations without coordinates are not checked.
+        """
+        scenes = [
+            scene for scene in self.scenes
+            if scene.int_ext == 'EXT' and scene.time_of_day in LIGHT_WINDOWS
+            and scene.location is not None
+            and scene.location.latitude is not None and scene.location.longitude is not None
+        ]
+        if not scenes:
+            return {}
+        
+        locations = {scene.location_id: scene.location for scene in scenes}
+        location_index = {location_id: i for i, location_id in enumerate(locations)}
+        dates = self.calendar.work_days(start_date, LIGHT_HORIZON_DAYS)
+        events = solar_events(
+            [location.latitude for location in locations.values()],
+            [location.longitude for location in locations.values()],
+            dates,
+        )
+        windows = {
+            'day': events['day_minutes'],
+            'twilight': events['twilight_minutes'],
+            'night': 1440 - events['day_minutes'] - 2 * events['twilight_minutes'],
+        }
+        min_twilight = constraints.get('min_twilight_minutes', MIN_TWILIGHT_MINUTES)
+        
+        blocked = {}
+        for scene in scenes:
+            window = LIGHT_WINDOWS[scene.time_of_day]
+            needed = min_twilight if window == 'twilight' else float(scene.estimated_pages or 0) * 45
+            days = np.flatnonzero(windows[window][location_index[scene.location_id]] < needed)
+            if days.size:
+                blocked[scene.id] = set(days.tolist())
+        return blocked
     
     def _calculate_setup_costs(self) -> Dict:
         """Calculate setup costs for different scene transitions"""
@@ -183,55 +597,165 @@ class ProductionScheduleOptimizer:
     
     def _extract_schedule(self, scene_day_vars, start_date, days) -> List[Dict]:
         """Extract optimized schedule from solved variables"""
+        day_scenes = {
+            day: [
+                scene for scene in self.scenes
+                if scene_day_vars[(scene.id, day)].value() == 1
+            ]
+            for day in days
+        }
+        return self._build_schedule(day_scenes, start_date)
+    
+    def _build_schedule(self, day_scenes: Dict[int, List], start_date) -> List[Dict]:
+        """Build schedule output from {work day index: [scenes]}, day 0 = first work day from start_date"""
         schedule = []
+        day_indices = sorted(day_scenes)
         
-        for day in days:
-            day_date = start_date + timedelta(days=day)
-            day_scenes = []
+        for day, day_date in zip(day_indices, self.calendar.offset(start_date, day_indices)):
+            scenes = [
+                {
+                    'scene': scene,
+                    'estimated_start': '08:00',
+                    'estimated_duration': scene.estimated_pages * 45,  # 45 min per page
+                    'location': scene.location,
+                    'crew_required': self._get_scene_crew(scene)
+                }
+                for scene in day_scenes[day]
+            ]
             
-            for scene in self.scenes:
-                if scene_day_vars[(scene.id, day)].value() == 1:
-                    day_scenes.append({
-                        'scene': scene,
-                        'estimated_start': '08:00',
-                        'estimated_duration': scene.estimated_pages * 45,  # 45 min per page
-                        'location': scene.location,
-                        'crew_required': self._get_scene_crew(scene)
-                    })
-            
-            if day_scenes:
+            if scenes:
                 schedule.append({
                     'date': day_date,
-                    'scenes': day_scenes,
-                    'total_pages': sum(s['scene'].estimated_pages for s in day_scenes),
-                    'primary_location': day_scenes[0]['location'] if day_scenes else None
+                    'scenes': scenes,
+                    'total_pages': sum(s['scene'].estimated_pages for s in scenes),
+                    'primary_location': scenes[0]['location'] if scenes else None
                 })
         
         return schedule
     
-    def _fallback_schedule(self, start_date) -> List[Dict]:
+    def _fallback_schedule(self, start_date, max_pages_per_day: float = 8) -> List[Dict]:
         """Simple fallback scheduling if optimization fails"""
-        schedule = []
-        current_date = start_date
+        days = self._pack_days(max_pages_per_day)
+        return self._build_schedule(dict(enumerate(days)), start_date)
+    
+    def _pack_days(self, max_pages_per_day: float) -> List[List]:
+        """
+        Greedy location-clustered packing
         
-        # Group scenes by location for efficiency
-        location_groups = {}
+        Scenes are grouped by location (largest location first) and packed
+        best-fit decreasing into days that never mix locations. Leftover
+        short days of neighbouring locations are merged when they fit.
+        """
+        location_groups = defaultdict(list)
         for scene in self.scenes:
-            if scene.location not in location_groups:
-                location_groups[scene.location] = []
-            location_groups[scene.location].append(scene)
+            location_groups[scene.location_id].append(scene)
         
-        for location, scenes in location_groups.items():
-            for scene in scenes:
-                schedule.append({
-                    'date': current_date,
-                    'scenes': [scene],
-                    'total_pages': scene.estimated_pages,
-                    'primary_location': location
-                })
-                current_date += timedelta(days=1)
+        def group_pages(scenes):
+            return sum(float(s.estimated_pages or 0) for s in scenes)
         
-        return schedule
+        days = []
+        for location_id, scenes in sorted(
+            location_groups.items(), key=lambda item: (-group_pages(item[1]), str(item[0]))
+        ):
+            location_days = []
+            for scene in sorted(scenes, key=lambda s: (-float(s.estimated_pages or 0), s.scene_number)):
+                pages = float(scene.estimated_pages or 0)
+                fitting = [
+                    day for day in location_days
+                    if day['pages'] + pages <= max_pages_per_day
+                ]
+                if fitting:
+                    day = max(fitting, key=lambda d: d['pages'])
+                    day['scenes'].append(scene)
+                    day['pages'] += pages
+                else:
+                    location_days.append({'scenes': [scene], 'pages': pages})
+            location_days.sort(key=lambda d: -d['pages'])
+            
+            # Short tail day of the previous location can take this location's tail
+            if days and location_days and (
+                days[-1]['pages'] + location_days[-1]['pages'] <= max_pages_per_day
+            ):
+                tail = location_days.pop()
+                days[-1]['scenes'].extend(tail['scenes'])
+                days[-1]['pages'] += tail['pages']
+                location_days.insert(0, days.pop())
+            days.extend(location_days)
+        
+        packed = []
+        for day in days:
+            # Keep locations in packing order, scenes in script order
+            location_order = {}
+            for scene in day['scenes']:
+                location_order.setdefault(scene.location_id, len(location_order))
+            packed.append(sorted(
+                day['scenes'], key=lambda s: (location_order[s.location_id], s.scene_number)
+            ))
+        return packed
+    
+    def evaluate_schedule(self, schedule: List[Dict], constraints: Dict = None) -> Dict:
+        """
+        Engine-independent cost of a schedule
+        
+        - location_changes: moves between consecutive locations, within
+          and across shooting days
+        - move_km: distance driven by those moves (unknown distances count 0)
+        - actor_days: days each cast member is on the schedule, first to
+          last shooting day (work + hold)
+        - hold_days: paid hold days as in the DOOD report, gaps of
+          drop_after_days or more are drops (see dood.dood_codes); weighted
+          by hold_day_cost (default 0)
+        
+        Days are counted by work day of the production calendar, so work
+        days left empty between shooting days count like in the search.
+        """
+        constraints = constraints or {}
+        location_change_penalty = constraints.get('location_change_penalty', 1000)
+        actor_day_cost = constraints.get('actor_day_cost', 200)
+        hold_day_cost = constraints.get('hold_day_cost', 0)
+        move_cost_per_km = constraints.get('move_cost_per_km', MOVE_COST_PER_KM)
+        
+        location_changes = 0
+        move_km = 0.0
+        previous_location = None
+        cast_days = defaultdict(list)
+        
+        positions = self.calendar.indices(schedule[0]['date'], [day['date'] for day in schedule]) if schedule else []
+        for day_index, day in zip(positions, schedule):
+            for entry in day['scenes']:
+                scene = entry['scene']
+                if previous_location is not None and scene.location_id != previous_location:
+                    location_changes += 1
+                    move_km += self.distances.distance(previous_location, scene.location_id) or 0.0
+                previous_location = scene.location_id
+                
+                for cast_key in self._scene_cast(scene):
+                    if not cast_days[cast_key] or cast_days[cast_key][-1] != day_index:
+                        cast_days[cast_key].append(day_index)
+        
+        actor_days = sum(days[-1] - days[0] + 1 for days in cast_days.values())
+        work = np.zeros((len(cast_days), positions[-1] + 1 if positions else 0), dtype=bool)
+        for k, days in enumerate(cast_days.values()):
+            work[k, days] = True
+        holds = hold_days(work, constraints.get('drop_after_days', DROP_AFTER_DAYS))
+        
+        return {
+            'objective': (
+                location_change_penalty * location_changes
+                + move_cost_per_km * move_km
+                + actor_day_cost * actor_days
+                + hold_day_cost * holds
+            ),
+            'location_changes': location_changes,
+            'move_km': round(move_km, 1),
+            'actor_days': actor_days,
+            'hold_days': holds,
+            'shooting_days': len(schedule),
+        }
+    
+    def _scene_cast(self, scene) -> List:
+        """Cast keys of a scene: the actor when cast, otherwise the character"""
+        return self.incidence.scene_cast(scene.id)
     
     def _get_scene_crew(self, scene) -> List:
         """Get required crew for a scene"""
@@ -241,6 +765,126 @@ class ProductionScheduleOptimizer:
 class MachineLearningInsights:
     """ML-powered insights for production optimization"""
     
+    # Duration model features: pages, exterior, night, characters, shots
+    DURATION_WEIGHTS = np.array([45, 15, 30, 10, 20])  # minutes
+    DURATION_PRIOR_STRENGTH = 0.1
+    DURATION_MODEL_TIMEOUT = 60 * 60
+    
+    @staticmethod
+    def _duration_features(rows) -> np.ndarray:
+        """Feature matrix from (pages, int_ext, time_of_day, characters, shots) rows"""
+        if not rows:
+            return np.zeros((0, 5))
+        pages, int_ext, time_of_day, characters, shots = zip(*rows)
+        return np.column_stack([
+            np.array(pages, dtype=float),
+            np.array(int_ext) == 'EXT',
+            np.array(time_of_day) == 'NIGHT',
+            np.array(characters, dtype=float),
+            np.array(shots, dtype=float),
+        ]).astype(float)
+    
+    @classmethod
+    def fit_duration_model(cls, production_id) -> Dict:
+        """
+        Least-squares duration weights from completed SceneSchedule timings
+        
+        Cached per production (invalidated when a scene gets its actual
+        end time); falls back to DURATION_WEIGHTS without enough history.
+        """
+        cache_key = f'scene_duration_model_{production_id}'
+        model = cache.get(cache_key)
+        if model is not None:
+            return model
+        
+        from .models import SceneSchedule
+        
+        history = list(
+            SceneSchedule.objects.filter(
+                shooting_day__production_id=production_id,
+                actual_start__isnull=False,
+                actual_end__isnull=False,
+            ).annotate(
+                character_count=Count('scene__characters', distinct=True),
+                shot_count=Count('scene__shots', distinct=True),
+            ).values_list(
+                'scene__estimated_pages', 'scene__int_ext', 'scene__time_of_day',
+                'character_count', 'shot_count', 'actual_start', 'actual_end'
+            )
+        )
+        
+        weights = cls.DURATION_WEIGHTS.astype(float)
+        residual_std = None
+        features = cls._duration_features([row[:5] for row in history])
+        
+        if len(history) > features.shape[1]:
+            start = np.array([t.hour * 60 + t.minute for t in (row[5] for row in history)], dtype=float)
+            end = np.array([t.hour * 60 + t.minute for t in (row[6] for row in history)], dtype=float)
+            minutes = np.where(end >= start, end - start, end + 24 * 60 - start)
+            
+            # Ridge towards the default weights: features without variance
+            # in the history (e.g. no shots logged yet) keep their prior
+            prior = np.sqrt(cls.DURATION_PRIOR_STRENGTH)
+            weights, *_ = np.linalg.lstsq(
+                np.vstack([features, prior * np.eye(features.shape[1])]),
+                np.concatenate([minutes, prior * cls.DURATION_WEIGHTS]),
+                rcond=None
+            )
+            residual_std = float(np.std(minutes - features @ weights))
+        
+        model = {
+            'weights': weights,
+            'residual_std': residual_std,
+            'samples': len(history),
+        }
+        cache.set(cache_key, model, cls.DURATION_MODEL_TIMEOUT)
+        return model
+    
+    @classmethod
+    def predict_durations(cls, scenes_queryset) -> Dict:
+        """
+        Predict durations of many scenes at once
+        
+        One annotated query builds the feature matrix, predictions are a
+        single matrix product per production. Returns {scene_id: prediction}
+        in the same shape as predict_scene_duration.
+        """
+        rows = list(
+            scenes_queryset.order_by().annotate(
+                character_count=Count('characters', distinct=True),
+                shot_count=Count('shots', distinct=True),
+            ).values_list(
+                'id', 'production_id', 'estimated_pages', 'int_ext', 'time_of_day',
+                'character_count', 'shot_count'
+            )
+        )
+        
+        by_production = defaultdict(list)
+        for row in rows:
+            by_production[row[1]].append(row)
+        
+        predictions = {}
+        for production_id, production_rows in by_production.items():
+            model = cls.fit_duration_model(production_id)
+            features = cls._duration_features([row[2:] for row in production_rows])
+            minutes = np.maximum(features @ model['weights'], 0)
+            
+            if model['residual_std'] is not None:
+                uncertainty = np.full(len(minutes), 1.28 * model['residual_std'])  # ~80 % interval
+            else:
+                uncertainty = minutes * 0.2
+            
+            for row, predicted, spread in zip(production_rows, minutes, uncertainty):
+                predictions[row[0]] = {
+                    'predicted_minutes': int(predicted),
+                    'confidence_interval': (
+                        int(max(predicted - spread, 0)),
+                        int(predicted + spread)
+                    )
+                }
+        
+        return predictions
+    
     @staticmethod
     def predict_scene_duration(scene, historical_data):
         """Predict actual shooting time based on scene characteristics"""
@@ -255,7 +899,7 @@ class MachineLearningInsights:
         
         # Simple linear model (in production, use proper ML)
         # Trained on historical scene duration data
-        weights = np.array([45, 15, 30, 10, 20])  # minutes
+        weights = MachineLearningInsights.DURATION_WEIGHTS
         predicted_duration = np.dot(features, weights)
         
         # Add uncertainty based on historical variance
@@ -273,9 +917,19 @@ class MachineLearningInsights:
     def recommend_scene_order(scenes, context):
         """ML-based scene order recommendation"""
         # Score scenes based on multiple factors
+        scenes = list(scenes)
         scores = []
         
-        for scene in scenes:
+        # Shared actors with the previous scene for all scenes at once
+        shared_actors = None
+        previous_scene = context.get('previous_scene')
+        if previous_scene and scenes:
+            incidence = get_incidence(previous_scene.production_id)
+            shared_actors = incidence.shared_cast_with(
+                previous_scene.id, [scene.id for scene in scenes]
+            )
+        
+        for i, scene in enumerate(scenes):
             score = 0
             
             # Weather factor
@@ -283,11 +937,8 @@ class MachineLearningInsights:
                 score += 10
             
             # Actor continuity
-            if context.get('previous_scene'):
-                shared_actors = set(scene.characters.all()) & set(
-                    context['previous_scene'].characters.all()
-                )
-                score += len(shared_actors) * 5
+            if shared_actors is not None:
+                score += int(shared_actors[i]) * 5
             
             # Location efficiency
             if context.get('current_location') == scene.location:
@@ -0,0 +1,235 @@
+# apps/schedule/repair.py
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.crew.models import CallSheet
+from .heuristic import HeuristicScheduleOptimizer, _AnnealingSearch
+from .models import SceneSchedule, ScheduleChange, ShootingDay
+from .services import deferred_day_totals, touch_days
+from .workdays import get_work_calendar
+
+# Days that are never re-planned
+FROZEN_DAY_STATUSES = ('completed', 'in_progress')
+PUBLISHED_CALL_SHEET_STATUSES = ('final', 'revised')
+# Day statuses that take a day out of the plan
+REMOVED_DAY_STATUSES = ('cancelled', 'postponed')
+# Only entries in these states may move
+MOVABLE_STATUSES = ('scheduled', 'postponed')
+
+DEFAULT_FREEZE_DAYS = 2      # Today + N days keep their plan (call sheets are out)
+DEFAULT_WINDOW_DAYS = 10     # Unfrozen days re-planned after the removed day
+DEFAULT_CHURN_COST = 400     # Per scene moved off its current day
+
+
+class _RepairSearch(_AnnealingSearch):
+    """Annealing over the repair window, penalizing scenes leaving their current day"""
+
+    def __init__(self, optimizer, days, home, churn_cost, **kwargs):
+        # home: window day index per scene (flattened like `days`), None for displaced scenes
+        self.home = home
+        self.churn_cost = churn_cost
+        super().__init__(optimizer, days, **kwargs)
+
+    def _local_cost(self, days, casts, scenes):
+        churn = sum(1 for i in scenes if self.home[i] is not None and self.day_of[i] != self.home[i])
+        return super()._local_cost(days, casts, scenes) + self.churn_cost * churn
+
+
+class ScheduleRepair:
+    """
+    Incremental re-plan after a shooting day drops out (cancelled/postponed)
+
+    Completed and running days, days up to today + freeze_days and days
+    with a published call sheet are frozen. The next `window_days` open
+    days are re-planned: the search starts from the current assignment
+    with the displaced scenes placed greedily (same location first), and
+    minimizes location moves, actor days and churn against the existing
+    plan. Days are appended after the schedule only when the window has
+    no room left.
+    """
+
+    def __init__(self, shooting_day, freeze_days=DEFAULT_FREEZE_DAYS, window_days=DEFAULT_WINDOW_DAYS,
+                 max_pages_per_day=8, churn_cost=DEFAULT_CHURN_COST, seed=0):
+        self.shooting_day = shooting_day
+        self.production = shooting_day.production
+        self.freeze_days = freeze_days
+        self.window_days = window_days
+        self.max_pages_per_day = float(max_pages_per_day)
+        self.churn_cost = churn_cost
+        self.seed = seed
+
+    def _window(self, days):
+        """Open days after the removed one in date order, and the number of frozen ones"""
+        freeze_until = timezone.localdate() + timedelta(days=self.freeze_days)
+        published = set(CallSheet.objects.filter(
+            production=self.production, status__in=PUBLISHED_CALL_SHEET_STATUSES
+        ).values_list('date', flat=True))
+        locked_days = set(SceneSchedule.objects.filter(
+            shooting_day__in=days
+        ).exclude(status__in=MOVABLE_STATUSES).values_list('shooting_day_id', flat=True))
+
+        later = [day for day in days if day.shoot_date >= self.shooting_day.shoot_date]
+        window = [
+            day for day in later
+            if day.shoot_date > freeze_until
+            and day.status not in FROZEN_DAY_STATUSES
+            and day.shoot_date not in published
+            and day.pk not in locked_days
+        ]
+        return window[:self.window_days], len(later) - len(window)
+
+    def _extra_days(self, count, days):
+        """Unsaved shooting days appended after the last day of the schedule"""
+        last = ShootingDay.objects.filter(production=self.production).aggregate(
+            date=Max('shoot_date'), number=Max('day_number')
+        )
+        template = days[-1] if days else self.shooting_day
+        dates = get_work_calendar(self.production.pk).work_days(last['date'] + timedelta(days=1), count)
+        return [
+            ShootingDay(
+                production=self.production, shoot_date=shoot_date, day_number=last['number'] + n + 1,
+                general_call=template.general_call, shooting_call=template.shooting_call,
+            )
+            for n, shoot_date in enumerate(dates)
+        ]
+
+    def _warm_start(self, window, entries_by_day, displaced, scenes):
+        """Current assignment plus greedy placement of displaced scenes; adds days when full"""
+        plan = [[scenes[entry.scene_id] for entry in entries_by_day[day.pk]] for day in window]
+        loads = [sum(float(scene.estimated_pages or 0) for scene in day) for day in plan]
+        added = 0
+
+        for entry in sorted(displaced, key=lambda e: -float(scenes[e.scene_id].estimated_pages or 0)):
+            scene = scenes[entry.scene_id]
+            pages = float(scene.estimated_pages or 0)
+            fits = [d for d in range(len(plan)) if loads[d] + pages <= self.max_pages_per_day + 1e-9]
+            if not fits:
+                plan.append([])
+                loads.append(0.0)
+                added += 1
+                fits = [len(plan) - 1]
+            # Same location first, then the emptiest day
+            target = min(fits, key=lambda d: (
+                all(other.location_id != scene.location_id for other in plan[d]), loads[d]
+            ))
+            plan[target].append(scene)
+            loads[target] += pages
+        return plan, added
+
+    def run(self, reason='', user=None, new_status='cancelled', dry_run=False) -> Dict:
+        started = time.perf_counter()
+        days = list(ShootingDay.objects.filter(production=self.production).exclude(
+            pk=self.shooting_day.pk
+        ).exclude(status__in=REMOVED_DAY_STATUSES).order_by('shoot_date', 'day_number'))
+        window, frozen_count = self._window(days)
+
+        entries = list(SceneSchedule.objects.filter(
+            shooting_day__in=[day.pk for day in window] + [self.shooting_day.pk],
+            status__in=MOVABLE_STATUSES,
+        ).order_by('day_order'))
+        entries_by_day = defaultdict(list)
+        for entry in entries:
+            entries_by_day[entry.shooting_day_id].append(entry)
+        displaced = entries_by_day.pop(self.shooting_day.pk, [])
+
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        scenes = {scene.id: scene for scene in optimizer.scenes}
+        plan, added = self._warm_start(window, entries_by_day, displaced, scenes)
+        window = window + self._extra_days(added, days)
+
+        home_day = {entry.scene_id: index for index, day in enumerate(window) for entry in entries_by_day[day.pk]}
+        home = [home_day.get(scene.id) for day in plan for scene in day]
+        search = _RepairSearch(
+            optimizer, plan, home, self.churn_cost,
+            max_pages_per_day=self.max_pages_per_day,
+            location_change_penalty=1000, actor_day_cost=200, seed=self.seed,
+        )
+        initial_cost = search.cost
+        search.run(min(5000, 80 * len(search.scenes)) if search.scenes else 1)
+
+        # Best assignment back onto the window days
+        new_plan = optimizer._order_days(search.best_days())
+
+        entry_by_scene = {entry.scene_id: entry for entry in entries}
+        days_by_id = {day.pk: day for day in window}
+        days_by_id[self.shooting_day.pk] = self.shooting_day
+        old_day = {entry.scene_id: days_by_id[entry.shooting_day_id] for entry in entries}
+        moves = []
+        changed = []
+        for day, scenes_of_day in zip(window, new_plan):
+            start = datetime.combine(day.shoot_date, day.shooting_call)
+            for order, scene in enumerate(scenes_of_day):
+                entry = entry_by_scene[scene.id]
+                estimated_start = start.time()
+                start += entry.estimated_duration
+                if entry.shooting_day_id != day.pk:
+                    moves.append((entry, old_day[scene.id], day))
+                if (entry.shooting_day_id, entry.day_order, entry.estimated_start) != (day.pk, order, estimated_start):
+                    entry.shooting_day = day
+                    entry.day_order = order
+                    entry.estimated_start = estimated_start
+                    changed.append(entry)
+
+        result = {
+            'moves': [
+                {
+                    'scene': entry.scene_id,
+                    'scene_number': scenes[entry.scene_id].scene_number,
+                    'from_day': source.day_number, 'from_date': source.shoot_date,
+                    'to_day': target.day_number, 'to_date': target.shoot_date,
+                }
+                for entry, source, target in moves
+            ],
+            'displaced_scenes': len(displaced),
+            'churn': sum(1 for entry, source, target in moves if source.pk != self.shooting_day.pk),
+            'window': [day.shoot_date for day in window],
+            'frozen_days': frozen_count,
+            'days_added': added,
+            'initial_cost': initial_cost,
+            'cost': search.best_cost,
+            'dry_run': dry_run,
+        }
+        if not dry_run:
+            self._write(window[len(window) - added:], changed, moves, reason, user, new_status)
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+    @transaction.atomic
+    def _write(self, new_days, changed, moves, reason, user, new_status):
+        reason = reason or f'Day {self.shooting_day.day_number} {new_status}'
+        old_status = self.shooting_day.status
+        self.shooting_day.status = new_status
+        self.shooting_day.save(update_fields=['status', 'updated_at'])
+        ShootingDay.objects.bulk_create(new_days)
+
+        with deferred_day_totals():
+            SceneSchedule.objects.bulk_update(changed, ['shooting_day', 'day_order', 'estimated_start'])
+            touch_days({self.shooting_day.pk} | {entry.shooting_day_id for entry in changed}
+                       | {source.pk for _, source, _ in moves})
+
+        changes = [ScheduleChange(
+            production=self.production, change_type='day_cancelled', shooting_day=self.shooting_day,
+            old_value=old_status, new_value=new_status, reason=reason, changed_by=user,
+        )]
+        changes += [
+            ScheduleChange(
+                production=self.production, change_type='day_added', shooting_day=day,
+                new_value=f'Day {day.day_number} ({day.shoot_date})', reason=reason, changed_by=user,
+            ) for day in new_days
+        ]
+        changes += [
+            ScheduleChange(
+                production=self.production, change_type='scene_moved', shooting_day=target,
+                scene_id=entry.scene_id,
+                old_value=f'Day {source.day_number} ({source.shoot_date})',
+                new_value=f'Day {target.day_number} ({target.shoot_date})',
+                reason=reason, changed_by=user,
+            ) for entry, source, target in moves
+        ]
+        ScheduleChange.objects.bulk_create(changes)
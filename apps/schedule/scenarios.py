@@ -0,0 +1,141 @@
+# apps/schedule/scenarios.py
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from .jobs import ENGINES, serialize_schedule
+from .optimizer import ProductionScheduleOptimizer
+from .workers import init_worker
+
+# Optimizer attributes loaded from the database, shared by all scenarios
+SHARED_ATTRIBUTES = ('production', 'scenes', 'incidence', 'crew', 'locations', 'distances', 'calendar')
+
+# Named scenarios used when the client does not send its own
+PRESET_SCENARIOS = [
+    {'name': 'fewest_moves', 'engine': 'heuristic',
+     'constraints': {'location_change_penalty': 3000, 'actor_day_cost': 100}},
+    {'name': 'fewest_actor_days', 'engine': 'heuristic',
+     'constraints': {'location_change_penalty': 500, 'actor_day_cost': 600}},
+    {'name': 'fewest_hold_days', 'engine': 'heuristic',
+     'constraints': {'hold_day_cost': 600}},
+    {'name': 'balanced', 'engine': 'heuristic', 'constraints': {}},
+    # No weather preset: _get_weather_forecast is still a random stub
+]
+
+# Compared with common weights, so scenarios with different penalties stay comparable
+PARETO_KEYS = ('objective', 'location_changes', 'hold_days')
+
+_problem = None  # Worker-local optimizer state, see _load_problem
+
+
+def _load_problem(payload: bytes):
+    global _problem
+    _problem = pickle.loads(payload)
+
+
+def _run_scenario(scenario: Dict, start_date, time_budget) -> Dict:
+    """Worker task: solve on the problem data received by _load_problem"""
+    return solve_scenario(_problem, scenario, start_date, time_budget)
+
+
+def solve_scenario(problem: Dict, scenario: Dict, start_date, time_budget=None) -> Dict:
+    """Solve one scenario on preloaded problem data (no DB access)"""
+    optimizer_class, fixed_constraints = ENGINES[scenario['engine']]
+    optimizer = optimizer_class.__new__(optimizer_class)
+    optimizer.__dict__.update(problem)
+    optimizer.model_stats = {}
+    optimizer.progress_callback = None
+
+    constraints = dict(scenario.get('constraints') or {}, **fixed_constraints)
+    if time_budget:
+        constraints.setdefault('time_limit', time_budget)
+
+    started = time.perf_counter()
+    schedule = optimizer.optimize_schedule(start_date, constraints)
+    return {
+        'name': scenario['name'],
+        'engine': scenario['engine'],
+        'constraints': scenario.get('constraints') or {},
+        'seconds': round(time.perf_counter() - started, 3),
+        'scenario_objective': optimizer.objective_value,
+        **optimizer.evaluate_schedule(schedule),
+        'model_stats': optimizer.model_stats,
+        'schedule': serialize_schedule(schedule),
+    }
+
+
+def pareto_front(results: List[Dict], keys=PARETO_KEYS) -> List[Dict]:
+    """Results not dominated on all keys (lower is better) by another result"""
+    def dominates(a, b):
+        return all(a[k] <= b[k] for k in keys) and any(a[k] < b[k] for k in keys)
+
+    return [r for r in results if not any(dominates(other, r) for other in results)]
+
+
+class ScenarioExplorer:
+    """
+    Run several optimizer scenarios of one production in parallel
+
+    The problem data (scenes, incidence, crew, locations, distances, work
+    calendar) is loaded once and pickled into each worker's initializer,
+    so a scenario only ships its constraints. Workers are spawned processes that never touch the
+    database; workers=1 runs in-process. The API runs explorations as
+    background jobs (engine 'scenarios', see schedule.jobs.execute_job).
+    """
+
+    def __init__(self, production):
+        base = ProductionScheduleOptimizer(production)
+        self.problem = {key: getattr(base, key) for key in SHARED_ATTRIBUTES}
+
+    def run(self, scenarios: List[Dict], start_date, time_budget=None, workers=None,
+            progress_callback=None) -> Dict:
+        """
+        Returns {'scenarios': [result], 'pareto': [scenario name], 'workers', 'seconds'}
+
+        Each result carries the scenario evaluation under common weights
+        (objective, location_changes, actor_days, hold_days) and its schedule.
+        progress_callback(progress) is called after every finished scenario;
+        an exception it raises cancels the scenarios not started yet.
+        """
+        workers = max(1, min(workers or os.cpu_count() or 1, len(scenarios)))
+        started = time.perf_counter()
+
+        def finished(count, result):
+            if progress_callback is not None:
+                progress_callback({
+                    'phase': 'scenarios', 'completed': count, 'scenarios': len(scenarios),
+                    'name': result['name'], 'objective': result['objective'],
+                })
+
+        if workers == 1:
+            results = []
+            for scenario in scenarios:
+                results.append(solve_scenario(self.problem, scenario, start_date, time_budget))
+                finished(len(results), results[-1])
+        else:
+            payload = pickle.dumps(self.problem, protocol=pickle.HIGHEST_PROTOCOL)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=('apps.schedule.scenarios._load_problem', payload),
+            ) as pool:
+                futures = [pool.submit(_run_scenario, scenario, start_date, time_budget) for scenario in scenarios]
+                try:
+                    for count, future in enumerate(as_completed(futures), 1):
+                        finished(count, future.result())
+                except BaseException:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                results = [future.result() for future in futures]
+
+        return {
+            'scenarios': results,
+            'pareto': [result['name'] for result in pareto_front(results)],
+            'workers': workers,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+
@@ -1,11 +1,16 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import (
     ShootingDay, SceneSchedule, DayBreak, StatusUpdate,
-    ProductionCalendar, ScheduleChange
+    ProductionCalendar, ScheduleChange, OptimizationJob
 )
+from apps.production.models import Production
+from .services import refresh_day_totals
+
+MAX_SCENARIOS = 12
 
 class DayBreakSerializer(serializers.ModelSerializer):
     class Meta:
@@ -47,8 +52,8 @@ class SceneScheduleDetailSerializer(serializers.ModelSerializer):
 class ShootingDayListSerializer(serializers.ModelSerializer):
     production_title = serializers.CharField(source='production.title', read_only=True)
     location_name = serializers.CharField(source='primary_location.name', read_only=True)
-    total_scenes = serializers.ReadOnlyField()
-    total_pages = serializers.ReadOnlyField()
+    total_scenes = serializers.IntegerField(source='scene_count', read_only=True)
+    total_pages = serializers.DecimalField(source='page_total', max_digits=6, decimal_places=2, read_only=True)
     
     class Meta:
         model = ShootingDay
@@ -74,7 +79,7 @@ class ShootingDayDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShootingDay
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'scene_count', 'page_total']
     
     def create(self, validated_data):
         scenes_data = validated_data.pop('scenes', [])
@@ -83,12 +88,16 @@ class ShootingDayDetailSerializer(serializers.ModelSerializer):
             shooting_day = ShootingDay.objects.create(**validated_data)
             
             # Create scene schedules
-            for order, scene_data in enumerate(scenes_data, 1):
-                SceneSchedule.objects.create(
+            SceneSchedule.objects.bulk_create([
+                SceneSchedule(
                     shooting_day=shooting_day,
                     day_order=order,
                     **scene_data
                 )
+                for order, scene_data in enumerate(scenes_data, 1)
+            ])
+            refresh_day_totals([shooting_day.id])
+            shooting_day.refresh_from_db(fields=['scene_count', 'page_total'])
         
         return shooting_day
 
@@ -115,14 +124,8 @@ class ProductionCalendarSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_total_shooting_days(self, obj):
-        # Calculate working days between principal start and end
-        current = obj.principal_start
-        count = 0
-        while current <= obj.principal_end:
-            if obj.is_work_day(current):
-                count += 1
-            current += timedelta(days=1)
-        return count
+        # Working days between principal start and end
+        return obj.work_calendar.count(obj.principal_start, obj.principal_end)
 
 class ScheduleChangeSerializer(serializers.ModelSerializer):
     changed_by_name = serializers.CharField(source='changed_by.get_full_name', read_only=True)
@@ -132,4 +135,97 @@ class ScheduleChangeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScheduleChange
         fields = '__all__'
-        read_only_fields = ['id', 'changed_at']
\ No newline at end of file
+        read_only_fields = ['id', 'changed_at']
+
+class OptimizationJobSerializer(serializers.ModelSerializer):
+    """Job state; the schedule itself is served by the result action"""
+    time_budget = serializers.IntegerField(min_value=1, required=False)
+    
+    class Meta:
+        model = OptimizationJob
+        exclude = ['result']
+        read_only_fields = [
+            'id', 'status', 'cancel_requested', 'progress', 'evaluation', 'model_stats',
+            'error', 'created_by', 'created_at', 'started_at', 'finished_at', 'applied_at'
+        ]
+    
+    def validate_time_budget(self, value):
+        if value > settings.OPTIMIZER_MAX_TIME_BUDGET:
+            raise serializers.ValidationError(
+                f"Maximum time budget is {settings.OPTIMIZER_MAX_TIME_BUDGET} seconds"
+            )
+        return value
+    
+    def validate_constraints(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Constraints must be an object")
+        return value
+    
+    def validate_engine(self, value):
+        if value == 'scenarios':
+            raise serializers.ValidationError("Submit scenario explorations through the scenarios action")
+        return value
+
+
+class ScenarioSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=50)
+    engine = serializers.ChoiceField(
+        choices=[choice for choice in OptimizationJob.ENGINE_CHOICES if choice[0] != 'scenarios'],
+        default='heuristic'
+    )
+    constraints = serializers.DictField(required=False, default=dict)
+
+
+class ScenarioExplorationSerializer(serializers.Serializer):
+    """Input of OptimizationJobViewSet.scenarios; presets are used without scenarios"""
+    production = serializers.PrimaryKeyRelatedField(queryset=Production.objects.all())
+    start_date = serializers.DateField()
+    scenarios = ScenarioSerializer(many=True, required=False)
+    time_budget = serializers.IntegerField(min_value=1, default=60)
+    workers = serializers.IntegerField(min_value=1, required=False)
+    
+    def validate_scenarios(self, value):
+        if not 1 <= len(value) <= MAX_SCENARIOS:
+            raise serializers.ValidationError(f"Send 1 to {MAX_SCENARIOS} scenarios")
+        names = [scenario['name'] for scenario in value]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError("Scenario names must be unique")
+        return value
+    
+    def validate_time_budget(self, value):
+        if value > settings.OPTIMIZER_MAX_TIME_BUDGET:
+            raise serializers.ValidationError(
+                f"Maximum time budget is {settings.OPTIMIZER_MAX_TIME_BUDGET} seconds"
+            )
+        return value
+
+
+class ScheduleRepairSerializer(serializers.Serializer):
+    """Input of ShootingDayViewSet.reschedule"""
+    status = serializers.ChoiceField(choices=['cancelled', 'postponed'], default='cancelled')
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+    freeze_days = serializers.IntegerField(min_value=0, default=2)
+    window_days = serializers.IntegerField(min_value=1, max_value=60, default=10)
+    max_pages_per_day = serializers.DecimalField(max_digits=4, decimal_places=2, min_value=1, default=8)
+    churn_cost = serializers.IntegerField(min_value=0, default=400)
+    dry_run = serializers.BooleanField(default=False)
+
+
+class DayOrderSerializer(serializers.Serializer):
+    shooting_day = serializers.UUIDField()
+    entries = serializers.ListField(child=serializers.UUIDField(), allow_empty=True)
+
+
+class BulkMoveSerializer(serializers.Serializer):
+    """Input of SceneScheduleViewSet.bulk_move"""
+    days = DayOrderSerializer(many=True)
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+    retime = serializers.BooleanField(default=False)
+    
+    def validate_days(self, value):
+        if not value:
+            raise serializers.ValidationError("Send the new order of at least one day")
+        day_ids = [day['shooting_day'] for day in value]
+        if len(set(day_ids)) != len(day_ids):
+            raise serializers.ValidationError("Each day can be listed once")
+        return value
@@ -0,0 +1,182 @@
+# apps/schedule/services.py
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterable
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import ShootingDay, SceneSchedule
+
+
+def _day_totals() -> Dict:
+    """Correlated subqueries computing scene_count/page_total of a ShootingDay row"""
+    entries = SceneSchedule.objects.filter(
+        shooting_day=OuterRef('pk')
+    ).order_by().values('shooting_day')
+
+    return {
+        'scene_count': Coalesce(
+            Subquery(entries.annotate(count=Count('pk')).values('count')),
+            Value(0), output_field=IntegerField()
+        ),
+        'page_total': Coalesce(
+            Subquery(entries.annotate(pages=Sum('scene__estimated_pages')).values('pages')),
+            Value(0), output_field=DecimalField(max_digits=6, decimal_places=2)
+        ),
+    }
+
+
+def refresh_day_totals(day_ids: Iterable) -> int:
+    """
+    Recompute stored scene_count/page_total of the given shooting days
+
+    One UPDATE regardless of how many days or scenes are involved. Call
+    after bulk operations that bypass the SceneSchedule signals
+    (bulk_create, queryset update/delete).
+    """
+    day_ids = {day_id for day_id in day_ids if day_id is not None}
+    if not day_ids:
+        return 0
+    return ShootingDay.objects.filter(pk__in=day_ids).update(**_day_totals())
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_day_totals():
+    """
+    Batch day total/progress refreshes of SceneSchedule signals
+
+    Inside the block touched days are only collected (see touch_days) and
+    refreshed with one UPDATE on exit, so bulk writes that still fire
+    per-row signals (queryset delete) do not pay one UPDATE per row.
+    Nested blocks join the outermost one.
+    """
+    if getattr(_deferred, 'day_ids', None) is not None:
+        yield _deferred.day_ids
+        return
+    
+    _deferred.day_ids = set()
+    try:
+        yield _deferred.day_ids
+        day_ids = _deferred.day_ids
+    finally:
+        _deferred.day_ids = None
+    refresh_day_totals(day_ids)
+    invalidate_progress(day_ids)
+
+
+def touch_days(day_ids: Iterable):
+    """Shooting days whose scenes changed: refresh now, or on exit of deferred_day_totals"""
+    day_ids = {day_id for day_id in day_ids if day_id is not None}
+    pending = getattr(_deferred, 'day_ids', None)
+    if pending is not None:
+        pending.update(day_ids)
+        return
+    refresh_day_totals(day_ids)
+    invalidate_progress(day_ids)
+
+
+def stale_day_totals(queryset=None):
+    """Shooting days whose stored totals differ from the schedule"""
+    totals = _day_totals()
+    queryset = (queryset if queryset is not None else ShootingDay.objects.all()).annotate(
+        actual_scene_count=totals['scene_count'],
+        actual_page_total=totals['page_total'],
+    )
+    return [
+        day for day in queryset
+        if day.scene_count != day.actual_scene_count or day.page_total != day.actual_page_total
+    ]
+
+
+# -- progress ----------------------------------------------------------
+
+# Polled every few seconds by the 1st AD; a short TTL bounds staleness even
+# for writes that bypass the invalidating signals
+PROGRESS_CACHE_TIMEOUT = 15
+
+
+def _day_progress_key(shooting_day_id):
+    return f'day_progress_{shooting_day_id}'
+
+
+def _schedule_overview_key(production_id):
+    return f'schedule_overview_{production_id}'
+
+
+def progress_by_day(**filters) -> Dict:
+    """
+    Scene counts and page sums by status per shooting day
+
+    One GROUP BY over SceneSchedule with conditional aggregates;
+    filters narrow the SceneSchedule rows (e.g. shooting_day_id=...).
+    """
+    pages = Coalesce(
+        Sum('scene__estimated_pages'), Value(Decimal('0')),
+        output_field=DecimalField(max_digits=8, decimal_places=2)
+    )
+    completed_pages = Coalesce(
+        Sum('scene__estimated_pages', filter=Q(status='completed')), Value(Decimal('0')),
+        output_field=DecimalField(max_digits=8, decimal_places=2)
+    )
+    rows = SceneSchedule.objects.filter(**filters).order_by().values('shooting_day').annotate(
+        total_scenes=Count('pk'),
+        completed_scenes=Count('pk', filter=Q(status='completed')),
+        in_progress_scenes=Count('pk', filter=Q(status='shooting')),
+        total_pages=pages,
+        completed_pages=completed_pages,
+    )
+    return {row.pop('shooting_day'): row for row in rows}
+
+
+def day_progress(shooting_day_id) -> Dict:
+    """Progress payload of one shooting day (cached)"""
+    key = _day_progress_key(shooting_day_id)
+    progress = cache.get(key)
+    if progress is not None:
+        return progress
+
+    totals = progress_by_day(shooting_day_id=shooting_day_id).get(shooting_day_id, {
+        'total_scenes': 0, 'completed_scenes': 0, 'in_progress_scenes': 0,
+        'total_pages': Decimal('0'), 'completed_pages': Decimal('0'),
+    })
+    total_scenes = totals['total_scenes']
+    completed_scenes = totals['completed_scenes']
+
+    progress = {
+        'total_scenes': total_scenes,
+        'completed_scenes': completed_scenes,
+        'in_progress_scenes': totals['in_progress_scenes'],
+        'scenes_remaining': total_scenes - completed_scenes,
+        'total_pages': totals['total_pages'],
+        'completed_pages': totals['completed_pages'],
+        'pages_remaining': totals['total_pages'] - totals['completed_pages'],
+        'completion_percentage': (completed_scenes / total_scenes * 100) if total_scenes > 0 else 0
+    }
+    cache.set(key, progress, PROGRESS_CACHE_TIMEOUT)
+    return progress
+
+
+def schedule_overview_counts(production_id) -> Dict:
+    """Shooting day counts of a production by status (cached)"""
+    key = _schedule_overview_key(production_id)
+    counts = cache.get(key)
+    if counts is None:
+        counts = ShootingDay.objects.filter(production_id=production_id).aggregate(
+            total_days=Count('pk'),
+            completed_days=Count('pk', filter=Q(status='completed')),
+        )
+        cache.set(key, counts, PROGRESS_CACHE_TIMEOUT)
+    return counts
+
+
+def invalidate_progress(shooting_day_ids=(), production_id=None):
+    keys = [_day_progress_key(day_id) for day_id in shooting_day_ids if day_id is not None]
+    if production_id is not None:
+        keys.append(_schedule_overview_key(production_id))
+    cache.delete_many(keys)
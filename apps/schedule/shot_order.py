@@ -0,0 +1,189 @@
+# apps/schedule/shot_order.py
+"""
+Shot order of a shooting day by setup changes
+
+Shots of all the day's scenes are sequenced as an open asymmetric TSP over
+setup-change minutes: company moves, scene (cast/continuity) changes,
+relighting, camera moves, going wider after tighter sizes and building
+crane/drone rigs. Nearest neighbour from a few starts, then 2-opt whose
+moves are all evaluated at once with prefix sums, so a day of ~100 shots
+takes a few milliseconds.
+"""
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from apps.production.models import Shot
+from .models import SceneSchedule, ShootingDay
+
+# Frame size from wide to tight; rigs shoot wide
+SHOT_SIZE = {
+    'MASTER': 0, 'WS': 0, 'CRANE': 0, 'DRONE': 0, 'TRACKING': 1,
+    'TWO_SHOT': 2, 'MS': 2, 'OTS': 3, 'POV': 3, 'CU': 4, 'ECU': 5, 'INSERT': 5,
+}
+RIG_TYPES = ('CRANE', 'DRONE')
+
+# Minutes of setup change between consecutive shots
+RESET_MINUTES = {
+    'location': 60,     # Company move
+    'scene': 10,        # Cast, wardrobe, continuity
+    'lighting': 30,     # Relight (different lighting_notes)
+    'camera': 10,       # New camera position (different camera_notes)
+    'widen': 8,         # Per frame size step back out (flags, nets, lights in frame)
+    'tighten': 2,       # Per frame size step in
+    'rig_build': 45,    # Crane/drone rigged
+    'rig_wrap': 15,
+}
+
+NEAREST_NEIGHBOUR_STARTS = 8
+
+
+def _codes(values: Sequence) -> np.ndarray:
+    return np.unique(np.array(values, dtype=object).astype(str), return_inverse=True)[1]
+
+
+def setup_costs(shots: Sequence[Dict], minutes: Dict = RESET_MINUTES) -> np.ndarray:
+    """
+    Setup-change minutes between shots, c[a, b] = going from shot a to b
+
+    shots are dicts with scene_id, location_id, shot_type, camera_notes and
+    lighting_notes. Empty lighting notes mean the scene's lighting, empty
+    camera notes a camera position of its own.
+    """
+    def key(shot, field, fallback):
+        note = ' '.join((shot[field] or '').lower().split())
+        return note or fallback
+
+    scene = _codes([shot['scene_id'] for shot in shots])
+    location = _codes([shot['location_id'] for shot in shots])
+    lighting = _codes([key(shot, 'lighting_notes', f"scene {shot['scene_id']}") for shot in shots])
+    camera = _codes([key(shot, 'camera_notes', f"shot {i}") for i, shot in enumerate(shots)])
+    size = np.array([SHOT_SIZE.get(shot['shot_type'], 2) for shot in shots])
+    rig = np.array([
+        shot['shot_type'] if shot['shot_type'] in RIG_TYPES else '' for shot in shots
+    ], dtype=object)
+
+    def differs(codes):
+        return codes[:, None] != codes[None, :]
+
+    step = size[None, :] - size[:, None]
+    rig_changes = differs(rig)
+    costs = (
+        minutes['location'] * differs(location)
+        + minutes['scene'] * differs(scene)
+        + minutes['lighting'] * differs(lighting)
+        + minutes['camera'] * differs(camera)
+        + minutes['widen'] * np.maximum(-step, 0)
+        + minutes['tighten'] * np.maximum(step, 0)
+        + minutes['rig_build'] * (rig_changes & (rig != '')[None, :])
+        + minutes['rig_wrap'] * (rig_changes & (rig != '')[:, None])
+    ).astype(float)
+    np.fill_diagonal(costs, 0)
+    return costs
+
+
+def path_cost(costs: np.ndarray, order: Sequence[int]) -> float:
+    order = np.asarray(order)
+    return float(costs[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def _nearest_neighbour(costs: np.ndarray, head: int) -> List[int]:
+    n = len(costs)
+    visited = np.zeros(n, dtype=bool)
+    order = [head]
+    visited[head] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, costs[order[-1]])
+        order.append(int(row.argmin()))
+        visited[order[-1]] = True
+    return order
+
+
+def two_opt(costs: np.ndarray, order: Sequence[int], max_rounds: int = 1000) -> List[int]:
+    """
+    Best-improvement 2-opt of an open path with asymmetric costs
+
+    Reversing order[i..j] changes the two boundary edges and flips the
+    direction of every edge inside; with prefix sums of the forward and
+    backward edge costs all O(n^2) candidate moves are priced in one pass.
+    """
+    order = np.asarray(order)
+    n = len(order)
+    if n < 3:
+        return order.tolist()
+    i, j = np.triu_indices(n, k=1)
+    for _ in range(max_rounds):
+        forward = np.concatenate([[0], np.cumsum(costs[order[:-1], order[1:]])])
+        backward = np.concatenate([[0], np.cumsum(costs[order[1:], order[:-1]])])
+        before, after = order[np.maximum(i - 1, 0)], order[np.minimum(j + 1, n - 1)]
+        delta = (backward[j] - backward[i]) - (forward[j] - forward[i])
+        delta += np.where(i > 0, costs[before, order[j]] - costs[before, order[i]], 0)
+        delta += np.where(j < n - 1, costs[order[i], after] - costs[order[j], after], 0)
+        best = int(delta.argmin())
+        if delta[best] > -1e-9:
+            break
+        order = np.concatenate([order[:i[best]], order[i[best]:j[best] + 1][::-1], order[j[best] + 1:]])
+    return order.tolist()
+
+
+def sequence_shots(costs: np.ndarray, starts: Sequence[int] = None) -> List[int]:
+    """Cheapest open path found from NEAREST_NEIGHBOUR_STARTS heads, then 2-opt"""
+    n = len(costs)
+    if n < 2:
+        return list(range(n))
+    if starts is None:
+        starts = np.linspace(0, n - 1, min(n, NEAREST_NEIGHBOUR_STARTS)).astype(int)
+    candidates = [_nearest_neighbour(costs, int(head)) for head in dict.fromkeys(starts)]
+    best = min(candidates, key=lambda order: path_cost(costs, order))
+    return two_opt(costs, best)
+
+
+def day_shot_order(shooting_day: ShootingDay) -> Dict:
+    """
+    Suggested order of the day's shots not yet completed
+
+    The current order is the day's scene order and shot_number within a
+    scene; saved_minutes compares its setup changes with the suggestion.
+    """
+    scene_order = dict(
+        SceneSchedule.objects.filter(shooting_day=shooting_day).values_list('scene_id', 'day_order')
+    )
+    shots = list(
+        Shot.objects.filter(scene_id__in=list(scene_order)).exclude(status='completed').values(
+            'id', 'scene_id', 'scene__scene_number', 'scene__location_id', 'shot_number',
+            'shot_type', 'camera_notes', 'lighting_notes',
+        )
+    )
+    for shot in shots:
+        shot['location_id'] = shot.pop('scene__location_id')
+    shots.sort(key=lambda shot: (scene_order[shot['scene_id']], shot['shot_number']))
+
+    costs = setup_costs(shots)
+    current = list(range(len(shots)))
+    # Heads: the current first shot and the widest shots
+    widest = sorted(current, key=lambda i: (SHOT_SIZE.get(shots[i]['shot_type'], 2), i))
+    suggested = sequence_shots(costs, [0] + widest[:NEAREST_NEIGHBOUR_STARTS - 1]) if shots else []
+    # Never suggest something worse than improving the current order
+    polished = two_opt(costs, current)
+    if path_cost(costs, polished) < path_cost(costs, suggested):
+        suggested = polished
+    current_minutes = path_cost(costs, current)
+    suggested_minutes = path_cost(costs, suggested)
+
+    return {
+        'shooting_day': str(shooting_day.pk),
+        'shots': [
+            {
+                'id': shots[i]['id'],
+                'scene': shots[i]['scene_id'],
+                'scene_number': shots[i]['scene__scene_number'],
+                'shot_number': shots[i]['shot_number'],
+                'shot_type': shots[i]['shot_type'],
+                'reset_minutes': float(costs[previous, i]) if previous is not None else 0.0,
+            }
+            for previous, i in zip([None] + suggested[:-1], suggested)
+        ],
+        'current_reset_minutes': current_minutes,
+        'suggested_reset_minutes': suggested_minutes,
+        'saved_minutes': current_minutes - suggested_minutes,
+    }
@@ -0,0 +1,71 @@
+# apps/schedule/signals.py
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from apps.production.models import Scene
+from apps.crew.models import Character
+from .incidence import invalidate_incidence
+from .models import ProductionCalendar, SceneSchedule, ShootingDay
+from .services import invalidate_progress, touch_days
+from .workdays import invalidate_work_calendar
+
+
+@receiver(m2m_changed, sender=Scene.characters.through)
+def scene_characters_changed(sender, instance, action, **kwargs):
+    """Scene <-> character links changed from either side"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_incidence(instance.production_id)
+
+
+@receiver(post_save, sender=Scene)
+@receiver(post_delete, sender=Scene)
+@receiver(post_save, sender=Character)
+@receiver(post_delete, sender=Character)
+def scene_or_character_changed(sender, instance, **kwargs):
+    """New/removed scenes and recast characters change the incidence"""
+    invalidate_incidence(instance.production_id)
+
+
+@receiver(post_save, sender=SceneSchedule)
+def scene_schedule_timed(sender, instance, **kwargs):
+    """A finished scene is new training data for the duration model"""
+    if instance.actual_start and instance.actual_end:
+        cache.delete(f'scene_duration_model_{instance.shooting_day.production_id}')
+
+
+@receiver(post_init, sender=SceneSchedule)
+def scene_schedule_loaded(sender, instance, **kwargs):
+    """Remember the day so a move can refresh both days"""
+    instance._loaded_shooting_day_id = instance.shooting_day_id
+
+
+@receiver(post_save, sender=SceneSchedule)
+@receiver(post_delete, sender=SceneSchedule)
+def scene_schedule_changed(sender, instance, **kwargs):
+    """Keep ShootingDay.scene_count/page_total and day progress in sync"""
+    touch_days({instance.shooting_day_id, instance._loaded_shooting_day_id})
+    instance._loaded_shooting_day_id = instance.shooting_day_id
+
+
+@receiver(post_save, sender=Scene)
+def scene_pages_changed(sender, instance, created, **kwargs):
+    """Page count of a scheduled scene feeds the day totals"""
+    if not created:
+        touch_days(
+            ShootingDay.objects.filter(scene_schedules__scene=instance).values_list('pk', flat=True)
+        )
+
+
+@receiver(post_save, sender=ShootingDay)
+@receiver(post_delete, sender=ShootingDay)
+def shooting_day_changed(sender, instance, **kwargs):
+    """Day status feeds the production schedule overview"""
+    invalidate_progress([instance.pk], production_id=instance.production_id)
+
+
+@receiver(post_save, sender=ProductionCalendar)
+@receiver(post_delete, sender=ProductionCalendar)
+def production_calendar_changed(sender, instance, **kwargs):
+    """New calendar revision (work week, holidays, blackout dates)"""
+    invalidate_work_calendar(instance.production_id)
@@ -0,0 +1,107 @@
+# apps/schedule/stripboard.py
+"""
+Stripboard export of a whole production
+
+Strips (SceneSchedule rows) are read in schedule order with a server-side
+iterator and joined to scene and location in the same query; cast names
+are looked up per chunk with one query on the scene/character table. At
+most one chunk is in memory, so the export streams in constant memory
+whatever the production size.
+"""
+import csv
+import json
+from itertools import islice
+from typing import Iterator, List, Sequence
+
+from apps.production.models import Scene
+from .dood import Echo
+from .models import SceneSchedule
+
+CHUNK_SIZE = 2000
+
+COLUMNS = (
+    'day_number', 'shoot_date', 'day_order', 'scene_number', 'int_ext', 'location',
+    'location_detail', 'time_of_day', 'pages', 'estimated_start', 'estimated_minutes',
+    'status', 'cast',
+)
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+_QUERY_FIELDS = (
+    'scene_id', 'shooting_day__day_number', 'shooting_day__shoot_date', 'day_order',
+    'scene__scene_number', 'scene__int_ext', 'scene__location__name', 'scene__location_detail',
+    'scene__time_of_day', 'scene__estimated_pages', 'estimated_start', 'estimated_duration', 'status',
+)
+
+
+def _cast(scene_ids) -> dict:
+    """{scene_id: [character names]} for one chunk of strips"""
+    cast = {}
+    for scene_id, name in (
+        Scene.characters.through.objects.filter(scene_id__in=scene_ids)
+        .order_by('character__name').values_list('scene_id', 'character__name')
+    ):
+        cast.setdefault(scene_id, []).append(name)
+    return cast
+
+
+def iter_strips(production_id, chunk_size: int = CHUNK_SIZE) -> Iterator[List]:
+    """
+    Strips of a production in schedule order, one list of COLUMNS values each
+
+    Values are JSON/CSV ready: dates and times as ISO strings, pages as a
+    string (exact decimal), duration in minutes, cast as a list of names.
+    """
+    rows = (
+        SceneSchedule.objects.filter(shooting_day__production_id=production_id)
+        .order_by('shooting_day__shoot_date', 'shooting_day__day_number', 'day_order')
+        .values_list(*_QUERY_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        cast = _cast({row[0] for row in chunk})
+        for (scene_id, day_number, shoot_date, day_order, scene_number, int_ext, location,
+             location_detail, time_of_day, pages, start, duration, status) in chunk:
+            yield [
+                day_number, shoot_date.isoformat(), day_order, scene_number, int_ext, location,
+                location_detail, time_of_day, str(pages), start.isoformat(),
+                round(duration.total_seconds() / 60), status, cast.get(scene_id, []),
+            ]
+
+
+def iter_csv(strips: Iterator[Sequence]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for strip in strips:
+        yield writer.writerow(strip[:-1] + [', '.join(strip[-1])])
+
+
+def iter_ndjson(strips: Iterator[Sequence]) -> Iterator[str]:
+    for strip in strips:
+        yield json.dumps(dict(zip(COLUMNS, strip))) + '\n'
+
+
+def iter_json(strips: Iterator[Sequence]) -> Iterator[str]:
+    """
+    Compact JSON, column names once and each strip as an array
+
+    {"columns": [...], "strips": [[...], ...]}; a column-major layout would
+    need the whole production in memory before the first byte goes out.
+    """
+    yield '{"columns": ' + json.dumps(COLUMNS) + ', "strips": ['
+    for i, strip in enumerate(strips):
+        yield (',' if i else '') + json.dumps(strip)
+    yield ']}'
+
+
+def export_stripboard(production_id, output: str = 'csv') -> Iterator[str]:
+    """Streamed stripboard in one of FORMATS"""
+    writers = {'csv': iter_csv, 'ndjson': iter_ndjson, 'json': iter_json}
+    return writers[output](iter_strips(production_id))
@@ -1,3 +1,1130 @@
+import json
+from collections import defaultdict
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import numpy as np
+import pulp
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.crew.models import Character
+from apps.production.models import Shot
+from .dood import DayOutOfDays, dood_codes
+from .heuristic import HeuristicScheduleOptimizer, _AnnealingSearch
+from . import jobs
+from .moves import longest_kept_order
+from .models import DayBreak, OptimizationJob, ProductionCalendar, ScheduleChange, ShootingDay, SceneSchedule
+from .optimizer import (
+    MAX_WINDOW_DAYS, MIN_WINDOW_DAYS, WINDOW_LOCATION_DAYS, MachineLearningInsights, ProductionScheduleOptimizer
+)
+from .scenarios import ScenarioExplorer, pareto_front
+from .shot_order import RESET_MINUTES, setup_costs
+from .stripboard import COLUMNS, iter_strips
+from .incidence import get_incidence
+from .workdays import get_work_calendar
+from .wrap import WrapPredictor, get_residual_pools, simulate_remaining
+from .management.commands._synthetic import create_synthetic_production
+
+
+class HeuristicScheduleOptimizerTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(60, 6, character_count=8)
+
+    def _run(self, **constraints):
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        schedule = optimizer.optimize_schedule(date(2025, 3, 3), constraints)
+        return optimizer, schedule
+
+    def test_every_scene_scheduled_once_within_page_limit(self):
+        optimizer, schedule = self._run(max_pages_per_day=6, seed=3)
+
+        scene_ids = [entry['scene'].id for day in schedule for entry in day['scenes']]
+        self.assertCountEqual(scene_ids, [scene.id for scene in optimizer.scenes])
+        for day in schedule:
+            if len(day['scenes']) > 1:
+                self.assertLessEqual(float(day['total_pages']), 6)
+
+    def test_deterministic_for_seed_and_reports_objective(self):
+        first, schedule_a = self._run(seed=7)
+        second, schedule_b = self._run(seed=7)
+
+        def layout(schedule):
+            return [[entry['scene'].id for entry in day['scenes']] for day in schedule]
+
+        self.assertEqual(layout(schedule_a), layout(schedule_b))
+        self.assertEqual(first.objective_value, second.objective_value)
+        self.assertLessEqual(first.model_stats['search_cost'], first.model_stats['initial_cost'])
+
+    def test_evaluation_counts_empty_days_like_the_search(self):
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        shared = defaultdict(list)  # (location, cast member) -> scenes
+        for scene in optimizer.scenes:
+            for key in optimizer._scene_cast(scene):
+                shared[(scene.location_id, key)].append(scene)
+        first, second = next(scenes for scenes in shared.values() if len(scenes) > 1)[:2]
+
+        # Day 1 left empty: the cast member is on hold there
+        search = _AnnealingSearch(optimizer, [[first], [], [second]], 8, 1000, 200, seed=0)
+        schedule = optimizer._build_schedule({0: [first], 2: [second]}, date(2025, 3, 3))
+        evaluation = optimizer.evaluate_schedule(schedule)
+        self.assertEqual(evaluation['objective'], search.cost)
+        self.assertEqual(evaluation['shooting_days'], 2)
+
+    def test_company_moves_weighted_by_distance(self):
+        optimizer, schedule = self._run(seed=1)
+        evaluation = optimizer.evaluate_schedule(schedule)
+        self.assertGreater(evaluation['move_km'], 0)
+        self.assertAlmostEqual(
+            evaluation['objective'],
+            1000 * evaluation['location_changes'] + 200 * evaluation['actor_days'] + 20 * evaluation['move_km'],
+            delta=20 * 0.05,
+        )
+
+    def test_empty_days_keep_later_days_in_place(self):
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        first, second = optimizer.scenes[:2]
+        with mock.patch.object(_AnnealingSearch, 'best_days', return_value=[[first], [], [second]]):
+            schedule = optimizer.optimize_schedule(date(2025, 3, 3), {'seed': 1})
+
+        work_days = get_work_calendar(self.production.id).work_days(date(2025, 3, 3), 3)
+        self.assertEqual([day['date'] for day in schedule], [work_days[0], work_days[2]])
+
+    def test_incremental_state_matches_recount(self):
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        search = _AnnealingSearch(optimizer, optimizer._pack_days(6), 6, 1000, 200, seed=5, hold_day_cost=50)
+        search.run(3000)
+
+        self.assertAlmostEqual(search.cost, search._total_cost(), places=6)
+        for c, counts in enumerate(search.cast_counts):
+            worked = [day for day, count in enumerate(counts) if count]
+            self.assertEqual((search.cast_first[c], search.cast_last[c]), (worked[0], worked[-1]) if worked else (-1, -1))
+            self.assertEqual(search.cast_work[c], len(worked))
+
+
+class CompactOptimizerTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(40, 4, character_count=6)
+
+    def _run(self, **constraints):
+        optimizer = ProductionScheduleOptimizer(self.production)
+        schedule = optimizer.optimize_schedule(date(2025, 3, 3), dict(constraints, mode='compact'))
+        return optimizer, schedule
+
+    def test_rolling_windows_schedule_every_scene_once(self):
+        optimizer, schedule = self._run(max_pages_per_day=6, window_days=3, time_limit=10)
+
+        scene_ids = [entry['scene'].id for day in schedule for entry in day['scenes']]
+        self.assertCountEqual(scene_ids, [scene.id for scene in optimizer.scenes])
+        for day in schedule:
+            self.assertLessEqual(float(day['total_pages']), 6)
+        self.assertGreater(optimizer.model_stats['windows'], 1)
+        self.assertIn(optimizer.model_stats['status'], ('optimal', 'best_found'))
+        self.assertEqual(optimizer.model_stats['unscheduled_scenes'], 0)
+
+    def test_window_length_scales_with_locations(self):
+        optimizer, _ = self._run(time_limit=10)
+        self.assertEqual(optimizer.model_stats['window_days'], MAX_WINDOW_DAYS)  # 50 // 4 capped
+
+        many_locations = create_synthetic_production(20, 10, seed=3)
+        optimizer = ProductionScheduleOptimizer(many_locations)
+        optimizer.optimize_schedule(date(2025, 3, 3), {'mode': 'compact', 'time_limit': 10})
+        locations = len({scene.location_id for scene in optimizer.scenes})
+        self.assertEqual(
+            optimizer.model_stats['window_days'],
+            min(MAX_WINDOW_DAYS, max(MIN_WINDOW_DAYS, WINDOW_LOCATION_DAYS // locations))
+        )
+
+    def test_unsolved_window_falls_back_to_packing(self):
+        optimizer = ProductionScheduleOptimizer(self.production)
+        expected = optimizer._pack_days(8)
+        for status, sol_status, constraints in (
+            (pulp.LpStatusInfeasible, pulp.LpSolutionInfeasible, {}),
+            # Time limit hit with an incumbent, but return_best is off
+            (pulp.LpStatusNotSolved, pulp.LpSolutionIntegerFeasible, {'return_best': False}),
+        ):
+            prob = mock.Mock(status=status, sol_status=sol_status)
+            prob.numVariables.return_value = prob.numConstraints.return_value = 0
+            with mock.patch.object(ProductionScheduleOptimizer, '_solve_window', return_value=({}, None, prob)), \
+                    self.assertLogs('apps.schedule.optimizer', 'WARNING'):
+                schedule = optimizer.optimize_schedule(date(2025, 3, 3), dict(constraints, mode='compact'))
+
+            self.assertEqual(optimizer.model_stats['status'], 'fallback')
+            self.assertEqual(
+                [[entry['scene'].id for entry in day['scenes']] for day in schedule],
+                [[scene.id for scene in day] for day in expected]
+            )
+
+
+class WorkCalendarTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(20, 2)
+        self.calendar = ProductionCalendar.objects.create(
+            production=self.production,
+            prep_start=date(2025, 2, 1), prep_end=date(2025, 3, 2),
+            principal_start=date(2025, 3, 3), principal_end=date(2025, 4, 30),
+            wrap_date=date(2025, 5, 10), saturday=True,
+            holidays=['2025-04-18', '2025-04-21'], blackout_dates=['2025-03-12', 'tbd'],
+        )
+
+    def _reference(self, day):
+        """Pravidla původního is_work_day"""
+        return (
+            day.weekday() in self.calendar.work_days
+            and str(day) not in self.calendar.holidays
+            and str(day) not in self.calendar.blackout_dates
+        )
+
+    def test_matches_day_by_day_rules(self):
+        work_calendar = get_work_calendar(self.production.id)
+        days = [date(2025, 3, 1) + timedelta(days=n) for n in range(90)]
+        expected = [self._reference(day) for day in days]
+
+        self.assertEqual(work_calendar.mask(days[0], days[-1]).tolist(), expected)
+        self.assertEqual(work_calendar.count(days[0], days[-1]), sum(expected))
+        self.assertEqual(work_calendar.work_days(days[0], 10), [d for d, ok in zip(days, expected) if ok][:10])
+        # Friday + 1 work day = Saturday, + 2 skips Sunday
+        self.assertEqual(work_calendar.offset(date(2025, 3, 7), 2), date(2025, 3, 10))
+        self.assertEqual(work_calendar.offset(date(2025, 3, 12), 0), date(2025, 3, 13))
+
+    def test_cached_until_calendar_changes(self):
+        get_work_calendar(self.production.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(get_work_calendar(self.production.id).is_work_day(date(2025, 3, 8)))
+
+        self.calendar.saturday = False
+        self.calendar.save()
+        self.assertFalse(get_work_calendar(self.production.id).is_work_day(date(2025, 3, 8)))
+        self.assertFalse(self.calendar.is_work_day(date(2025, 3, 8)))
+
+    def test_optimizer_days_are_work_days(self):
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        schedule = optimizer.optimize_schedule(date(2025, 3, 8), {'max_pages_per_day': 4})
+        dates = [day['date'] for day in schedule]
+
+        self.assertTrue(all(self._reference(day) for day in dates))
+        self.assertEqual(dates, get_work_calendar(self.production.id).work_days(date(2025, 3, 8), len(dates)))
+
+
+class LightWindowTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(6, 2)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        tromso = self.production.locations.create(
+            name='Tromsø', address='Norway', latitude=Decimal('69.65'), longitude=Decimal('18.96'),
+        )
+        for scene, time_of_day in zip(self.scenes[:3], ('NIGHT', 'DAY', 'DUSK')):
+            scene.location, scene.int_ext, scene.time_of_day = tromso, 'EXT', time_of_day
+            scene.save()
+
+    def test_ext_scenes_blocked_without_their_light(self):
+        optimizer = HeuristicScheduleOptimizer(self.production)
+        midsummer = optimizer._light_blocked_days(date(2025, 6, 21), {})
+        midwinter = optimizer._light_blocked_days(date(2025, 12, 21), {})
+        night, day, dusk = (scene.id for scene in self.scenes[:3])
+
+        # Půlnoční slunce: bez noci i soumraku, polární noc: bez denního světla
+        self.assertEqual({scene for scene, days in midsummer.items() if 0 in days}, {night, dusk})
+        self.assertEqual({scene for scene, days in midwinter.items() if 0 in days}, {day})
+        self.assertFalse(set(midsummer) - {night, day, dusk})  # V Praze je světla dost
+
+        optimizer.optimize_schedule(date(2025, 6, 21), {'light_windows': False})
+        self.assertEqual(optimizer.light_blocked, {})
+
+
+class SceneCharacterIncidenceTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(12, 3, character_count=5)
+
+    def test_built_once_and_invalidated_on_m2m_change(self):
+        with self.assertNumQueries(1):
+            incidence = get_incidence(self.production.id)
+        with self.assertNumQueries(0):
+            get_incidence(self.production.id)
+
+        scene = self.production.scenes.first()
+        extra = Character.objects.create(production=self.production, name='Extra')
+        scene.characters.add(extra)
+
+        rebuilt = get_incidence(self.production.id)
+        self.assertIsNot(rebuilt, incidence)
+        self.assertIn(extra.id, rebuilt.scene_characters(scene.id))
+
+    def test_shared_counts_match_sets(self):
+        incidence = get_incidence(self.production.id)
+        scenes = list(self.production.scenes.prefetch_related('characters'))
+        shared = incidence.shared_counts([s.id for s in scenes])
+
+        for i, a in enumerate(scenes):
+            for j, b in enumerate(scenes):
+                expected = len(set(a.characters.all()) & set(b.characters.all()))
+                self.assertEqual(shared[i, j], expected)
+
+
+class DurationPredictionTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(20, 3, character_count=4)
+
+    def test_batch_matches_single_scene_prediction_without_history(self):
+        scenes = self.production.scenes.all()
+        predictions = MachineLearningInsights.predict_durations(scenes)
+
+        for scene in scenes:
+            self.assertEqual(
+                predictions[scene.id],
+                MachineLearningInsights.predict_scene_duration(scene, None)
+            )
+
+    def test_weights_fitted_from_actual_timings(self):
+        day = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 3), day_number=1,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        )
+        weights = [30, 10, 20, 5, 0]
+        scenes = list(self.production.scenes.prefetch_related('characters'))
+        for order, scene in enumerate(scenes):
+            features = [
+                float(scene.estimated_pages), scene.int_ext == 'EXT',
+                scene.time_of_day == 'NIGHT', len(scene.characters.all()), 0,
+            ]
+            minutes = int(round(sum(w * f for w, f in zip(weights, features))))
+            start = 22 * 60  # přes půlnoc
+            end = (start + minutes) % (24 * 60)
+            SceneSchedule.objects.create(
+                shooting_day=day, scene=scene, day_order=order,
+                estimated_start=time(7, 0), estimated_duration=timedelta(minutes=minutes),
+                actual_start=time(start // 60, start % 60), actual_end=time(end // 60, end % 60),
+            )
+
+        model = MachineLearningInsights.fit_duration_model(self.production.id)
+        self.assertEqual(model['samples'], len(scenes))
+        predictions = MachineLearningInsights.predict_durations(self.production.scenes.all())
+        for scene in scenes:
+            entry = scene.schedule_entries.get()
+            expected = entry.estimated_duration.total_seconds() / 60
+            self.assertAlmostEqual(predictions[scene.id]['predicted_minutes'], expected, delta=2)
+
+
+class DayTotalsTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(6, 2)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.days = [
+            ShootingDay.objects.create(
+                production=self.production, shoot_date=date(2025, 3, 3 + n), day_number=n + 1,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            ) for n in range(2)
+        ]
+
+    def _schedule(self, day, scene, order=0):
+        return SceneSchedule.objects.create(
+            shooting_day=day, scene=scene, day_order=order,
+            estimated_start=time(7, 0), estimated_duration=timedelta(hours=1),
+        )
+
+    def _totals(self, day):
+        day.refresh_from_db()
+        return day.scene_count, day.page_total
+
+    def test_totals_follow_save_move_and_delete(self):
+        first, second = self.days
+        pages = [scene.estimated_pages for scene in self.scenes]
+        entry = self._schedule(first, self.scenes[0])
+        self._schedule(first, self.scenes[1], 1)
+        self.assertEqual(self._totals(first), (2, pages[0] + pages[1]))
+
+        entry.shooting_day = second
+        entry.save()
+        self.assertEqual(self._totals(first), (1, pages[1]))
+        self.assertEqual(self._totals(second), (1, pages[0]))
+
+        scene = self.scenes[0]
+        scene.estimated_pages = Decimal('3.50')
+        scene.save()
+        self.assertEqual(self._totals(second), (1, Decimal('3.50')))
+
+        entry.delete()
+        self.assertEqual(self._totals(second), (0, 0))
+
+    def test_list_reads_stored_totals(self):
+        for n, scene in enumerate(self.scenes):
+            self._schedule(self.days[n % 2], scene, n)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+        with self.assertNumQueries(2):  # COUNT + SELECT
+            response = client.get('/api/v1/schedule/shooting-days/', {'production': self.production.id})
+
+        results = response.json()['results']
+        self.assertEqual([day['total_scenes'] for day in results], [3, 3])
+
+    def test_reconcile_fixes_drift(self):
+        self._schedule(self.days[0], self.scenes[0])
+        ShootingDay.objects.filter(pk=self.days[0].pk).update(scene_count=7)
+
+        out = StringIO()
+        call_command('reconcile_day_totals', stdout=out)
+
+        self.assertIn('1 stale shooting days fixed', out.getvalue())
+        self.assertEqual(self._totals(self.days[0])[0], 1)
+
+
+class ProgressTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.production = create_synthetic_production(4, 2)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.days = [
+            ShootingDay.objects.create(
+                production=self.production, shoot_date=date(2025, 3, 3 + n), day_number=n + 1,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            ) for n in range(2)
+        ]
+        self.entries = [
+            SceneSchedule.objects.create(
+                shooting_day=self.days[0], scene=scene, day_order=n,
+                estimated_start=time(7 + n, 0), estimated_duration=timedelta(hours=1),
+            ) for n, scene in enumerate(self.scenes)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def test_day_progress_by_status(self):
+        pages = [scene.estimated_pages for scene in self.scenes]
+        self.entries[0].status = 'completed'
+        self.entries[0].save()
+        self.entries[1].status = 'shooting'
+        self.entries[1].save()
+        url = f'/api/v1/schedule/shooting-days/{self.days[0].pk}/progress/'
+
+        with self.assertNumQueries(2):  # day lookup + one GROUP BY
+            data = self.client.get(url).json()
+
+        self.assertEqual(data['total_scenes'], 4)
+        self.assertEqual(data['completed_scenes'], 1)
+        self.assertEqual(data['in_progress_scenes'], 1)
+        self.assertEqual(data['scenes_remaining'], 3)
+        self.assertEqual(Decimal(str(data['completed_pages'])), pages[0])
+        self.assertEqual(Decimal(str(data['total_pages'])), sum(pages))
+        self.assertEqual(data['completion_percentage'], 25.0)
+
+        with self.assertNumQueries(1):  # cached
+            self.client.get(url)
+
+        # Status change invalidates the cached progress
+        self.entries[1].status = 'completed'
+        self.entries[1].save()
+        self.assertEqual(self.client.get(url).json()['completed_scenes'], 2)
+
+    def test_empty_day(self):
+        data = self.client.get(f'/api/v1/schedule/shooting-days/{self.days[1].pk}/progress/').json()
+        self.assertEqual(data['total_scenes'], 0)
+        self.assertEqual(data['completion_percentage'], 0)
+
+    def test_schedule_overview(self):
+        calendar = ProductionCalendar.objects.create(
+            production=self.production,
+            prep_start=date(2025, 2, 1), prep_end=date(2025, 3, 2),
+            principal_start=date(2025, 3, 3), principal_end=date(2025, 4, 3),
+            wrap_date=date(2025, 4, 10),
+        )
+        url = f'/api/v1/schedule/calendars/{calendar.pk}/schedule_overview/'
+
+        with self.assertNumQueries(2):  # calendar lookup + one aggregate
+            data = self.client.get(url).json()
+        self.assertEqual(data['total_shooting_days'], 2)
+        self.assertEqual(data['completed_days'], 0)
+
+        self.days[0].status = 'completed'
+        self.days[0].save()
+        data = self.client.get(url).json()
+        self.assertEqual(data['completed_days'], 1)
+        self.assertEqual(data['schedule_progress'], 50.0)
+
+
+class OptimizationJobTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(12, 3)
+        self.user = User.objects.create_user('ad', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _job(self, **fields):
+        fields.setdefault('engine', 'heuristic')
+        return OptimizationJob.objects.create(
+            production=self.production, start_date=date(2025, 3, 3),
+            time_budget=30, created_by=self.user, **fields
+        )
+
+    def test_submit_queues_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/api/v1/schedule/optimization-jobs/', {
+                'production': self.production.id, 'engine': 'heuristic',
+                'start_date': '2025-03-03', 'constraints': {'seed': 1},
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertEqual(len(callbacks), 1)
+
+    def test_time_budget_limit(self):
+        response = self.client.post('/api/v1/schedule/optimization-jobs/', {
+            'production': self.production.id, 'start_date': '2025-03-03', 'time_budget': 10 ** 6,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_run_and_apply(self):
+        job = self._job()
+        jobs.execute_job(job.pk)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, 'completed')
+        self.assertIn('objective', job.progress)  # annealing checkpoint
+        scheduled = [entry['scene'] for day in job.result for entry in day['scenes']]
+        self.assertEqual(sorted(scheduled), sorted(self.production.scenes.values_list('id', flat=True)))
+
+        response = self.client.get(f'/api/v1/schedule/optimization-jobs/{job.pk}/result/')
+        self.assertEqual(response.json()['evaluation']['objective'], job.evaluation['objective'])
+
+        response = self.client.post(f'/api/v1/schedule/optimization-jobs/{job.pk}/apply/')
+        self.assertEqual(response.json()['scenes_scheduled'], 12)
+        days = ShootingDay.objects.filter(production=self.production)
+        self.assertEqual(days.count(), len(job.result))
+        self.assertEqual(sum(day.scene_count for day in days), 12)
+
+        # Second apply needs force, replaces the unstarted entries
+        response = self.client.post(f'/api/v1/schedule/optimization-jobs/{job.pk}/apply/')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(f'/api/v1/schedule/optimization-jobs/{job.pk}/apply/', {'force': True})
+        self.assertEqual(response.json()['entries_replaced'], 12)
+        self.assertEqual(response.json()['days_created'], 0)
+        self.assertEqual(SceneSchedule.objects.filter(shooting_day__production=self.production).count(), 12)
+
+    def test_apply_after_entries_that_stay(self):
+        scenes = list(self.production.scenes.order_by('id'))
+        day = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 3), day_number=1,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        )
+        SceneSchedule.objects.create(
+            shooting_day=day, scene=scenes[0], day_order=0, status='shooting',
+            estimated_start=time(7, 0), estimated_duration=timedelta(hours=2),
+        )
+        job = self._job(status='completed', result=[{
+            'date': '2025-03-03', 'primary_location': None, 'scenes': [
+                {'scene': scene.id, 'estimated_start': '08:00', 'estimated_minutes': 60}
+                for scene in scenes[:3]
+            ],
+        }])
+
+        self.assertEqual(jobs.apply_job(job)['scenes_locked'], 1)
+
+        entries = list(day.scene_schedules.order_by('day_order'))
+        self.assertEqual([entry.scene_id for entry in entries], [scene.id for scene in scenes[:3]])
+        self.assertEqual([entry.day_order for entry in entries], [0, 1, 2])
+        self.assertEqual([entry.estimated_start for entry in entries], [time(7, 0), time(9, 0), time(10, 0)])
+
+    def test_cancel_queued(self):
+        job = self._job()
+        response = self.client.post(f'/api/v1/schedule/optimization-jobs/{job.pk}/cancel/')
+        self.assertEqual(response.json()['status'], 'cancelled')
+
+        jobs.execute_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertIsNone(job.result)
+
+    def test_cancel_running(self):
+        job = self._job()
+        start_reporting = jobs._ProgressReporter.__init__
+
+        def cancel_once_started(reporter, running_job):
+            start_reporting(reporter, running_job)
+            OptimizationJob.objects.filter(pk=running_job.pk).update(cancel_requested=True)
+
+        with mock.patch.object(jobs, 'CANCEL_POLL_SECONDS', 0), \
+                mock.patch.object(jobs._ProgressReporter, '__init__', cancel_once_started):
+            jobs.execute_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        self.assertEqual(job.error, 'Cancelled by user')
+
+
+    def test_cancel_full_engine(self):
+        job = self._job(engine='full')
+        start_reporting = jobs._ProgressReporter.__init__
+
+        def cancel_once_started(reporter, running_job):
+            start_reporting(reporter, running_job)
+            OptimizationJob.objects.filter(pk=running_job.pk).update(cancel_requested=True)
+
+        with mock.patch.object(jobs, 'CANCEL_POLL_SECONDS', 0), \
+                mock.patch.object(jobs._ProgressReporter, '__init__', cancel_once_started), \
+                mock.patch('pulp.LpProblem.solve') as solve:
+            jobs.execute_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+        solve.assert_not_called()  # Stopped while building the model
+
+    def test_fail_stale_jobs(self):
+        now = timezone.now()
+        lost = self._job(status='running', started_at=now - timedelta(seconds=30 * 1.2 + 120))
+        alive = self._job(status='running', started_at=now - timedelta(seconds=30))
+        queued = self._job()
+        OptimizationJob.objects.filter(pk=queued.pk).update(created_at=now - timedelta(hours=7))
+
+        call_command('fail_stale_jobs', stdout=StringIO())
+
+        statuses = dict(OptimizationJob.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[job.pk] for job in (lost, alive, queued)], ['failed', 'running', 'failed']
+        )
+
+
+class ScenarioExplorationTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(20, 4, 6)
+        self.scenarios = [
+            {'name': 'moves', 'engine': 'heuristic', 'constraints': {'location_change_penalty': 3000}},
+            {'name': 'actors', 'engine': 'heuristic', 'constraints': {'actor_day_cost': 800}},
+        ]
+
+    def test_pareto_front(self):
+        results = [
+            {'name': 'a', 'objective': 10, 'location_changes': 2, 'hold_days': 5},
+            {'name': 'b', 'objective': 12, 'location_changes': 1, 'hold_days': 5},
+            {'name': 'c', 'objective': 12, 'location_changes': 2, 'hold_days': 5},  # dominated by a
+            {'name': 'd', 'objective': 10, 'location_changes': 2, 'hold_days': 5},  # tie with a
+        ]
+        self.assertEqual([r['name'] for r in pareto_front(results)], ['a', 'b', 'd'])
+
+    def test_pool_matches_in_process(self):
+        explorer = ScenarioExplorer(self.production)
+        serial = explorer.run(self.scenarios, date(2025, 3, 3), workers=1)
+        # Spawned workers only get the pickled problem, never the (test) database
+        parallel = explorer.run(self.scenarios, date(2025, 3, 3), workers=2)
+
+        self.assertEqual(parallel['workers'], 2)
+        for a, b in zip(serial['scenarios'], parallel['scenarios']):
+            self.assertEqual(a['name'], b['name'])
+            self.assertEqual(a['schedule'], b['schedule'])
+        self.assertEqual(serial['pareto'], parallel['pareto'])
+
+    def test_api_uses_presets(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('producer', password='x'))
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = client.post('/api/v1/schedule/optimization-jobs/scenarios/', {
+                'production': str(self.production.id), 'start_date': '2025-03-03', 'time_budget': 10,
+            }, format='json')
+
+        # Queued as a background job, the request does not wait for the solvers
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertEqual(len(callbacks), 1)
+
+        job_id = response.json()['id']
+        jobs.execute_job(job_id)
+        self.assertEqual(OptimizationJob.objects.get(pk=job_id).progress['completed'], 4)
+        response = client.get(f'/api/v1/schedule/optimization-jobs/{job_id}/result/')
+        data = response.json()
+        self.assertEqual(
+            [s['name'] for s in data['scenarios']],
+            ['fewest_moves', 'fewest_actor_days', 'fewest_hold_days', 'balanced']
+        )
+        self.assertTrue(set(data['pareto']) <= {s['name'] for s in data['scenarios']})
+        scene_count = sum(len(day['scenes']) for day in data['scenarios'][0]['schedule'])
+        self.assertEqual(scene_count, 20)
+        self.assertIn(data['evaluation']['best'], {s['name'] for s in data['scenarios']})
+
+        response = client.post(f'/api/v1/schedule/optimization-jobs/{job_id}/apply/')
+        self.assertEqual(response.status_code, 400)
+
+
+class ScheduleRepairTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(24, 3, 4)
+        scenes = list(self.production.scenes.order_by('id'))
+        today = timezone.localdate()
+        # Day 1 is tomorrow (frozen), days 2-6 are open
+        self.days = [
+            ShootingDay.objects.create(
+                production=self.production, shoot_date=today + timedelta(days=1 + n), day_number=n + 1,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            ) for n in range(6)
+        ]
+        for i, scene in enumerate(scenes):
+            scene.estimated_pages = Decimal('1.00')
+            scene.save()
+            SceneSchedule.objects.create(
+                shooting_day=self.days[i // 4], scene=scene, day_order=i % 4,
+                estimated_start=time(7 + i % 4, 0), estimated_duration=timedelta(hours=1),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def _reschedule(self, day, **data):
+        return self.client.post(f'/api/v1/schedule/shooting-days/{day.pk}/reschedule/', data, format='json')
+
+    def _scenes_of(self, day):
+        return set(SceneSchedule.objects.filter(shooting_day=day).values_list('scene_id', flat=True))
+
+    def test_cancelled_day_is_repaired(self):
+        frozen = self._scenes_of(self.days[0])
+        before = self._scenes_of(self.days[1])
+        displaced = self._scenes_of(self.days[2])
+
+        data = self._reschedule(self.days[2], reason='Rain', freeze_days=1).json()
+
+        self.days[2].refresh_from_db()
+        self.assertEqual(self.days[2].status, 'cancelled')
+        self.assertEqual(self.days[2].scene_count, 0)
+        self.assertEqual(self._scenes_of(self.days[0]), frozen)
+        self.assertEqual(data['displaced_scenes'], 4)
+        self.assertEqual(data['days_added'], 0)
+        self.assertTrue(displaced <= {move['scene'] for move in data['moves']})
+
+        # Days before the cancelled one are outside the window
+        self.assertEqual(self._scenes_of(self.days[1]), before)
+        moved_to = {move['to_day'] for move in data['moves']}
+        self.assertTrue(moved_to <= {4, 5, 6})
+
+        changes = ScheduleChange.objects.filter(production=self.production)
+        self.assertEqual(changes.filter(change_type='scene_moved').count(), len(data['moves']))
+        self.assertEqual(changes.filter(change_type='day_cancelled').count(), 1)
+        self.assertEqual(
+            sum(ShootingDay.objects.filter(production=self.production).values_list('scene_count', flat=True)), 24
+        )
+
+    def test_dry_run_writes_nothing(self):
+        data = self._reschedule(self.days[3], dry_run=True).json()
+        self.assertTrue(data['moves'])
+        self.days[3].refresh_from_db()
+        self.assertEqual(self.days[3].status, 'scheduled')
+        self.assertEqual(self.days[3].scene_count, 4)
+        self.assertFalse(ScheduleChange.objects.exists())
+
+    def test_full_window_adds_day(self):
+        data = self._reschedule(self.days[4], max_pages_per_day=4, window_days=1).json()
+        self.assertEqual(data['days_added'], 1)
+        added = ShootingDay.objects.get(production=self.production, day_number=7)
+        self.assertEqual(added.scene_count, 4)
+        self.assertEqual(added.shoot_date, self.days[5].shoot_date + timedelta(days=1))
+
+    def test_frozen_day_cannot_be_rescheduled_twice(self):
+        self._reschedule(self.days[3])
+        response = self._reschedule(self.days[3])
+        self.assertEqual(response.status_code, 400)
+
+
+class DayRouteTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(12, 4)
+        self.day = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 3), day_number=1,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        )
+        for order, scene in enumerate(self.production.scenes.order_by('location_id', 'id')):
+            SceneSchedule.objects.create(
+                shooting_day=self.day, scene=scene, day_order=order,
+                estimated_start=time(7, 0), estimated_duration=timedelta(hours=1),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def test_shortest_route_not_longer_than_current(self):
+        data = self.client.get(f'/api/v1/schedule/shooting-days/{self.day.pk}/route/').json()
+
+        self.assertCountEqual(data['shortest']['locations'], data['current']['locations'])
+        self.assertEqual(len(data['current']['legs']), len(data['current']['locations']) - 1)
+        self.assertEqual(data['current']['unknown_legs'], 0)
+        self.assertLessEqual(data['shortest']['km'], data['current']['km'])
+
+
+class DoodTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.production = create_synthetic_production(16, 2)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.character = Character.objects.create(production=self.production, name='Anna')
+        for n in (0, 2, 15):
+            self.scenes[n].characters.add(self.character)
+        for n, scene in enumerate(self.scenes):
+            day = ShootingDay.objects.create(
+                production=self.production, shoot_date=date(2025, 3, 3) + timedelta(days=n), day_number=n + 1,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            )
+            SceneSchedule.objects.create(
+                shooting_day=day, scene=scene, day_order=0,
+                estimated_start=time(7, 0), estimated_duration=timedelta(hours=1),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def test_codes_holds_and_drops(self):
+        work = np.zeros((2, 6), dtype=bool)
+        work[0, [0, 2, 5]] = True
+        work[1, 3] = True
+
+        codes, hold, dropped = dood_codes(work, drop_after=2)
+
+        self.assertEqual(codes[0].tolist(), ['SW', 'H', 'WD', '', '', 'PWF'])
+        self.assertEqual(codes[1].tolist(), ['', '', '', 'SWF', '', ''])
+        self.assertEqual(int(hold.sum()), 1)
+        self.assertEqual(int(dropped.sum()), 2)
+
+    def test_build_runs_fixed_number_of_queries(self):
+        get_incidence(self.production.id)
+        with self.assertNumQueries(3):  # days, entries, cast names
+            report = DayOutOfDays.build(self.production.id)
+
+        row = next(report.rows())
+        self.assertEqual(row['name'], 'Anna')
+        self.assertEqual(row['codes'][:3], ['SW', 'H', 'WD'])
+        self.assertEqual(row['codes'][15], 'PWF')
+        self.assertEqual((row['work_days'], row['hold_days'], row['drop_days']), (3, 1, 12))
+
+    def test_endpoint_streams_csv_and_json(self):
+        url = '/api/v1/schedule/shooting-days/dood/'
+        response = self.client.get(url, {'production': self.production.id, 'output': 'csv'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertTrue(lines[1].startswith('Anna,Anna,SW,H,WD'))
+
+        response = self.client.get(url, {'production': self.production.id, 'drop_after': 20})
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['summary']['hold_days'], 13)
+        self.assertEqual(data['cast'][0]['codes'][15], 'WF')
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'production': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'production': str(uuid.uuid4())}).status_code, 404)
+
+
+class StripboardTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(5, 2)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.scenes[0].characters.add(
+            Character.objects.create(production=self.production, name='Eva'),
+            Character.objects.create(production=self.production, name='Adam'),
+        )
+        days = [
+            ShootingDay.objects.create(
+                production=self.production, shoot_date=date(2025, 3, 4 - n), day_number=2 - n,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            ) for n in range(2)
+        ]
+        # Day 1 is created second, strips must still come out in schedule order
+        for n, scene in enumerate(self.scenes):
+            SceneSchedule.objects.create(
+                shooting_day=days[1 - n // 3], scene=scene, day_order=n % 3,
+                estimated_start=time(7 + n % 3), estimated_duration=timedelta(minutes=90),
+            )
+
+    def test_strips_in_schedule_order_across_chunks(self):
+        with self.assertNumQueries(4):  # strips + cast per chunk of 2 (3 chunks)
+            strips = list(iter_strips(self.production.id, chunk_size=2))
+
+        self.assertEqual([(s[0], s[2]) for s in strips], [(1, 0), (1, 1), (1, 2), (2, 0), (2, 1)])
+        self.assertEqual(strips[0][COLUMNS.index('cast')], ['Adam', 'Eva'])
+        self.assertEqual(strips[0][COLUMNS.index('estimated_minutes')], 90)
+        self.assertEqual(strips[0][COLUMNS.index('shoot_date')], '2025-03-03')
+
+    def test_endpoint_formats(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+        url = '/api/v1/schedule/scene-schedules/stripboard/'
+
+        def export(output):
+            response = client.get(url, {'production': self.production.id, 'output': output})
+            return response, b''.join(response.streaming_content).decode()
+
+        response, body = export('csv')
+        lines = body.splitlines()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(lines[0], ','.join(COLUMNS))
+        self.assertIn('"Adam, Eva"', lines[1])
+        self.assertEqual(len(lines), 6)
+
+        _, body = export('ndjson')
+        self.assertEqual([json.loads(line)['scene_number'] for line in body.splitlines()],
+                         [scene.scene_number for scene in self.scenes])
+
+        _, body = export('json')
+        data = json.loads(body)
+        self.assertEqual(data['columns'], list(COLUMNS))
+        self.assertEqual(len(data['strips']), 5)
+
+        self.assertEqual(client.get(url, {'production': self.production.id, 'output': 'pdf'}).status_code, 400)
+        # Resolved before the streaming response starts, not halfway through the file
+        self.assertEqual(client.get(url, {'production': 'abc'}).status_code, 400)
+        self.assertEqual(client.get(url, {'production': str(uuid.uuid4())}).status_code, 404)
+
+
+class BulkMoveTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(6, 2)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.days = [
+            ShootingDay.objects.create(
+                production=self.production, shoot_date=date(2025, 3, 3 + n), day_number=n + 1,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            ) for n in range(2)
+        ]
+        self.entries = [
+            SceneSchedule.objects.create(
+                shooting_day=self.days[n // 3], scene=scene, day_order=n % 3,
+                estimated_start=time(7 + n % 3), estimated_duration=timedelta(hours=1),
+            ) for n, scene in enumerate(self.scenes)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def _move(self, *orders, **extra):
+        days = [
+            {'shooting_day': str(day.pk), 'entries': [str(self.entries[n].pk) for n in order]}
+            for day, order in zip(self.days, orders)
+        ]
+        return self.client.post('/api/v1/schedule/scene-schedules/bulk_move/', dict(days=days, **extra), format='json')
+
+    def test_longest_kept_order(self):
+        self.assertEqual(longest_kept_order([0, 1, 2, 3]), {0, 1, 2, 3})
+        self.assertEqual(longest_kept_order([3, 0, 1, 2]), {1, 2, 3})
+        self.assertEqual(len(longest_kept_order([2, 0, 3, 1])), 2)
+
+    def test_move_between_days_logs_compact_diff(self):
+        # Strip 4 dragged to the top of day 1, strip 2 to the end of day 2
+        # Days, entries, breaks, savepoint, bulk_update, changes, totals, release
+        with self.assertNumQueries(8):
+            response = self._move([3, 0, 1], [4, 5, 2], reason='Actor swap', retime=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['entries_updated'], 6)
+        changes = ScheduleChange.objects.filter(production=self.production)
+        self.assertEqual(sorted(change.scene_id for change in changes), [self.scenes[2].id, self.scenes[3].id])
+        change = changes.get(scene=self.scenes[3])
+        self.assertEqual((change.old_value, change.new_value), ('Day 2 (2025-03-04) #1', 'Day 1 (2025-03-03) #1'))
+        self.assertEqual(change.reason, 'Actor swap')
+
+        entry = SceneSchedule.objects.get(pk=self.entries[0].pk)
+        self.assertEqual((entry.day_order, entry.estimated_start), (1, time(8, 0)))
+        self.days[1].refresh_from_db()
+        pages = sum(self.scenes[n].estimated_pages for n in (4, 5, 2))
+        self.assertEqual((self.days[1].scene_count, self.days[1].page_total), (3, pages))
+
+    def test_invalid_moves_write_nothing(self):
+        self.assertEqual(self._move([0, 1]).status_code, 400)  # Entry 2 left out
+
+        SceneSchedule.objects.filter(pk=self.entries[5].pk).update(scene=self.scenes[0])
+        self.assertEqual(self._move([0, 1, 2, 5], [3, 4]).status_code, 400)  # Scene 0 twice on day 1
+
+        self.assertFalse(ScheduleChange.objects.exists())
+        self.assertEqual(SceneSchedule.objects.get(pk=self.entries[2].pk).shooting_day_id, self.days[0].pk)
+
+    def test_retime_keeps_breaks_and_is_opt_in(self):
+        DayBreak.objects.create(
+            shooting_day=self.days[0], break_type='meal', scheduled_start=time(8, 0),
+            scheduled_duration=timedelta(hours=1),
+        )
+        self.assertEqual(self._move([1, 0, 2]).status_code, 200)
+        starts = dict(SceneSchedule.objects.filter(shooting_day=self.days[0]).values_list('pk', 'estimated_start'))
+        self.assertEqual([starts[self.entries[n].pk] for n in (1, 0, 2)], [time(8), time(7), time(9)])
+
+        self.assertEqual(self._move([1, 0, 2], retime=True).status_code, 200)
+        starts = dict(SceneSchedule.objects.filter(shooting_day=self.days[0]).values_list('pk', 'estimated_start'))
+        self.assertEqual([starts[self.entries[n].pk] for n in (1, 0, 2)], [time(7), time(9), time(10)])
+
+    def test_scene_moves_onto_a_day_it_leaves(self):
+        # A second entry of scene 0 on day 2 moves on while the first one moves in
+        self.days.append(ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 5), day_number=3,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        ))
+        self.entries.append(SceneSchedule.objects.create(
+            shooting_day=self.days[1], scene=self.scenes[0], day_order=3,
+            estimated_start=time(10), estimated_duration=timedelta(hours=1),
+        ))
+        response = self._move([1, 2], [3, 4, 5, 0], [6])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SceneSchedule.objects.get(pk=self.entries[0].pk).shooting_day_id, self.days[1].pk)
+
+        # Trading days is a cycle no write order can hold
+        response = self._move([1, 2], [3, 4, 5, 6], [0])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SceneSchedule.objects.get(pk=self.entries[6].pk).shooting_day_id, self.days[2].pk)
+
+
+class WrapPredictionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.production = create_synthetic_production(7, 2)
+        self.production.scenes.update(estimated_pages=Decimal('1.00'))
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.past, self.today = [
+            ShootingDay.objects.create(
+                production=self.production, shoot_date=date(2025, 3, 3 + n), day_number=n + 1,
+                general_call=time(6, 0), shooting_call=time(7, 0),
+            ) for n in range(2)
+        ]
+        # History: every scene ran 30 minutes over its one page
+        for n, scene in enumerate(self.scenes[:5]):
+            SceneSchedule.objects.create(
+                shooting_day=self.past, scene=scene, day_order=n, status='completed',
+                estimated_start=time(7 + 2 * n), estimated_duration=timedelta(hours=1),
+                actual_start=time(7 + 2 * n), actual_end=time(8 + 2 * n, 30),
+            )
+        self.entries = [
+            SceneSchedule.objects.create(
+                shooting_day=self.today, scene=scene, day_order=n,
+                estimated_start=time(9 + n), estimated_duration=timedelta(hours=1),
+            ) for n, scene in enumerate(self.scenes[5:])
+        ]
+
+    def _at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.today.shoot_date, time(hour, minute)))
+
+    def test_simulation_sums_setup_residuals(self):
+        pools = {'page': np.full(10, 100.0), 'setup': np.full(10, 5.0)}
+        remaining = simulate_remaining([60, 30], [1, 2], [3, 0], pools, simulations=50)
+        self.assertTrue(np.allclose(remaining, (60 + 15) + (30 + 200)))
+
+    def test_prediction_from_history(self):
+        prediction = WrapPredictor(self.today, simulations=200, seed=1).predict(self._at(8))
+
+        self.assertEqual(prediction['remaining_scenes'], 2)
+        self.assertEqual(prediction['history'], {'page': 5, 'setup': 0})
+        self.assertEqual(prediction['planned_wrap'], self._at(11).isoformat())
+        self.assertEqual(prediction['p50'], self._at(12).isoformat())
+        self.assertEqual(prediction['p90'], self._at(12).isoformat())
+
+    @mock.patch('apps.schedule.wrap.MAX_HISTORY', 5)
+    def test_pools_keep_the_newest_history(self):
+        # Entered late, but shot before the 30 minute overruns: on time
+        early = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 2, 28), day_number=0,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        )
+        for n, scene in enumerate(self.scenes[:3]):
+            SceneSchedule.objects.create(
+                shooting_day=early, scene=scene, day_order=n, status='completed',
+                estimated_start=time(7 + n), estimated_duration=timedelta(hours=1),
+                actual_start=time(7 + n), actual_end=time(8 + n),
+            )
+        for number, minutes in (('1', 40), ('2', 10)):
+            Shot.objects.create(
+                scene=self.scenes[0], shot_number=number, status='completed',
+                estimated_duration=timedelta(minutes=10), actual_duration=timedelta(minutes=minutes),
+                completed_at=self._at(9 - int(number)),
+            )
+
+        pools = get_residual_pools(self.production.id)
+        self.assertEqual(pools['page'].tolist(), [30.0] * 5)
+        self.assertEqual(pools['setup'].tolist(), [0.0, 30.0])
+
+    @mock.patch('apps.schedule.wrap.broadcast')
+    def test_completed_scene_extends_history_and_pushes(self, broadcast):
+        WrapPredictor(self.today).predict(self._at(8))
+        SceneSchedule.objects.filter(pk=self.entries[0].pk).update(actual_start=time(9, 0))
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+        client.post(f'/api/v1/schedule/scene-schedules/{self.entries[0].pk}/complete_scene/')
+
+        self.assertEqual(len(get_residual_pools(self.production.id)['page']), 6)
+        production_id, event_type, data = broadcast.call_args[0]
+        self.assertEqual((production_id, event_type), (self.production.id, 'wrap_prediction'))
+        self.assertEqual(data['remaining_scenes'], 1)
+
+
+class ShotOrderTests(TestCase):
+
+    def setUp(self):
+        self.production = create_synthetic_production(2, 1)
+        self.scenes = list(self.production.scenes.order_by('id'))
+        self.day = ShootingDay.objects.create(
+            production=self.production, shoot_date=date(2025, 3, 3), day_number=1,
+            general_call=time(6, 0), shooting_call=time(7, 0),
+        )
+        for n, scene in enumerate(self.scenes):
+            SceneSchedule.objects.create(
+                shooting_day=self.day, scene=scene, day_order=n,
+                estimated_start=time(7 + n), estimated_duration=timedelta(hours=1),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ad', password='x'))
+
+    def _shot(self, scene, number, shot_type, lighting='', camera='', status='not_shot'):
+        return Shot.objects.create(
+            scene=scene, shot_number=number, shot_type=shot_type,
+            lighting_notes=lighting, camera_notes=camera, status=status,
+        )
+
+    def test_costs_are_asymmetric(self):
+        shots = [
+            {'scene_id': 1, 'location_id': 1, 'shot_type': 'WS', 'camera_notes': 'A', 'lighting_notes': 'day'},
+            {'scene_id': 1, 'location_id': 1, 'shot_type': 'CU', 'camera_notes': 'A', 'lighting_notes': 'Day '},
+            {'scene_id': 1, 'location_id': 1, 'shot_type': 'CRANE', 'camera_notes': 'A', 'lighting_notes': 'day'},
+        ]
+        costs = setup_costs(shots)
+
+        self.assertEqual(costs[0, 1], 4 * RESET_MINUTES['tighten'])
+        self.assertEqual(costs[1, 0], 4 * RESET_MINUTES['widen'])
+        self.assertEqual(costs[0, 2], RESET_MINUTES['rig_build'])
+        self.assertEqual(costs[2, 0], RESET_MINUTES['rig_wrap'])
+
+    def test_suggested_order_groups_setups(self):
+        first, second = self.scenes
+        # Current order alternates lighting and goes tight before wide
+        self._shot(first, '1', 'CU', lighting='window')
+        self._shot(first, '2', 'WS', lighting='night')
+        self._shot(first, '3', 'WS', lighting='window')
+        self._shot(first, '4', 'CU', lighting='night')
+        self._shot(second, '1', 'CRANE', lighting='window')
+        self._shot(second, '2', 'MS')
+        self._shot(second, '3', 'CRANE', lighting='window')
+        self._shot(second, '4', 'WS', status='completed')
+
+        response = self.client.get(f'/api/v1/schedule/shooting-days/{self.day.pk}/shot_order/')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        shots = data['shots']
+        self.assertEqual(len(shots), 7)
+        self.assertGreater(data['saved_minutes'], 0)
+        self.assertEqual(data['suggested_reset_minutes'], sum(shot['reset_minutes'] for shot in shots))
+        types = [(shot['scene'], shot['shot_number']) for shot in shots]
+        # One relight per lighting setup, wide before tight, both crane shots on one rig
+        window = sorted(types.index(key) for key in [(first.id, '1'), (first.id, '3'), (second.id, '1'), (second.id, '3')])
+        self.assertEqual(window, list(range(window[0], window[0] + 4)))
+        self.assertEqual(abs(types.index((first.id, '2')) - types.index((first.id, '4'))), 1)
+        self.assertLess(types.index((first.id, '3')), types.index((first.id, '1')))
+        self.assertEqual(abs(types.index((second.id, '1')) - types.index((second.id, '3'))), 1)
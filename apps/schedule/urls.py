@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     ShootingDayViewSet, SceneScheduleViewSet, DayBreakViewSet,
-    StatusUpdateViewSet, ProductionCalendarViewSet, ScheduleChangeViewSet
+    StatusUpdateViewSet, ProductionCalendarViewSet, ScheduleChangeViewSet,
+    OptimizationJobViewSet
 )
 
 router = DefaultRouter()
@@ -12,6 +13,7 @@ router.register(r'breaks', DayBreakViewSet)
 router.register(r'status-updates', StatusUpdateViewSet)
 router.register(r'calendars', ProductionCalendarViewSet)
 router.register(r'changes', ScheduleChangeViewSet)
+router.register(r'optimization-jobs', OptimizationJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
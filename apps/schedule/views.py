@@ -1,21 +1,51 @@
-from rest_framework import viewsets, status, permissions
+from rest_framework import mixins, viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.db.models import Q, Count, Sum
 from django.utils import timezone
+import os
 from datetime import datetime, timedelta
 
 from .models import (
     ShootingDay, SceneSchedule, DayBreak, StatusUpdate,
-    ProductionCalendar, ScheduleChange
+    ProductionCalendar, ScheduleChange, OptimizationJob
 )
+from apps.production.geo import get_distances
+from apps.production.models import Production
+from apps.realtime.services import LiveDashboardService
+from .dood import DROP_AFTER_DAYS, DayOutOfDays
+from .jobs import apply_job, cancel_job, submit_job
+from .moves import BulkMove
+from .repair import FROZEN_DAY_STATUSES, REMOVED_DAY_STATUSES, ScheduleRepair
+from .scenarios import PRESET_SCENARIOS
+from .services import day_progress, schedule_overview_counts
+from .shot_order import day_shot_order
+from .stripboard import FORMATS as STRIPBOARD_FORMATS, export_stripboard
+from .wrap import WrapPredictor, publish_wrap_prediction, record_scene_residual
 from .serializers import (
     ShootingDayListSerializer, ShootingDayDetailSerializer,
     SceneScheduleListSerializer, SceneScheduleDetailSerializer,
     DayBreakSerializer, StatusUpdateSerializer,
-    ProductionCalendarSerializer, ScheduleChangeSerializer
+    ProductionCalendarSerializer, ScheduleChangeSerializer, OptimizationJobSerializer,
+    ScenarioExplorationSerializer, ScheduleRepairSerializer, BulkMoveSerializer
 )
 
+def _production_param(request):
+    """
+    (production, None) for ?production=<id>, otherwise (None, error response):
+    400 when missing or malformed, 404 when no such production
+    """
+    production_id = request.query_params.get('production')
+    if not production_id:
+        return None, Response({'error': 'production is required'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return get_object_or_404(Production, pk=production_id), None
+    except DjangoValidationError:
+        return None, Response({'error': 'production must be a production id'}, status=status.HTTP_400_BAD_REQUEST)
+
 class ShootingDayViewSet(viewsets.ModelViewSet):
     """Shooting days management"""
     queryset = ShootingDay.objects.select_related('production', 'primary_location').prefetch_related(
@@ -31,6 +61,11 @@ class ShootingDayViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         
+        # Seznam čte jen uložené součty (scene_count, page_total), progress agreguje
+        # jedním dotazem - prefetche nejsou potřeba
+        if self.action in ('list', 'progress', 'reschedule', 'route'):
+            queryset = queryset.prefetch_related(None)
+        
         # Filter by production
         production_id = self.request.query_params.get('production')
         if production_id:
@@ -59,13 +94,14 @@ class ShootingDayViewSet(viewsets.ModelViewSet):
         shooting_day.save()
         
         # Create status update
-        StatusUpdate.objects.create(
+        status_update = StatusUpdate.objects.create(
             production=shooting_day.production,
             shooting_day=shooting_day,
             update_type='day_start',
             message=f"Day {shooting_day.day_number} started",
             posted_by=request.user
         )
+        LiveDashboardService(shooting_day.production_id, shooting_day.shoot_date).status_posted(status_update)
         
         return Response({'message': 'Day started'})
     
@@ -78,42 +114,110 @@ class ShootingDayViewSet(viewsets.ModelViewSet):
         shooting_day.save()
         
         # Create status update
-        StatusUpdate.objects.create(
+        status_update = StatusUpdate.objects.create(
             production=shooting_day.production,
             shooting_day=shooting_day,
             update_type='wrap',
             message=f"That's a wrap on Day {shooting_day.day_number}!",
             posted_by=request.user
         )
+        LiveDashboardService(shooting_day.production_id, shooting_day.shoot_date).status_posted(status_update)
         
         return Response({'message': 'Day wrapped'})
     
+    @action(detail=True, methods=['post'])
+    def reschedule(self, request, pk=None):
+        """
+        Cancel/postpone the day and repair the schedule around it
+        
+        Only the next open days are re-planned, see ScheduleRepair. With
+        dry_run the proposed moves are returned without saving.
+        """
+        shooting_day = self.get_object()
+        if shooting_day.status in FROZEN_DAY_STATUSES + REMOVED_DAY_STATUSES:
+            return Response(
+                {'error': f'Day is already {shooting_day.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = ScheduleRepairSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        repair = ScheduleRepair(
+            shooting_day,
+            freeze_days=data['freeze_days'],
+            window_days=data['window_days'],
+            max_pages_per_day=data['max_pages_per_day'],
+            churn_cost=data['churn_cost'],
+        )
+        return Response(repair.run(
+            reason=data['reason'], user=request.user,
+            new_status=data['status'], dry_run=data['dry_run'],
+        ))
+    
     @action(detail=True, methods=['get'])
-    def progress(self, request, pk=None):
-        """Get day progress statistics"""
+    def shot_order(self, request, pk=None):
+        """Suggested order of the day's remaining shots with fewer setup changes"""
+        shooting_day = self.get_object()
+        return Response(day_shot_order(shooting_day))
+    
+    @action(detail=True, methods=['get'])
+    def wrap_prediction(self, request, pk=None):
+        """P50/P90 wrap of the day simulated from the remaining scenes"""
+        shooting_day = self.get_object()
+        return Response(WrapPredictor(shooting_day).predict())
+    
+    @action(detail=True, methods=['get'])
+    def route(self, request, pk=None):
+        """Company moves of the day: current location order vs the shortest drive"""
         shooting_day = self.get_object()
-        scene_schedules = shooting_day.scene_schedules.all()
+        location_ids = list(dict.fromkeys(
+            shooting_day.scene_schedules.order_by('day_order').values_list('scene__location_id', flat=True)
+        ))
+        distances = get_distances(shooting_day.production_id)
         
-        total_scenes = scene_schedules.count()
-        completed_scenes = scene_schedules.filter(status='completed').count()
-        in_progress_scenes = scene_schedules.filter(status='shooting').count()
+        def describe(order):
+            legs = [
+                {'from': a, 'to': b, 'km': distances.distance(a, b)}
+                for a, b in zip(order, order[1:])
+            ]
+            return {
+                'locations': order,
+                'legs': legs,
+                'km': round(sum(leg['km'] or 0 for leg in legs), 1),
+                'unknown_legs': sum(1 for leg in legs if leg['km'] is None),
+            }
         
-        total_pages = sum(ss.scene.estimated_pages or 0 for ss in scene_schedules)
-        completed_pages = sum(
-            ss.scene.estimated_pages or 0 
-            for ss in scene_schedules.filter(status='completed')
-        )
+        shortest, _ = distances.route(location_ids)
+        return Response({'current': describe(location_ids), 'shortest': describe(shortest)})
+    
+    @action(detail=False, methods=['get'])
+    def dood(self, request):
+        """
+        Day-Out-Of-Days of a production's cast, streamed
         
-        return Response({
-            'total_scenes': total_scenes,
-            'completed_scenes': completed_scenes,
-            'in_progress_scenes': in_progress_scenes,
-            'scenes_remaining': total_scenes - completed_scenes,
-            'total_pages': total_pages,
-            'completed_pages': completed_pages,
-            'pages_remaining': total_pages - completed_pages,
-            'completion_percentage': (completed_scenes / total_scenes * 100) if total_scenes > 0 else 0
-        })
+        ?production=<id> (required), ?output=json|csv, ?drop_after=<shooting days>
+        """
+        production, error = _production_param(request)
+        if error:
+            return error
+        try:
+            drop_after = int(request.query_params.get('drop_after', DROP_AFTER_DAYS))
+        except ValueError:
+            return Response({'error': 'drop_after must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        report = DayOutOfDays.build(production.pk, drop_after=max(drop_after, 1))
+        if request.query_params.get('output') == 'csv':
+            response = StreamingHttpResponse(report.iter_csv(), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="dood.csv"'
+            return response
+        return StreamingHttpResponse(report.iter_json(), content_type='application/json')
+    
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """Get day progress statistics"""
+        shooting_day = self.get_object()
+        return Response(day_progress(shooting_day.pk))
 
 class SceneScheduleViewSet(viewsets.ModelViewSet):
     """Scene scheduling management"""
@@ -142,6 +246,50 @@ class SceneScheduleViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('shooting_day__shoot_date', 'day_order')
     
+    @action(detail=False, methods=['post'])
+    def bulk_move(self, request):
+        """
+        New strip order of one or more days in one request
+        
+        Body: {"days": [{"shooting_day": <id>, "entries": [<entry id>, ...]}],
+        "reason": "", "retime": false}. Each listed day gets exactly the listed
+        entries in that order; moves are logged in ScheduleChange. retime
+        chains estimated starts from the shooting call around the day's breaks.
+        """
+        serializer = BulkMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        move = BulkMove({day['shooting_day']: day['entries'] for day in data['days']}, retime=data['retime'])
+        try:
+            result = move.apply(reason=data['reason'], user=request.user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+    
+    @action(detail=False, methods=['get'])
+    def stripboard(self, request):
+        """
+        Whole production stripboard, streamed in schedule order
+        
+        ?production=<id> (required), ?output=csv|ndjson|json
+        """
+        production, error = _production_param(request)
+        if error:
+            return error
+        output = request.query_params.get('output', 'csv')
+        if output not in STRIPBOARD_FORMATS:
+            return Response(
+                {'error': f"output must be one of {', '.join(STRIPBOARD_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            export_stripboard(production.pk, output), content_type=STRIPBOARD_FORMATS[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="stripboard.{output}"'
+        return response
+    
     @action(detail=True, methods=['post'])
     def start_scene(self, request, pk=None):
         """Mark scene as started"""
@@ -150,17 +298,29 @@ class SceneScheduleViewSet(viewsets.ModelViewSet):
         scene_schedule.actual_start = timezone.now().time()
         scene_schedule.save()
         
+        LiveDashboardService(
+            scene_schedule.shooting_day.production_id, scene_schedule.shooting_day.shoot_date
+        ).scene_started(scene_schedule)
+        
         return Response({'message': f'Scene {scene_schedule.scene.scene_number} started'})
     
     @action(detail=True, methods=['post'])
     def complete_scene(self, request, pk=None):
         """Mark scene as completed"""
         scene_schedule = self.get_object()
+        already_completed = scene_schedule.status == 'completed'
         scene_schedule.status = 'completed'
         scene_schedule.actual_end = timezone.now().time()
         scene_schedule.completion_notes = request.data.get('notes', '')
         scene_schedule.save()
         
+        if not already_completed:
+            LiveDashboardService(
+                scene_schedule.shooting_day.production_id, scene_schedule.shooting_day.shoot_date
+            ).scene_completed(scene_schedule)
+            record_scene_residual(scene_schedule)
+            publish_wrap_prediction(scene_schedule.shooting_day)
+        
         return Response({'message': f'Scene {scene_schedule.scene.scene_number} completed'})
 
 class StatusUpdateViewSet(viewsets.ModelViewSet):
@@ -192,7 +352,10 @@ class StatusUpdateViewSet(viewsets.ModelViewSet):
         return queryset.order_by('-timestamp')
     
     def perform_create(self, serializer):
-        serializer.save(posted_by=self.request.user)
+        status_update = serializer.save(posted_by=self.request.user)
+        LiveDashboardService(
+            status_update.production_id, status_update.shooting_day.shoot_date
+        ).status_posted(status_update)
 
 class ProductionCalendarViewSet(viewsets.ModelViewSet):
     """Production calendar management"""
@@ -214,17 +377,17 @@ class ProductionCalendarViewSet(viewsets.ModelViewSet):
     def schedule_overview(self, request, pk=None):
         """Get overall schedule overview"""
         calendar = self.get_object()
-        production = calendar.production
         
-        # Get shooting days
-        shooting_days = production.shooting_days.all()
-        total_days = shooting_days.count()
-        completed_days = shooting_days.filter(status='completed').count()
+        # Shooting day counts (one aggregate, briefly cached)
+        counts = schedule_overview_counts(calendar.production_id)
+        total_days = counts['total_days']
+        completed_days = counts['completed_days']
         
-        # Calculate progress
+        # Calculate progress in work days of the calendar
         today = timezone.now().date()
-        days_elapsed = max(0, (today - calendar.principal_start).days)
-        total_production_days = (calendar.principal_end - calendar.principal_start).days
+        work_calendar = calendar.work_calendar
+        days_elapsed = work_calendar.count(calendar.principal_start, today - timedelta(days=1))
+        total_production_days = work_calendar.count(calendar.principal_start, calendar.principal_end)
         
         return Response({
             'total_shooting_days': total_days,
@@ -269,4 +432,105 @@ class ScheduleChangeViewSet(viewsets.ReadOnlyModelViewSet):
         if production_id:
             queryset = queryset.filter(production_id=production_id)
         
-        return queryset.order_by('-changed_at')
\ No newline at end of file
+        return queryset.order_by('-changed_at')
+
+class OptimizationJobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Background schedule optimization: submit, poll, cancel, fetch and apply the result"""
+    queryset = OptimizationJob.objects.select_related('production', 'created_by')
+    serializer_class = OptimizationJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # Filter by production
+        production_id = self.request.query_params.get('production')
+        if production_id:
+            queryset = queryset.filter(production_id=production_id)
+        
+        # Filter by status
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        
+        return queryset
+    
+    def perform_create(self, serializer):
+        job = serializer.save(created_by=self.request.user)
+        submit_job(job)
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel a queued or running job"""
+        job = self.get_object()
+        if not cancel_job(job):
+            return Response(
+                {'error': f'Job is already {job.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+    
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        """Optimized schedule of a completed job"""
+        job = self.get_object()
+        if job.status != 'completed':
+            return Response(
+                {'error': f'Job is {job.status}', 'status': job.status},
+                status=status.HTTP_409_CONFLICT
+            )
+        if job.engine == 'scenarios':
+            return Response({'job': job.id, 'evaluation': job.evaluation, **job.result})
+        return Response({
+            'job': job.id,
+            'evaluation': job.evaluation,
+            'model_stats': job.model_stats,
+            'schedule': job.result,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def apply(self, request, pk=None):
+        """Write the result into the production schedule"""
+        job = self.get_object()
+        if job.status != 'completed':
+            return Response(
+                {'error': f'Job is {job.status}'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if job.engine == 'scenarios':
+            return Response(
+                {'error': 'Scenario explorations have no single schedule, submit the chosen scenario as a job'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if job.applied_at and not request.data.get('force'):
+            return Response(
+                {'error': 'Result already applied, pass force to apply again'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(apply_job(job))
+    
+    @action(detail=False, methods=['post'])
+    def scenarios(self, request):
+        """
+        Queue a job solving several constraint/weight sets in parallel; its
+        result holds them with the Pareto front on cost, location changes
+        and actor hold days
+        """
+        serializer = ScenarioExplorationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        job = OptimizationJob.objects.create(
+            production=data['production'],
+            engine='scenarios',
+            start_date=data['start_date'],
+            constraints={
+                'scenarios': data.get('scenarios') or PRESET_SCENARIOS,
+                'workers': min(data.get('workers') or os.cpu_count() or 1, os.cpu_count() or 1),
+            },
+            time_budget=data['time_budget'],
+            created_by=request.user,
+        )
+        submit_job(job)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,111 @@
+# apps/schedule/workdays.py
+from datetime import date
+from typing import Iterable, List, Union
+
+import numpy as np
+from django.core.cache import cache
+from django.utils.dateparse import parse_date
+
+from .models import ProductionCalendar
+
+CACHE_TIMEOUT = 60 * 60
+
+# Without a ProductionCalendar every day is a work day (as before)
+ALL_DAYS = '1111111'
+WEEKDAY_FIELDS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def _day(value) -> np.datetime64:
+    return np.datetime64(value, 'D')
+
+
+def _dates(values: np.ndarray) -> List[date]:
+    return values.astype('datetime64[D]').astype(object).tolist()
+
+
+class WorkCalendar:
+    """
+    Compiled work week + holidays/blackout dates of one production
+
+    Wraps numpy's busday calendar, so date arithmetic over whole ranges is
+    vectorized: masks, counts and "Nth work day after X". Built once per
+    ProductionCalendar revision and cached (see get_work_calendar).
+    """
+
+    def __init__(self, weekmask: str = ALL_DAYS, holidays: Iterable = ()):
+        if '1' not in weekmask:
+            raise ValueError("Work calendar needs at least one work day per week")
+        self.weekmask = weekmask
+        self.holidays = np.unique(np.array(list(holidays), dtype='datetime64[D]'))
+        self._busdaycal = None
+
+    @classmethod
+    def from_calendar(cls, calendar: ProductionCalendar) -> 'WorkCalendar':
+        weekmask = ''.join('1' if getattr(calendar, field) else '0' for field in WEEKDAY_FIELDS)
+        # Unparseable entries never matched a date before either
+        days = [parse_date(str(value)) for value in (calendar.holidays or []) + (calendar.blackout_dates or [])]
+        return cls(weekmask, [day for day in days if day is not None])
+
+    def __getstate__(self):
+        # np.busdaycalendar cannot be pickled (cache, worker processes)
+        return dict(self.__dict__, _busdaycal=None)
+
+    @property
+    def busdaycal(self) -> np.busdaycalendar:
+        if self._busdaycal is None:
+            self._busdaycal = np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays)
+        return self._busdaycal
+
+    def is_work_day(self, day) -> bool:
+        return bool(np.is_busday(_day(day), busdaycal=self.busdaycal))
+
+    def mask(self, start, end) -> np.ndarray:
+        """Work day flags for each date from start to end inclusive"""
+        days = np.arange(_day(start), _day(end) + 1)
+        return np.is_busday(days, busdaycal=self.busdaycal)
+
+    def count(self, start, end) -> int:
+        """Work days from start to end inclusive (0 when end < start)"""
+        if end < start:
+            return 0
+        return int(np.busday_count(_day(start), _day(end) + 1, busdaycal=self.busdaycal))
+
+    def offset(self, start, n: Union[int, Iterable[int]]):
+        """
+        n-th work day counted from start (n=0: start or the next work day)
+
+        n may be a sequence of offsets, a list of dates is returned then.
+        """
+        offsets = np.asarray(n)
+        days = np.busday_offset(_day(start), offsets, roll='forward', busdaycal=self.busdaycal)
+        if offsets.ndim == 0:
+            return days.astype(object)
+        return _dates(days)
+
+    def work_days(self, start, count: int) -> List[date]:
+        """The first `count` work days on or after start"""
+        return self.offset(start, np.arange(count))
+
+    def indices(self, start, days: Iterable) -> List[int]:
+        """Work day index of each date counted from start (inverse of offset for work days)"""
+        return np.busday_count(
+            _day(start), np.array(list(days), dtype='datetime64[D]'), busdaycal=self.busdaycal
+        ).tolist()
+
+
+def _cache_key(production_id):
+    return f'work_calendar_{production_id}'
+
+
+def get_work_calendar(production_id) -> WorkCalendar:
+    """Cached work calendar of a production, built with one query on miss"""
+    work_calendar = cache.get(_cache_key(production_id))
+    if work_calendar is None:
+        calendar = ProductionCalendar.objects.filter(production_id=production_id).first()
+        work_calendar = WorkCalendar.from_calendar(calendar) if calendar is not None else WorkCalendar()
+        cache.set(_cache_key(production_id), work_calendar, CACHE_TIMEOUT)
+    return work_calendar
+
+
+def invalidate_work_calendar(production_id):
+    cache.delete(_cache_key(production_id))
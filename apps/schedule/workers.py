@@ -0,0 +1,18 @@
+# apps/schedule/workers.py
+"""
+Entry point of spawned process pool workers (schedule.jobs, schedule.scenarios)
+
+A spawned worker unpickles its pool initializer before anything else
+runs, so this module must not import Django models at import time.
+"""
+import importlib
+
+
+def init_worker(initializer=None, *args):
+    """Set up Django, then call the dotted-path initializer with args"""
+    import django
+    django.setup()
+
+    if initializer:
+        module_path, name = initializer.rsplit('.', 1)
+        getattr(importlib.import_module(module_path), name)(*args)
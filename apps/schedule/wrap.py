@@ -0,0 +1,233 @@
+# apps/schedule/wrap.py
+"""
+Monte Carlo wrap time of a shooting day
+
+The rest of the day is simulated SIMULATIONS times: every remaining scene
+takes its planned duration plus an overrun bootstrapped from the
+production's history, per remaining setup (Shot estimated vs actual
+duration) or, for scenes without setups, per page (SceneSchedule planned
+vs actual). The history is loaded once into cached residual pools and
+extended in place as scenes/shots complete, so a prediction is one small
+query plus a few vectorized NumPy draws.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.production.models import Shot
+from apps.realtime.services import LiveDashboardService, broadcast
+from .models import DayBreak, SceneSchedule, ShootingDay
+
+SIMULATIONS = 4000
+QUANTILES = (50, 90)
+
+# Entries no longer (or not) part of the day's remaining work
+FINISHED_STATUSES = ('completed', 'postponed', 'cancelled')
+IN_PROGRESS_STATUSES = ('setup', 'rehearsal', 'shooting')
+
+# Fewer residuals than this and the prior is used instead
+MIN_HISTORY = 5
+MAX_HISTORY = 5000           # Newest residuals kept per pool
+# Prior overrun (minutes) without history: per page / per setup
+PRIOR = {'page': (5.0, 15.0), 'setup': (2.0, 8.0)}
+# A scene never takes less than this share of its plan
+MIN_DURATION_SHARE = 0.25
+
+CACHE_TIMEOUT = 60 * 60 * 12
+
+
+def _minutes(value: timedelta) -> float:
+    return value.total_seconds() / 60
+
+
+def _pools_key(production_id):
+    return f'wrap_residuals_{production_id}'
+
+
+def _load_pools(production_id) -> Dict[str, np.ndarray]:
+    """Overrun residuals of a production, oldest first: minutes per page and per setup"""
+    pages = []
+    for start, end, planned, scene_pages in reversed(SceneSchedule.objects.filter(
+        shooting_day__production_id=production_id, status='completed',
+        actual_start__isnull=False, actual_end__isnull=False,
+    ).order_by('-shooting_day__shoot_date', '-actual_end', '-pk').values_list(
+        'actual_start', 'actual_end', 'estimated_duration', 'scene__estimated_pages'
+    )[:MAX_HISTORY]):
+        actual = (datetime.combine(datetime.min, end) - datetime.combine(datetime.min, start)) % timedelta(days=1)
+        pages.append((_minutes(actual) - _minutes(planned)) / max(float(scene_pages or 0), 0.125))
+
+    setups = [
+        _minutes(actual) - _minutes(planned) for planned, actual in reversed(Shot.objects.filter(
+            scene__production_id=production_id, status='completed',
+            estimated_duration__isnull=False, actual_duration__isnull=False,
+        ).order_by(F('completed_at').desc(nulls_last=True), '-pk').values_list(
+            'estimated_duration', 'actual_duration'
+        )[:MAX_HISTORY])
+    ]
+    return {
+        'page': np.array(pages, dtype=float),
+        'setup': np.array(setups, dtype=float),
+    }
+
+
+def get_residual_pools(production_id) -> Dict[str, np.ndarray]:
+    pools = cache.get(_pools_key(production_id))
+    if pools is None:
+        pools = _load_pools(production_id)
+        cache.set(_pools_key(production_id), pools, CACHE_TIMEOUT)
+    return pools
+
+
+def _record(production_id, pool: str, residual: float):
+    """Append one residual to a cached pool; nothing to do when it is not loaded"""
+    pools = cache.get(_pools_key(production_id))
+    if pools is None:
+        return
+    pools[pool] = np.append(pools[pool], residual)[-MAX_HISTORY:]
+    cache.set(_pools_key(production_id), pools, CACHE_TIMEOUT)
+
+
+def record_scene_residual(scene_schedule: SceneSchedule):
+    """A scene completed: its overrun per page joins the history"""
+    if not (scene_schedule.actual_start and scene_schedule.actual_end):
+        return
+    actual = (
+        datetime.combine(datetime.min, scene_schedule.actual_end)
+        - datetime.combine(datetime.min, scene_schedule.actual_start)
+    ) % timedelta(days=1)
+    pages = max(float(scene_schedule.scene.estimated_pages or 0), 0.125)
+    _record(
+        scene_schedule.shooting_day.production_id, 'page',
+        (_minutes(actual) - _minutes(scene_schedule.estimated_duration)) / pages,
+    )
+
+
+def record_setup_residual(shot: Shot):
+    """A shot completed with timings: its overrun joins the setup history"""
+    if shot.estimated_duration is None or shot.actual_duration is None:
+        return
+    _record(shot.scene.production_id, 'setup', _minutes(shot.actual_duration) - _minutes(shot.estimated_duration))
+
+
+def _draw(rng, pool: np.ndarray, kind: str, shape) -> np.ndarray:
+    """Bootstrap sample of a residual pool, prior normal without enough history"""
+    if len(pool) < MIN_HISTORY:
+        mean, std = PRIOR[kind]
+        return rng.normal(mean, std, size=shape)
+    return pool[rng.integers(0, len(pool), size=shape, dtype=np.int32)]
+
+
+def simulate_remaining(planned, pages, setups, pools, simulations=SIMULATIONS, rng=None) -> np.ndarray:
+    """
+    Simulated remaining minutes of work, shape (simulations,)
+
+    planned, pages, setups: per remaining scene (planned minutes still to
+    go, pages, setups not shot yet).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    planned = np.asarray(planned, dtype=float)
+    if not planned.size:
+        return np.zeros(simulations)
+    pages = np.asarray(pages, dtype=float)
+    setups = np.asarray(setups, dtype=int)
+
+    noise = np.empty((simulations, planned.size))
+    with_setups = setups > 0
+    if with_setups.any():
+        draws = _draw(rng, pools['setup'], 'setup', (simulations, int(setups.sum())))
+        offsets = np.concatenate([[0], np.cumsum(setups[with_setups])[:-1]])
+        noise[:, with_setups] = np.add.reduceat(draws, offsets, axis=1)
+    if not with_setups.all():
+        noise[:, ~with_setups] = pages[~with_setups] * _draw(
+            rng, pools['page'], 'page', (simulations, int((~with_setups).sum()))
+        )
+
+    durations = np.maximum(planned + noise, MIN_DURATION_SHARE * planned)
+    return durations.sum(axis=1)
+
+
+class WrapPredictor:
+    """P50/P90 wrap of one shooting day from its remaining scenes and breaks"""
+
+    def __init__(self, shooting_day: ShootingDay, simulations: int = SIMULATIONS, seed=None):
+        self.shooting_day = shooting_day
+        self.simulations = simulations
+        self.rng = np.random.default_rng(seed)
+
+    def _local(self, day_time) -> datetime:
+        return timezone.make_aware(datetime.combine(self.shooting_day.shoot_date, day_time))
+
+    def predict(self, now: Optional[datetime] = None) -> Dict:
+        now = timezone.localtime(now)
+        day = self.shooting_day
+        entries = list(
+            SceneSchedule.objects.filter(shooting_day=day).exclude(status__in=FINISHED_STATUSES)
+            .annotate(setups=Count('scene__shots', filter=~Q(scene__shots__status='completed')))
+            .order_by('day_order')
+            .values_list('estimated_start', 'estimated_duration', 'scene__estimated_pages',
+                         'setups', 'status', 'actual_start')
+        )
+
+        planned, pages, setups = [], [], []
+        for start, duration, scene_pages, scene_setups, status, actual_start in entries:
+            minutes = _minutes(duration)
+            share = 1.0
+            if status in IN_PROGRESS_STATUSES and actual_start:
+                elapsed = max(_minutes(now - self._local(actual_start)), 0)
+                share = max(minutes - elapsed, 0) / minutes if minutes else 0
+            planned.append(minutes * share)
+            pages.append(float(scene_pages or 0) * share)
+            setups.append(scene_setups)
+
+        # The rest of the day starts now, or at the first planned start if the day has not begun
+        start = now
+        if entries and all(status not in IN_PROGRESS_STATUSES for *_, status, _ in entries):
+            start = max(now, self._local(entries[0][0]))
+        breaks = sum(
+            _minutes(duration) for duration in DayBreak.objects.filter(
+                shooting_day=day, actual_start__isnull=True,
+                scheduled_start__gte=timezone.localtime(start).time(),
+            ).values_list('scheduled_duration', flat=True)
+        ) if entries else 0
+
+        pools = get_residual_pools(day.production_id)
+        remaining = simulate_remaining(planned, pages, setups, pools, self.simulations, self.rng) + breaks
+        quantiles = np.percentile(remaining, QUANTILES)
+
+        def wrap_at(minutes):
+            return (start + timedelta(minutes=float(minutes))).replace(microsecond=0).isoformat()
+
+        return {
+            'shooting_day': str(day.pk),
+            'remaining_scenes': len(entries),
+            'planned_wrap': wrap_at(sum(planned) + breaks),
+            **{f'p{q}': wrap_at(value) for q, value in zip(QUANTILES, quantiles)},
+            'simulations': self.simulations,
+            'history': {kind: len(pool) for kind, pool in pools.items()},
+            'computed_at': now.replace(microsecond=0).isoformat(),
+        }
+
+
+def publish_wrap_prediction(shooting_day: ShootingDay, now=None) -> Dict:
+    """Predict, show P50 on the live dashboard and push to the production group"""
+    prediction = WrapPredictor(shooting_day).predict(now)
+    p50 = datetime.fromisoformat(prediction['p50'])
+    LiveDashboardService(shooting_day.production_id, shooting_day.shoot_date).wrap_predicted(
+        timezone.localtime(p50).time()
+    )
+    broadcast(shooting_day.production_id, 'wrap_prediction', prediction)
+    return prediction
+
+
+def publish_todays_wrap_prediction(production_id) -> Optional[Dict]:
+    """After a take or shot: re-predict today's shooting day of the production, if any"""
+    shooting_day = ShootingDay.objects.filter(
+        production_id=production_id, shoot_date=timezone.localdate()
+    ).first()
+    if shooting_day is None:
+        return None
+    return publish_wrap_prediction(shooting_day)
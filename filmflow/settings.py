@@ -153,6 +153,10 @@ if DEBUG:
         'x-requested-with',
     ]
 
+# Background schedule optimizer (apps.schedule.jobs)
+OPTIMIZER_WORKERS = config('OPTIMIZER_WORKERS', default=2, cast=int)
+OPTIMIZER_MAX_TIME_BUDGET = config('OPTIMIZER_MAX_TIME_BUDGET', default=1800, cast=int)
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'